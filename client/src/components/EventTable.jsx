@@ -8,14 +8,28 @@ import {
     TableBody,
     IconButton,
     Menu,
-    MenuItem
+    MenuItem,
+    Checkbox,
+    Box,
+    Button
 } from '@mui/material';
 import MoreVertIcon from '@mui/icons-material/MoreVert';
 import EditIcon from '@mui/icons-material/Edit';
 import DeleteIcon from '@mui/icons-material/Delete';
 import dayjs from 'dayjs';
 
-const EventTable = ({ events, handleEditEvent, handleDeleteEvent }) => {
+const EventTable = ({
+    events,
+    handleEditEvent,
+    handleDeleteEvent,
+    selectedEventIds = [],
+    setSelectedEventIds = () => {},
+    rowOffset = 0,
+    hasNextPage = false,
+    hasPrevPage = false,
+    onNextPage = () => {},
+    onPrevPage = () => {}
+}) => {
     const [anchorEl, setAnchorEl] = useState(null);
     const [selectedEvent, setSelectedEvent] = useState(null);
 
@@ -38,11 +52,34 @@ const EventTable = ({ events, handleEditEvent, handleDeleteEvent }) => {
         handleDeleteEvent(selectedEvent);
     };
 
+    const allSelected = events.length > 0 && events.every((event) => selectedEventIds.includes(event.event_id));
+
+    const handleSelectAll = () => {
+        setSelectedEventIds(allSelected ? [] : events.map((event) => event.event_id));
+    };
+
+    const handleSelect = (eventId) => {
+        setSelectedEventIds(
+            selectedEventIds.includes(eventId)
+                ? selectedEventIds.filter((id) => id !== eventId)
+                : [...selectedEventIds, eventId]
+        );
+    };
+
     return (
-        <TableContainer sx={{ borderRadius: 2, overflowX: 'auto', border: '1px solid #cecece', marginBottom: '30px' }}>
+        <>
+        <TableContainer sx={{ borderRadius: 2, overflowX: 'auto', border: '1px solid #cecece', marginBottom: '16px' }}>
             <Table>
                 <TableHead>
                     <TableRow sx={{ backgroundColor: 'black' }}>
+                    <TableCell padding="checkbox" sx={{ background: 'black' }}>
+                        <Checkbox
+                            checked={allSelected}
+                            indeterminate={selectedEventIds.length > 0 && !allSelected}
+                            onChange={handleSelectAll}
+                            sx={{ color: 'white', '&.Mui-checked, &.MuiCheckbox-indeterminate': { color: 'white' } }}
+                        />
+                    </TableCell>
                     <TableCell sx={{ color: 'white', position: 'sticky', left: 0, background: 'black', zIndex: 2 }}>#</TableCell>
                         <TableCell sx={{ color: 'white' }}>Event ID</TableCell>
                         <TableCell sx={{ color: 'white' }}>Transaction ID</TableCell>
@@ -59,8 +96,14 @@ const EventTable = ({ events, handleEditEvent, handleDeleteEvent }) => {
                 </TableHead>
                 <TableBody>
                     {events.map((event, index) => (
-                        <TableRow key={event.event_id}>
-                            <TableCell sx={{ position: 'sticky', left: 0, background: 'white', zIndex: 1 }}>{index + 1}</TableCell>
+                        <TableRow key={event.event_id} selected={selectedEventIds.includes(event.event_id)}>
+                            <TableCell padding="checkbox">
+                                <Checkbox
+                                    checked={selectedEventIds.includes(event.event_id)}
+                                    onChange={() => handleSelect(event.event_id)}
+                                />
+                            </TableCell>
+                            <TableCell sx={{ position: 'sticky', left: 0, background: 'white', zIndex: 1 }}>{rowOffset + index + 1}</TableCell>
                             <TableCell>{event.event_id}</TableCell>
                             <TableCell>{event.trans_id}</TableCell>
                             <TableCell>{event.client_id}</TableCell>
@@ -91,6 +134,16 @@ const EventTable = ({ events, handleEditEvent, handleDeleteEvent }) => {
                 </TableBody>
             </Table>
         </TableContainer>
+
+        <Box display="flex" justifyContent="flex-end" gap={1} mb={4}>
+            <Button variant="outlined" onClick={onPrevPage} disabled={!hasPrevPage} sx={{ borderRadius: '8px' }}>
+                Previous
+            </Button>
+            <Button variant="outlined" onClick={onNextPage} disabled={!hasNextPage} sx={{ borderRadius: '8px' }}>
+                Next
+            </Button>
+        </Box>
+        </>
     );
 };
 
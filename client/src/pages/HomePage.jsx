@@ -16,7 +16,8 @@ import {
     addEvent,
     addEventBulk,
     updateEvent,
-    deleteEvent
+    deleteEvent,
+    bulkDeleteEvents
 } from '../services/api_helper';
 import { formatDateTimeLocal } from '../utils/utils';
 
@@ -43,14 +44,20 @@ const HomePage = () => {
     const [isFormAdd, setIsFormAdd] = useState(true);
     const [eventToEdit, setEventToEdit] = useState(null);
     const [eventToDelete, setEventToDelete] = useState(null);
+    const [selectedEventIds, setSelectedEventIds] = useState([]);
     const [events, setEvents] = useState([]);
+    // Keyset pages: the cursor of the page shown, the next/prev cursors it came with and its first row's number
+    const [pageCursor, setPageCursor] = useState(null);
+    const [pageLinks, setPageLinks] = useState({ next: null, prev: null });
+    const [pageStart, setPageStart] = useState(0);
     const [toastSeverity, setToastSeverity] = useState('success');
     const [toastMessage, setToastMessage] = useState('');
 
-    const handleFetchEvents = async () => {
+    // Reloads the page shown unless a cursor is given; start is the number of rows before the loaded page
+    const handleFetchEvents = async (cursor = pageCursor, start = () => pageStart) => {
 
         try {
-            const response = await fetchEvents();
+            const response = await fetchEvents(cursor ? { cursor } : {});
 
             if (response.error !== null) {
                 setToastSeverity('error');
@@ -58,6 +65,9 @@ const HomePage = () => {
             }
             else {
                 setEvents(response.data);
+                setPageCursor(cursor);
+                setPageLinks({ next: response.next, prev: response.prev });
+                setPageStart(cursor ? Math.max(start(response.data), 0) : 0);
             }
         } 
         catch (error) {
@@ -66,6 +76,14 @@ const HomePage = () => {
         }
     }
 
+    const handleNextPage = async () => {
+        await handleFetchEvents(pageLinks.next, () => pageStart + events.length);
+    };
+
+    const handlePrevPage = async () => {
+        await handleFetchEvents(pageLinks.prev, (page) => pageStart - page.length);
+    };
+
     useEffect(() => {
 
         const loadEvents = async () => {
@@ -96,6 +114,12 @@ const HomePage = () => {
         setOpenConfirmDialog(true);
     };
 
+    // Without a single event to delete the dialog confirms the selected rows
+    const handleDeleteSelected = () => {
+        setEventToDelete(null);
+        setOpenConfirmDialog(true);
+    };
+
     const submitEvent = async (event) => {
 
         try {
@@ -135,13 +159,22 @@ const HomePage = () => {
     const submitEventBulk = async (events) => {
         
         try {
-            const response = await addEventBulk(events);
+            const response = await addEventBulk(events, (job) => {
+                setToastSeverity('info');
+                setToastMessage(`Processing upload: ${job.processed_records} of ${job.total_records} records`);
+                setShowSuccessToast(true);
+            });
             
             if (response.error !== null) {
                 setToastSeverity('error');
                 setToastMessage(response.error.detail);
                 setShowSuccessToast(true);
             }
+            else if (response.data.status === 'failed') {
+                setToastSeverity('error');
+                setToastMessage(response.data.error);
+                setShowSuccessToast(true);
+            }
             else if (response.data.added_count === 0) {
                 setToastSeverity('error');
                 setToastMessage('Failed to add events. Please try again.');
@@ -172,7 +205,10 @@ const HomePage = () => {
     const confirmDeleteEvent = async () => {
 
         try {
-            const response = await deleteEvent(eventToDelete.event_id);
+            // Selected rows go out in one bulk-delete-events request
+            const response = eventToDelete
+                ? await deleteEvent(eventToDelete.event_id)
+                : await bulkDeleteEvents(selectedEventIds);
     
             if (response.error !== null) {
                 setToastSeverity('error');
@@ -180,13 +216,14 @@ const HomePage = () => {
             } 
             else {
                 setToastSeverity('success');
-                setToastMessage('Event deleted successfully!');
+                setToastMessage(eventToDelete ? 'Event deleted successfully!' : `${response.data.deleted_count} events deleted successfully!`);
+                setSelectedEventIds([]);
                 await handleFetchEvents();
             }
         } 
         catch (error) {
             setToastSeverity('error');
-            setToastMessage('Failed to delete the event. Please try again.');
+            setToastMessage('Failed to delete the events. Please try again.');
         }
 
         setShowSuccessToast(true);
@@ -229,10 +266,30 @@ const HomePage = () => {
                 </Button>
             </Box>
 
+            {selectedEventIds.length > 0 && (
+                <Box display="flex" justifyContent="flex-end" mb={2}>
+                    <Button
+                        variant="outlined"
+                        color="error"
+                        onClick={handleDeleteSelected}
+                        sx={{ borderRadius: '8px' }}
+                    >
+                        Delete Selected ({selectedEventIds.length})
+                    </Button>
+                </Box>
+            )}
+
             <EventTable
                 events={events}
                 handleEditEvent={handleEditEvent}
                 handleDeleteEvent={handleDeleteEvent}
+                selectedEventIds={selectedEventIds}
+                setSelectedEventIds={setSelectedEventIds}
+                rowOffset={pageStart}
+                hasNextPage={pageLinks.next !== null}
+                hasPrevPage={pageLinks.prev !== null}
+                onNextPage={handleNextPage}
+                onPrevPage={handlePrevPage}
             />
 
             <EventForm
@@ -255,7 +312,9 @@ const HomePage = () => {
                 open={openConfirmDialog}
                 onClose={() => setOpenConfirmDialog(false)}
                 onConfirm={confirmDeleteEvent}
-                message="Are you sure you want to delete this event?"
+                message={eventToDelete || selectedEventIds.length === 0
+                    ? "Are you sure you want to delete this event?"
+                    : `Are you sure you want to delete ${selectedEventIds.length} events?`}
             />
 
             <Toast
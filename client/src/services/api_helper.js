@@ -1,9 +1,29 @@
 import api from './api';
 
-export const fetchEvents = async () => {
+// Last ETag and payload per query, sent back as If-None-Match so an unchanged listing answers 304
+const listingValidators = new Map();
+
+// params: limit, cursor (next/prev from a previous page), client_id, location_cd, rc_num, trans_tms_from, trans_tms_to
+export const fetchEvents = async (params = {}) => {
     
+    const validatorKey = JSON.stringify(params);
+    const cached = listingValidators.get(validatorKey);
+
     try {
-        const response = await api.get('api/get-events/');
+        const response = await api.get('api/get-events/', {
+            params,
+            headers: cached ? { 'If-None-Match': cached.etag } : {},
+            validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+        });
+
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+
+        if (response.headers.etag) {
+            listingValidators.set(validatorKey, { etag: response.headers.etag, data: response.data });
+        }
+
         return response.data;
     } 
     catch (error) {
@@ -24,11 +44,41 @@ export const addEvent = async (eventData) => {
     }
 };
 
-export const addEventBulk = async (eventData) => {
-    
+// Milliseconds between ingest job status polls
+const INGEST_JOB_POLL_INTERVAL = 1000;
+const FINISHED_JOB_STATUSES = ['succeeded', 'failed'];
+
+export const fetchIngestJob = async (jobId) => {
+
     try {
-        const response = await api.post('api/create-events-batch/', eventData);
+        const response = await api.get(`api/get-ingest-job/${jobId}/`);
         return response.data;
+    }
+    catch (error) {
+        console.error('[api_helper - fetchIngestJob] Error fetching ingest job: ', error);
+        throw error;
+    }
+};
+
+// The upload is queued as an ingest job so the request returns at once; resolves with the finished job
+export const addEventBulk = async (eventData, onProgress = () => {}) => {
+    
+    try {
+        const response = await api.post('api/create-events-batch/', eventData, { params: { async: 1 } });
+
+        if (response.data.error !== null) {
+            return response.data;
+        }
+
+        let job = response.data;
+
+        while (job.error === null && !FINISHED_JOB_STATUSES.includes(job.data.status)) {
+            onProgress(job.data);
+            await new Promise((resolve) => setTimeout(resolve, INGEST_JOB_POLL_INTERVAL));
+            job = await fetchIngestJob(job.data.job_id);
+        }
+
+        return job;
     } 
     catch (error) {
         console.error('[api_helper - addEventBulk] Error adding event bulk: ', error);
@@ -59,3 +109,28 @@ export const deleteEvent = async (eventId) => {
         throw error;
     }
 };
+
+// updates: [{ event_id, ...fields to change }]; the response lists updated, not_found and failed ids
+export const bulkUpdateEvents = async (updates) => {
+
+    try {
+        const response = await api.put('api/bulk-update-events/', { events: updates });
+        return response.data;
+    } 
+    catch (error) {
+        console.error('[api_helper - bulkUpdateEvents] Error updating events: ', error);
+        throw error;
+    }
+};
+
+export const bulkDeleteEvents = async (eventIds) => {
+
+    try {
+        const response = await api.post('api/bulk-delete-events/', { event_ids: eventIds });
+        return response.data;
+    } 
+    catch (error) {
+        console.error('[api_helper - bulkDeleteEvents] Error deleting events: ', error);
+        throw error;
+    }
+};
@@ -0,0 +1,285 @@
+"""
+Replays a request scenario against a running server and reports
+throughput and latency percentiles per endpoint.
+
+    python -m benchmarks.bench_api http://127.0.0.1:8000 [--scenario benchmarks/requests.jsonl]
+        [--scale 1.0] [--concurrency 16] [--only NAME] [--output results/api.json]
+
+The scenario is JSON lines, one request template per line:
+
+    {"name": "get-events", "method": "GET", "path": "/api/get-events/?limit=100", "count": 200}
+    {"name": "create-event", "method": "POST", "path": "/api/create-event/", "body": {...}, "count": 50}
+
+count is the number of requests per run, multiplied by --scale. A body is
+sent as JSON, or with "ndjson": true as one JSON line per list item.
+Placeholders in paths and body strings are filled in before the clock starts:
+
+    {uuid}                  a new UUID
+    {event_id}              an event created by the seed step
+    {owned_event_id}        an event created for this request alone, for deletes
+    {owned_event_ids:N}     N such events, as a list
+    {event_updates:N}       N seeded events as [{"event_id": ..., "event_cnt": ...}]
+    {records:N}             N new records in the create-events-batch format
+    {job_id}                an ingest job queued by the seed step
+
+Seed events and jobs are created through the API itself, so point it at a
+database that can be written to.
+"""
+import argparse
+import http.client
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from benchmarks.results import new_run, add_result, write_results, latency_metrics
+
+DEFAULT_SCENARIO = Path(__file__).resolve().parent / 'requests.jsonl'
+PLACEHOLDER = re.compile(r'\{(\w+)(?::(\d+))?\}')
+SEED_BATCH_SIZE = 500
+
+
+def make_record(client_id="RPS-00001"):
+    return {
+        "trans_id": str(uuid4()),
+        "trans_tms": "20151022102011927EDT",
+        "rc_num": "10002",
+        "client_id": client_id,
+        "event": [{"event_cnt": 1, "location_cd": "DESTINATION", "location_id1": "T8C", "addr_nbr": "0000000001"}],
+    }
+
+
+class Client:
+    """
+    One keep-alive connection per thread.
+    """
+
+    def __init__(self, base_url, timeout):
+        self.parts = urlsplit(base_url)
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, 'connection', None) is None:
+            connection_class = http.client.HTTPSConnection if self.parts.scheme == 'https' else http.client.HTTPConnection
+            self.local.connection = connection_class(self.parts.netloc, timeout=self.timeout)
+        return self.local.connection
+
+    def send(self, method, path, body=None, content_type='application/json'):
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            headers['Content-Type'] = content_type
+
+        start = time.perf_counter()
+        try:
+            connection = self.connection()
+            connection.request(method, self.parts.path.rstrip('/') + path, body=body, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect for the next request
+            self.local.connection = None
+            return None, time.perf_counter() - start, b''
+        return response.status, time.perf_counter() - start, payload
+
+
+class Seeds:
+    """
+    Events and jobs the placeholders draw from, created before the timed run.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.event_ids = []
+        self.owned_event_ids = []
+        self.job_ids = []
+
+    def create_events(self, count):
+        # event_id is assigned by the server, the seeded events are found again by a client_id of their own
+        client_id = f'BENCH-{uuid4().hex[:12]}'
+        for start in range(0, count, SEED_BATCH_SIZE):
+            records = [make_record(client_id) for _ in range(min(SEED_BATCH_SIZE, count - start))]
+            status, _, payload = self.client.send('POST', '/api/create-events-batch/?mode=insert', json.dumps({"records": records}))
+            if status != 200:
+                raise SystemExit(f'Seeding events failed with status {status}: {payload[:200]!r}')
+
+        event_ids = []
+        path = f'/api/get-events/?client_id={client_id}&limit={SEED_BATCH_SIZE}'
+        while path:
+            status, _, payload = self.client.send('GET', path)
+            if status != 200:
+                raise SystemExit(f'Listing seeded events failed with status {status}: {payload[:200]!r}')
+            page = json.loads(payload)
+            event_ids.extend(event["event_id"] for event in page["data"])
+            path = page["next"] and f'/api/get-events/?client_id={client_id}&limit={SEED_BATCH_SIZE}&cursor={page["next"]}'
+        return event_ids
+
+    def create_job(self):
+        status, _, payload = self.client.send('POST', '/api/create-events-batch/?async=1', json.dumps({"records": [make_record()]}))
+        if status != 202:
+            raise SystemExit(f'Queueing an ingest job failed with status {status}: {payload[:200]!r}')
+        self.job_ids.append(json.loads(payload)["data"]["job_id"])
+
+    def resolve(self, name, size):
+        size = int(size or 1)
+        if name == 'uuid':
+            return str(uuid4())
+        if name == 'event_id':
+            return random.choice(self.event_ids)
+        if name == 'owned_event_id':
+            return self.owned_event_ids.pop()
+        if name == 'owned_event_ids':
+            return [self.owned_event_ids.pop() for _ in range(size)]
+        if name == 'event_updates':
+            return [{"event_id": event_id, "event_cnt": random.randint(1, 9)} for event_id in random.sample(self.event_ids, size)]
+        if name == 'records':
+            return [make_record() for _ in range(size)]
+        if name == 'job_id':
+            return random.choice(self.job_ids)
+        raise ValueError(f'Unknown placeholder {{{name}}}')
+
+    def fill(self, value):
+        if isinstance(value, dict):
+            return {key: self.fill(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.fill(item) for item in value]
+        if not isinstance(value, str):
+            return value
+
+        # A string that is only a placeholder takes the placeholder's value, list or not
+        whole = PLACEHOLDER.fullmatch(value)
+        if whole:
+            return self.resolve(*whole.groups())
+        return PLACEHOLDER.sub(lambda match: str(self.resolve(*match.groups())), value)
+
+
+def owned_events_needed(template):
+    # Every use of an owned placeholder consumes fresh events
+    text = json.dumps([template["path"], template.get("body")])
+    return sum(int(size or 1) for name, size in PLACEHOLDER.findall(text) if name.startswith('owned_event_id'))
+
+
+def load_scenario(path, only=None):
+    templates = []
+    with open(path) as scenario:
+        for line in scenario:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                template = json.loads(line)
+                if not only or only in template["name"]:
+                    templates.append(template)
+    return templates
+
+
+def build_requests(templates, seeds, scale):
+    requests = []
+    for template in templates:
+        for _ in range(max(int(template.get("count", 1) * scale), 1)):
+            path = seeds.fill(template["path"])
+            body = seeds.fill(template.get("body"))
+            content_type = 'application/json'
+            if body is None:
+                encoded = None
+            elif template.get("ndjson"):
+                encoded = ''.join(json.dumps(item) + '\n' for item in body)
+                content_type = 'application/x-ndjson'
+            else:
+                encoded = json.dumps(body)
+            requests.append((template["name"], template["method"], path, encoded, content_type))
+    return requests
+
+
+def run(client, requests, concurrency):
+    results = defaultdict(list)
+
+    def send(request):
+        name, method, path, body, content_type = request
+        status, seconds, _ = client.send(method, path, body, content_type)
+        results[name].append((status, seconds))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(send, requests))
+    return results, time.perf_counter() - start
+
+
+def endpoint_metrics(outcomes, elapsed):
+    served = [seconds for status, seconds in outcomes if status is not None and status < 500]
+    return {
+        "requests": len(outcomes),
+        "errors": len(outcomes) - len(served),
+        "rejected": sum(1 for status, _ in outcomes if status is not None and 400 <= status < 500),
+        "throughput": round(len(served) / elapsed, 1),
+        **latency_metrics(served),
+    }
+
+
+def summarize(run_results, results, elapsed):
+    print(f'{"endpoint":<32} {"requests":>9} {"errors":>7} {"4xx":>6} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+    everything = []
+    for name in sorted(results):
+        everything.extend(results[name])
+        metrics = endpoint_metrics(results[name], elapsed)
+        add_result(run_results, name, **metrics)
+        print_row(name, metrics)
+    metrics = endpoint_metrics(everything, elapsed)
+    add_result(run_results, 'all', **metrics)
+    print_row('all', metrics)
+
+
+def print_row(name, metrics):
+    timings = [metrics.get(key, float('nan')) for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+    print(f'{name:<32} {metrics["requests"]:>9} {metrics["errors"]:>7} {metrics["rejected"]:>6} {metrics["throughput"]:>9.1f} '
+          + ' '.join(f'{timing:>9.1f}' for timing in timings))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a request scenario against a running server')
+    parser.add_argument('base_url', help='Server to load, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--scenario', default=str(DEFAULT_SCENARIO), help='JSON lines request templates')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplies every template count')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at once')
+    parser.add_argument('--seed-events', type=int, default=1000, help='Events created for {event_id} and {event_updates}')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before a request counts as an error')
+    parser.add_argument('--only', help='Replay the templates whose name contains this text')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    client = Client(args.base_url, args.timeout)
+    templates = load_scenario(args.scenario, args.only)
+
+    seeds = Seeds(client)
+    seeds.event_ids = seeds.create_events(args.seed_events)
+    owned = sum(owned_events_needed(template) * max(int(template.get("count", 1) * args.scale), 1) for template in templates)
+    seeds.owned_event_ids = seeds.create_events(owned) if owned else []
+    if any('{job_id}' in template["path"] for template in templates):
+        seeds.create_job()
+
+    requests = build_requests(templates, seeds, args.scale)
+    random.shuffle(requests)
+
+    results, elapsed = run(client, requests, args.concurrency)
+
+    run_results = new_run('api', config={
+        "base_url": args.base_url, "scenario": args.scenario, "scale": args.scale,
+        "concurrency": args.concurrency, "seed_events": args.seed_events,
+    })
+    print(f'{len(requests)} requests in {elapsed:.1f}s at concurrency {args.concurrency}')
+    summarize(run_results, results, elapsed)
+
+    if args.output:
+        write_results(run_results, args.output)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
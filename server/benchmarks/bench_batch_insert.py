@@ -0,0 +1,65 @@
+"""
+Compares the per-row insert loop with the chunked bulk INSERT and COPY
+paths of EventService.create_events_batch. COPY falls back to INSERT when
+the configured database is not PostgreSQL.
+
+    python -m benchmarks.bench_batch_insert [rows ...]
+"""
+import sys
+from uuid import uuid4
+
+from benchmarks.harness import setup_django, test_database, best_of, report
+
+setup_django()
+
+from crud.models import Event  # noqa: E402
+from crud.services.event_service import EventService  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+
+
+def make_events(count):
+    return [
+        {
+            "trans_id": uuid4(),
+            "trans_tms": "2015-10-22 10:20:11.927+05:30",
+            "rc_num": "10002",
+            "client_id": "RPS-00001",
+            "event_cnt": 1,
+            "location_cd": "DESTINATION",
+            "location_id1": "T8C",
+            "location_id2": "1J7",
+            "addr_nbr": "0000000001",
+        }
+        for _ in range(count)
+    ]
+
+
+def per_row_loop(service, events):
+    # The original create_events_batch: one INSERT and one autocommit per row
+    for event in events:
+        try:
+            service.create_event(event)
+        except Exception:
+            pass
+
+
+def clear():
+    Event.objects.all().delete()
+
+
+def main(sizes):
+    service = EventService()
+    with test_database():
+        for size in sizes:
+            events = make_events(size)
+            rows = [
+                ('per-row loop', best_of(lambda: per_row_loop(service, events), setup=clear), size),
+                ('bulk INSERT', best_of(lambda: service.create_events_batch(events, use_copy=False), setup=clear), size),
+                ('COPY', best_of(lambda: service.create_events_batch(events, use_copy=True), setup=clear), size),
+            ]
+            report(f'{size} events', rows)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,136 @@
+"""
+Compares request latency and connections opened with a new connection per
+request, persistent per-thread connections (DB_POOL=false, DB_CONN_MAX_AGE)
+and the connection pool (DB_POOL=true). PostgreSQL only.
+
+    python -m benchmarks.bench_connections --threads 16 --requests 200
+    python -m benchmarks.bench_connections --thread-per-request
+
+Each simulated request goes through request_started and request_finished
+like one served by Django, and reads the event table version in between.
+--thread-per-request runs every request on a fresh thread, which is how
+Django runs sync code under ASGI.
+"""
+import argparse
+import gc
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.harness import setup_django, test_database
+from benchmarks.bench_load import percentile
+
+setup_django()
+
+from django.core import signals  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from crud.backends.pooled_postgresql.base import DatabaseWrapper as PooledDatabaseWrapper  # noqa: E402
+from crud.services.event_service import EventService  # noqa: E402
+
+POSTGRESQL = 'django.db.backends.postgresql'
+POOLED = 'crud.backends.pooled_postgresql'
+
+MODES = [
+    ('new connection', {'ENGINE': POSTGRESQL, 'CONN_MAX_AGE': 0}),
+    ('persistent', {'ENGINE': POSTGRESQL, 'CONN_MAX_AGE': 600}),
+    ('pool', {'ENGINE': POOLED, 'CONN_MAX_AGE': 0}),
+]
+
+
+def simulated_request(service):
+    start = time.perf_counter()
+    signals.request_started.send(sender=None)
+    try:
+        service.get_table_version()
+    finally:
+        signals.request_finished.send(sender=None)
+    return time.perf_counter() - start
+
+
+def on_fresh_thread(service):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(simulated_request(service)))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def run_mode(options, args):
+    # Wrappers are created per thread from this dict, so threads started from here on use the mode
+    connections.settings['default'].update(options)
+    service = EventService()
+    opened = []
+    counter = lambda **kwargs: opened.append(1)
+    connection_created.connect(counter)
+
+    if options['ENGINE'] == POOLED:
+        # What gunicorn's post_worker_init does
+        PooledDatabaseWrapper(connections.settings['default'], 'default').warm_up()
+
+    request = on_fresh_thread if args.thread_per_request else simulated_request
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as executor:
+        latencies = sorted(executor.map(lambda _: request(service), range(args.threads * args.requests)))
+    elapsed = time.perf_counter() - start
+
+    connection_created.disconnect(counter)
+    open_now = open_backends()
+
+    if options['ENGINE'] == POOLED:
+        pools = list(PooledDatabaseWrapper._shared_pools.values())
+        connects = sum(pool.stats()['opened'] for pool in pools)
+        for pool in pools:
+            pool.close_all()
+        PooledDatabaseWrapper._shared_pools.clear()
+    else:
+        connects = len(opened)
+
+    # Connections left behind by finished threads close when their wrappers are collected
+    gc.collect()
+    return latencies, elapsed, connects, open_now
+
+
+def open_backends():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+def summarize(label, latencies, elapsed, connects, open_now):
+    print(label)
+    print(f'  {"requests":<16} {len(latencies):>10}   {len(latencies) / elapsed:.0f} req/s')
+    print(f'  {"latency p50":<16} {percentile(latencies, 0.50) * 1000:>10.2f} ms')
+    print(f'  {"latency p95":<16} {percentile(latencies, 0.95) * 1000:>10.2f} ms')
+    print(f'  {"latency p99":<16} {percentile(latencies, 0.99) * 1000:>10.2f} ms')
+    print(f'  {"latency mean":<16} {statistics.fmean(latencies) * 1000:>10.2f} ms')
+    print(f'  {"connections":<16} {connects:>10} opened   {open_now} still open')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Database connection reuse benchmark')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent request threads')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per thread')
+    parser.add_argument('--thread-per-request', action='store_true', help='Run every request on a new thread, as under ASGI')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if connection.vendor != 'postgresql':
+        print('bench_connections needs a PostgreSQL database')
+        return
+
+    with test_database():
+        original = {key: connections.settings['default'].get(key) for key in ('ENGINE', 'CONN_MAX_AGE')}
+        try:
+            for label, options in MODES:
+                summarize(f'{label}: {args.threads} threads x {args.requests} requests', *run_mode(options, args))
+        finally:
+            connections.settings['default'].update(original)
+
+
+if __name__ == '__main__':
+    main()
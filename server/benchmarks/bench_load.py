@@ -0,0 +1,131 @@
+"""
+Load test against running servers, for comparing the WSGI and ASGI deployments
+under many concurrent slow clients.
+
+    SERVER_INTERFACE=wsgi SERVER_BIND=127.0.0.1:8001 gunicorn -c gunicorn.conf.py
+    SERVER_INTERFACE=asgi SERVER_BIND=127.0.0.1:8002 gunicorn -c gunicorn.conf.py
+
+    python -m benchmarks.bench_load \\
+        wsgi=http://127.0.0.1:8001/api/export-events/ \\
+        asgi=http://127.0.0.1:8002/api/async/export-events/ \\
+        --concurrency 500 --requests 4 --send-delay 0.5 --read-rate 16384
+
+Each client opens a connection per request, dribbles the request headers out
+over --send-delay seconds and reads the response at --read-rate bytes per
+second, like a client on a poor mobile link.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+READ_SIZE = 4096
+
+
+async def fetch(url, send_delay, read_rate, timeout):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    request = (
+        f'GET {path or "/"} HTTP/1.1\r\n'
+        f'Host: {parts.netloc}\r\n'
+        'Accept: application/json\r\n'
+        'Connection: close\r\n'
+        '\r\n'
+    ).encode()
+
+    start = time.perf_counter()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(parts.hostname, parts.port or 80), timeout)
+
+    try:
+        # Slow upload: the request goes out a few bytes at a time
+        pieces = 8 if send_delay else 1
+        step = -(-len(request) // pieces)
+        for offset in range(0, len(request), step):
+            writer.write(request[offset:offset + step])
+            await writer.drain()
+            if send_delay:
+                await asyncio.sleep(send_delay / pieces)
+
+        # Slow download: read a block, then wait as long as the link would take to carry it
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        size = len(status_line)
+        while True:
+            block = await asyncio.wait_for(reader.read(READ_SIZE), timeout)
+            if not block:
+                break
+            size += len(block)
+            if read_rate:
+                await asyncio.sleep(len(block) / read_rate)
+    finally:
+        writer.close()
+
+    status = int(status_line.split()[1]) if status_line else 0
+    return status, time.perf_counter() - start, size
+
+
+async def client(url, requests, args, results):
+    for _ in range(requests):
+        try:
+            status, seconds, size = await fetch(url, args.send_delay, args.read_rate, args.timeout)
+            results.append((status, seconds, size))
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            results.append((None, None, 0))
+
+
+async def run_target(url, args):
+    results = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(url, args.requests, args, results) for _ in range(args.concurrency)))
+    return results, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def summarize(label, results, elapsed):
+    latencies = sorted(seconds for status, seconds, _ in results if status is not None and status < 500)
+    errors = len(results) - len(latencies)
+    transferred = sum(size for _, _, size in results)
+    print(f'{label}')
+    print(f'  {"requests":<16} {len(results):>10}   errors {errors}')
+    print(f'  {"throughput":<16} {len(latencies) / elapsed:>10.1f} req/s   {transferred / elapsed / 1024:.0f} KiB/s')
+    if latencies:
+        print(f'  {"latency p50":<16} {percentile(latencies, 0.50) * 1000:>10.1f} ms')
+        print(f'  {"latency p95":<16} {percentile(latencies, 0.95) * 1000:>10.1f} ms')
+        print(f'  {"latency p99":<16} {percentile(latencies, 0.99) * 1000:>10.1f} ms')
+        print(f'  {"latency mean":<16} {statistics.fmean(latencies) * 1000:>10.1f} ms')
+
+
+def parse_target(target):
+    # label=url; a bare url is its own label
+    label, separator, url = target.partition('=')
+    if not separator or '://' in label:
+        return target, target
+    return label, url
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent slow-client load test')
+    parser.add_argument('targets', nargs='+', help='label=url, one per deployment to compare')
+    parser.add_argument('--concurrency', type=int, default=200, help='Simultaneous clients per target')
+    parser.add_argument('--requests', type=int, default=5, help='Requests per client')
+    parser.add_argument('--send-delay', type=float, default=0.2, help='Seconds spent sending each request')
+    parser.add_argument('--read-rate', type=int, default=0, help='Bytes per second each client reads, 0 for unlimited')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before a stalled request counts as an error')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    for target in args.targets:
+        label, url = parse_target(target)
+        results, elapsed = asyncio.run(run_target(url, args))
+        summarize(f'{label}: {args.concurrency} clients x {args.requests} requests', results, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Per-call timings of the hot functions on the request path: preprocessing,
+validation, serialization and the EventService reads and writes, the last
+against a throwaway test database.
+
+    python -m benchmarks.bench_micro [--scale 1.0] [--only NAME] [--output results/micro.json]
+
+--scale multiplies the number of timed calls. With --output the run is
+saved as JSON for benchmarks.compare.
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from benchmarks.harness import setup_django, test_database
+from benchmarks.results import new_run, add_result, write_results, latency_metrics
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from crud.models import Event  # noqa: E402
+from crud.serializers import EventSerializer, get_event_batch_validator, get_event_row_serializer  # noqa: E402
+from crud.services.event_service import EventService  # noqa: E402
+from crud.utils.DateTimeUtil import convert_to_iso  # noqa: E402
+from crud.utils.PreprocessUtil import process_event  # noqa: E402
+from crud.utils.ValidatorUtil import validate_id_format  # noqa: E402
+
+BATCH_SIZE = 100
+WARMUP_CALLS = 20
+
+
+def make_record():
+    return {
+        "trans_id": str(uuid4()),
+        "trans_tms": "20151022102011927EDT",
+        "rc_num": "10002",
+        "client_id": "RPS-00001",
+        "event": [{"event_cnt": 1, "location_cd": "DESTINATION", "location_id1": "T8C", "addr_nbr": "0000000001"}],
+    }
+
+
+def make_event(**overrides):
+    event = {
+        "trans_id": uuid4(),
+        "trans_tms": datetime(2015, 10, 22, 14, 20, 11, 927000, tzinfo=timezone.utc),
+        "rc_num": "10002",
+        "client_id": "RPS-00001",
+        "event_cnt": 1,
+        "location_cd": "DESTINATION",
+        "location_id1": "T8C",
+        "addr_nbr": "0000000001",
+    }
+    event.update(overrides)
+    return event
+
+
+def make_payload():
+    # What a client sends: strings all the way
+    return {key: str(value) if key != "event_cnt" else value for key, value in make_event().items()}
+
+
+def measure(call, calls, before=None):
+    """
+    Times call() once per iteration. before(), when given, runs untimed
+    ahead of every call and its result is passed to call().
+    """
+    for _ in range(min(WARMUP_CALLS, calls)):
+        call(before()) if before else call()
+
+    timings = []
+    for _ in range(calls):
+        argument = before() if before else None
+        start = time.perf_counter()
+        call(argument) if before else call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def pure_benchmarks():
+    record = make_record()
+    event_id = str(uuid4())
+    payload = make_payload()
+    payloads = [make_payload() for _ in range(BATCH_SIZE)]
+    instance = Event(**make_event())
+    instances = [Event(**make_event()) for _ in range(BATCH_SIZE)]
+    row_serializer = get_event_row_serializer()
+    rows = [tuple(getattr(event, field) for field in row_serializer.field_names) for event in instances]
+    batch_validator = get_event_batch_validator()
+    # What the batch paths validate: records through process_event
+    processed = [process_event(item, item["event"][0]) for item in (make_record() for _ in range(BATCH_SIZE))]
+
+    return [
+        ('process_event', lambda: process_event(record, record["event"][0]), 20000),
+        ('convert_to_iso', lambda: convert_to_iso("20151022102011927EDT"), 20000),
+        ('validate_id_format', lambda: validate_id_format(event_id), 50000),
+        ('EventSerializer.is_valid', lambda: EventSerializer(data=payload).is_valid(), 2000),
+        (f'EventSerializer.is_valid[many={BATCH_SIZE}]', lambda: EventSerializer(data=payloads, many=True).is_valid(), 100),
+        (f'EventSerializer.is_valid[processed, many={BATCH_SIZE}]', lambda: EventSerializer(data=processed, many=True).is_valid(), 100),
+        (f'event batch validator[{BATCH_SIZE}]', lambda: batch_validator.validate(payloads), 1000),
+        (f'event batch validator[processed, {BATCH_SIZE}]', lambda: batch_validator.validate(processed), 1000),
+        ('EventSerializer.data', lambda: EventSerializer(instance).data, 5000),
+        (f'EventSerializer.data[many={BATCH_SIZE}]', lambda: EventSerializer(instances, many=True).data, 100),
+        (f'event row serializer[{BATCH_SIZE}]', lambda: row_serializer.serialize(rows), 1000),
+    ]
+
+
+def service_benchmarks(scale):
+    service = EventService()
+    cache = service.cache
+
+    def seed(count):
+        return [service.create_event(make_event()).event_id for _ in range(count)]
+
+    def seeded_ids(count):
+        ids = seed(count)
+        return lambda: ids.pop()
+
+    def seeded_batches(count):
+        batches = [seed(BATCH_SIZE) for _ in range(count)]
+        return lambda: batches.pop()
+
+    def first_page_uncached():
+        cache.cache.clear()
+
+    calls = lambda base: max(int(base * scale), 1)
+    seed(BATCH_SIZE)
+    known_id = seed(1)[0]
+
+    # Timed calls that consume rows get their rows created up front, untimed
+    return [
+        ('EventService.create_event', lambda: service.create_event(make_event()), calls(300), None),
+        (f'EventService.create_events_batch[{BATCH_SIZE}]',
+         lambda: service.create_events_batch([make_event() for _ in range(BATCH_SIZE)]), calls(20), None),
+        ('EventService.get_event_by_id', lambda: service.get_event_by_id(known_id), calls(500), None),
+        ('EventService.get_events_page (uncached)', lambda _: service.get_events_page(limit=100), calls(200),
+         first_page_uncached),
+        ('EventService.update_event', lambda event_id: service.update_event(event_id, {"event_cnt": 2, "rc_num": "10003"}),
+         calls(300), seeded_ids(calls(300) + WARMUP_CALLS)),
+        ('EventService.delete_event', lambda event_id: service.delete_event(event_id), calls(300),
+         seeded_ids(calls(300) + WARMUP_CALLS)),
+        (f'EventService.update_events_bulk[{BATCH_SIZE}]',
+         lambda event_ids: service.update_events_bulk({event_id: {"event_cnt": 3} for event_id in event_ids}),
+         calls(10), seeded_batches(calls(10) + WARMUP_CALLS)),
+        (f'EventService.delete_events_bulk[{BATCH_SIZE}]', lambda event_ids: service.delete_events_bulk(event_ids),
+         calls(10), seeded_batches(calls(10) + WARMUP_CALLS)),
+    ]
+
+
+def report(name, metrics):
+    print(f'  {name:<46} {metrics["ops_per_s"]:>12.0f} ops/s   p50 {metrics["p50_us"]:>10.1f} us   p99 {metrics["p99_us"]:>10.1f} us')
+
+
+def record(run, name, timings):
+    metrics = {"ops_per_s": round(len(timings) / sum(timings), 1), **latency_metrics(timings, 'us')}
+    add_result(run, name, **metrics)
+    report(name, metrics)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Microbenchmarks of the crud request path')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplies the number of timed calls')
+    parser.add_argument('--only', help='Run the benchmarks whose name contains this text')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    selected = lambda name: not args.only or args.only in name
+    run = new_run('micro', config={"scale": args.scale, "batch_size": BATCH_SIZE}, database=connection.vendor)
+
+    print('Functions')
+    for name, call, calls in pure_benchmarks():
+        if selected(name):
+            record(run, name, measure(call, max(int(calls * args.scale), 1)))
+
+    print('EventService')
+    with test_database():
+        caches[settings.EVENT_CACHE_ALIAS].clear()
+        for name, call, calls, before in service_benchmarks(args.scale):
+            if selected(name):
+                record(run, name, measure(call, calls, before))
+
+    if args.output:
+        write_results(run, args.output)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Throughput of the create-events-batch preprocessing strategies, compared
+with the original one-future-per-event thread pool.
+
+    python -m benchmarks.bench_preprocess [events ...]
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from uuid import uuid4
+
+from benchmarks.harness import best_of, report
+from crud.utils.PreprocessUtil import (
+    CHUNKED_STRATEGY, INLINE_STRATEGY, PROCESS_STRATEGY, process_event, preprocess_records,
+)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+EVENTS_PER_RECORD = 2
+CHUNK_SIZE = 1000
+WORKERS = os.cpu_count() or 1
+
+
+def make_records(event_count):
+    return [
+        {
+            "trans_id": str(uuid4()),
+            "trans_tms": "20151022102011927EDT",
+            "rc_num": "10002",
+            "client_id": "RPS-00001",
+            "event": [
+                {"event_cnt": 1, "location_cd": "DESTINATION", "location_id1": "T8C", "addr_nbr": "0000000001"}
+                for _ in range(EVENTS_PER_RECORD)
+            ],
+        }
+        for _ in range(event_count // EVENTS_PER_RECORD)
+    ]
+
+
+def thread_pool(records):
+    # The original view: one future per event on five threads
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(process_event, item, event) for item in records for event in item["event"]]
+        return [future.result() for future in as_completed(futures)]
+
+
+def main(sizes):
+    for size in sizes:
+        records = make_records(size)
+        rows = [('thread pool (per event)', best_of(lambda: thread_pool(records)), size)]
+        for strategy in (INLINE_STRATEGY, CHUNKED_STRATEGY, PROCESS_STRATEGY):
+            run = lambda: preprocess_records(records, strategy=strategy, chunk_size=CHUNK_SIZE, workers=WORKERS)
+            rows.append((strategy, best_of(run), size))
+        report(f'{size} events', rows)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
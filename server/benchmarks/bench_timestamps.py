@@ -0,0 +1,36 @@
+"""
+Compares per-value convert_to_iso with the column-wise parse_timestamps.
+
+    python -m benchmarks.bench_timestamps [rows ...]
+"""
+import random
+import sys
+
+from benchmarks.harness import best_of, report
+from crud.utils.DateTimeUtil import convert_to_iso, parse_timestamp, parse_timestamps
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def make_column(count, distinct):
+    values = [f'2015{month:02d}{day:02d}{hour:02d}2011927EDT'
+              for month in range(1, 13) for day in range(1, 29) for hour in range(24)]
+    values = values[:distinct]
+    return [random.choice(values) for _ in range(count)]
+
+
+def main(sizes):
+    for size in sizes:
+        rows = []
+        for label, distinct in (('unique', size), ('repeated', 10)):
+            column = make_column(size, distinct)
+            rows.extend([
+                (f'convert_to_iso ({label})', best_of(lambda: [convert_to_iso(value) for value in column]), size),
+                (f'parse_timestamp ({label})', best_of(lambda: [parse_timestamp(value) for value in column]), size),
+                (f'parse_timestamps ({label})', best_of(lambda: parse_timestamps(column)), size),
+            ])
+        report(f'{size} timestamps', rows)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
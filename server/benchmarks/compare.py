@@ -0,0 +1,86 @@
+"""
+Compares two benchmark result files (see results.py) and exits non-zero
+when a metric got worse by more than the threshold, for gating CI on a
+stored baseline.
+
+    python -m benchmarks.compare baseline.json current.json [--threshold 10] [--metrics p95_ms,throughput]
+"""
+import argparse
+import sys
+
+from benchmarks.results import load_results, lower_is_better
+
+RATE_METRICS = ('ops_per_s', 'throughput')
+
+
+def gated(metric, selected):
+    if selected:
+        return metric in selected
+    return lower_is_better(metric) or metric in RATE_METRICS
+
+
+def change(metric, baseline, current):
+    """
+    Relative change in percent, positive when the metric got worse.
+    """
+    if not baseline:
+        return 0.0
+    delta = (current - baseline) / baseline * 100
+    return delta if lower_is_better(metric) else -delta
+
+
+def compare(baseline, current, threshold, selected=None):
+    baseline_results = {result["name"]: result["metrics"] for result in baseline["results"]}
+    regressions = []
+    rows = []
+
+    for result in current["results"]:
+        before = baseline_results.get(result["name"])
+        if before is None:
+            continue
+        for metric, value in result["metrics"].items():
+            if not gated(metric, selected) or metric not in before:
+                continue
+            regressed = change(metric, before[metric], value) > threshold
+            rows.append((result["name"], metric, before[metric], value, regressed))
+            if regressed:
+                regressions.append((result["name"], metric))
+
+    return rows, regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Percent a metric may get worse before it fails')
+    parser.add_argument('--metrics', help='Comma-separated metrics to gate on, default all timings and rates')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+
+    if baseline["benchmark"] != current["benchmark"]:
+        print(f'Cannot compare a {baseline["benchmark"]} run with a {current["benchmark"]} run')
+        return 2
+
+    selected = set(args.metrics.split(',')) if args.metrics else None
+    rows, regressions = compare(baseline, current, args.threshold, selected)
+
+    print(f'{baseline["benchmark"]}: {baseline.get("git_commit") or "?"} -> {current.get("git_commit") or "?"}')
+    for name, metric, before, after, regressed in rows:
+        delta = (after - before) / before * 100 if before else 0.0
+        flag = 'REGRESSION' if regressed else ''
+        print(f'  {name:<46} {metric:<12} {before:>12.2f} {after:>12.2f} {delta:>+8.1f}%  {flag}')
+
+    if regressions:
+        print(f'{len(regressions)} metrics regressed by more than {args.threshold}%')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
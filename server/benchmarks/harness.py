@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    if str(SERVER_DIR) not in sys.path:
+        sys.path.insert(0, str(SERVER_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'server.settings')
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    # Benchmarks write into a throwaway test database, never the configured one
+    from django.test.utils import setup_databases, teardown_databases
+
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+def best_of(fn, repeat=3, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(title, rows):
+    print(title)
+    for label, seconds, count in rows:
+        rate = count / seconds if seconds else float('inf')
+        print(f'  {label:<28} {seconds * 1000:>10.1f} ms  {rate:>12.0f} rows/s')
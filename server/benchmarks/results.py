@@ -0,0 +1,84 @@
+"""
+Machine-readable benchmark results, one JSON file per run:
+
+    {
+        "benchmark": "micro",
+        "started_at": "2024-10-01T12:00:00+00:00",
+        "git_commit": "...",
+        "python": "3.11.7",
+        "database": "postgresql",
+        "config": {...},
+        "results": [{"name": "process_event", "metrics": {"ops_per_s": ..., "p95_us": ...}}, ...]
+    }
+
+compare.py reads two of these files. Metrics ending in _ms or _us are
+timings, lower is better; every other metric is a rate, higher is better.
+"""
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from benchmarks.harness import SERVER_DIR
+
+TIMING_SUFFIXES = ('_ms', '_us')
+
+
+def lower_is_better(metric):
+    return metric.endswith(TIMING_SUFFIXES)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_run(benchmark, config=None, database=None):
+    return {
+        "benchmark": benchmark,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "database": database,
+        "config": config or {},
+        "results": [],
+    }
+
+
+def add_result(run, name, **metrics):
+    run["results"].append({"name": name, "metrics": metrics})
+
+
+def write_results(run, path):
+    with open(path, 'w') as output:
+        json.dump(run, output, indent=2)
+        output.write('\n')
+
+
+def load_results(path):
+    with open(path) as results:
+        return json.load(results)
+
+
+def latency_metrics(latencies, unit='ms'):
+    """
+    Percentiles and mean of a list of durations in seconds, in the given unit.
+    """
+    scale = {'ms': 1000, 'us': 1000000}[unit]
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+
+    def percentile(fraction):
+        return round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * scale, 3)
+
+    return {
+        f'p50_{unit}': percentile(0.50),
+        f'p95_{unit}': percentile(0.95),
+        f'p99_{unit}': percentile(0.99),
+        f'mean_{unit}': round(sum(latencies) / len(latencies) * scale, 3),
+    }
@@ -8,5 +8,24 @@ class CrudConfig(AppConfig):
     def ready(self) -> None:
         
         from crud.services.event_service import EventService
+        from crud.services.rollup_service import RollupService
+        from crud.services.idempotency_service import IdempotencyService
+        from crud.services.ingest_job_service import IngestJobService
+        from crud.services.partition_service import PartitionService
+        from crud.services.import_service import ImportService
         
-        self.event_service = EventService()
+        self.rollup_service = RollupService()
+        self.partition_service = PartitionService()
+        self.event_service = EventService(self.rollup_service, partition_service=self.partition_service)
+        self.idempotency_service = IdempotencyService()
+        self.ingest_job_service = IngestJobService(self.event_service)
+        self.import_service = ImportService(self.event_service)
+        
+        # Every connection gets the query hooks of the metrics and query budget middleware,
+        # including connections opened on other threads before the first request
+        from django.db.backends.signals import connection_created
+        from crud.utils.MetricsUtil import install_query_timer
+        from crud.utils.QueryBudgetUtil import install_query_recorder
+        
+        connection_created.connect(install_query_timer, dispatch_uid='request_metrics')
+        connection_created.connect(install_query_recorder, dispatch_uid='query_budget')
@@ -0,0 +1,11 @@
+from django.urls import path
+from .async_views import create_event, get_events, export_events, get_event_rollups, update_event, delete_event
+
+urlpatterns = [
+    path('create-event/', create_event, name='async-create-event'),
+    path('get-events/', get_events, name='async-get-events'),
+    path('export-events/', export_events, name='async-export-events'),
+    path('get-event-rollups/', get_event_rollups, name='async-get-event-rollups'),
+    path('update-event/<str:event_id>/', update_event, name='async-update-event'),
+    path('delete-event/<str:event_id>/', delete_event, name='async-delete-event'),
+]
@@ -0,0 +1,204 @@
+import json
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST, require_http_methods
+from rest_framework.status import HTTP_500_INTERNAL_SERVER_ERROR, HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT
+from crud.serializers import EventSerializer, EventRollupSerializer, get_event_row_serializer
+from crud.utils.ServiceUtil import ServiceUtil
+from crud.utils.HttpResponseUtil import to_json_http_response, to_json_http_page_response, to_json_http_error_response, INTERNAL_SERVER_ERROR_CODE, VALIDATION_ERROR_CODE, NOT_FOUND_ERROR_CODE, CONFLICT_ERROR_CODE
+from crud.utils.ValidatorUtil import validate_id_format
+from crud.utils.CursorUtil import decode_cursor
+from crud.utils.ExportUtil import astream_events, EXPORT_CONTENT_TYPES, JSON_FORMAT
+from crud.services.rollup_service import ROLLUP_FILTERS
+from crud.views import parse_filters, parse_event_filters, parse_page_limit, listing_etag
+
+# Async counterparts of the event endpoints in views.py, served under api/async/.
+# They are plain Django views: DRF's @api_view has no async support.
+
+def parse_json_body(request):
+
+    if not request.body:
+        return {}
+
+    data = json.loads(request.body)
+
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+
+    return data
+
+@csrf_exempt
+@require_POST
+async def create_event(request):
+
+    try:
+        data = parse_json_body(request)
+    except ValueError:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid JSON")
+
+    try:
+        try:
+            data['trans_id'] = validate_id_format(data['trans_id'])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid Transaction ID format")
+
+        serializer = EventSerializer(data=data)
+
+        if serializer.is_valid():
+
+            event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+            await event_service.acreate_event(serializer.validated_data)
+
+            return to_json_http_response()
+
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, serializer.errors)
+    except IntegrityError:
+        return to_json_http_error_response(HTTP_409_CONFLICT, CONFLICT_ERROR_CODE, "Event already exists")
+    except Exception as e:
+        print(e)
+        return to_json_http_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+@require_GET
+async def get_events(request):
+
+    try:
+        filters = parse_event_filters(request.GET)
+        limit = parse_page_limit(request.GET)
+        cursor = request.GET.get("cursor")
+        cursor = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    try:
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+
+        version, modified_at = await event_service.aget_table_version()
+        etag = listing_etag(version, request.GET)
+        last_modified = modified_at.timestamp() if modified_at else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        serializer = get_event_row_serializer()
+        # Cached under the version the ETag is built from, so the body never lags the ETag
+        page = await event_service.aget_events_page(filters, cursor, limit, fields=serializer.field_names, version=version)
+
+        response = to_json_http_page_response(serializer.serialize(page["events"]), page["next"], page["prev"])
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+    except Exception as e:
+        print(e)
+        return to_json_http_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+@require_GET
+async def export_events(request):
+
+    try:
+        filters = parse_event_filters(request.GET)
+    except ValueError as e:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    export_format = request.GET.get("export_format", JSON_FORMAT)
+
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid export format")
+
+    try:
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+        rows = event_service.aiter_events(filters, fields=get_event_row_serializer().field_names)
+
+        # A slow client holds a coroutine here, not a worker thread
+        return StreamingHttpResponse(
+            astream_events(rows, export_format, settings.EVENT_EXPORT_CHUNK_SIZE),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+    except Exception as e:
+        print(e)
+        return to_json_http_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+@require_GET
+async def get_event_rollups(request):
+
+    try:
+        filters = parse_filters(request.GET, ROLLUP_FILTERS)
+    except ValueError as e:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    try:
+        rollup_service = ServiceUtil.get_service(ServiceUtil.ROLLUP_SERVICE)
+        rollups = [rollup async for rollup in rollup_service.get_rollups(filters)]
+
+        serializer = EventRollupSerializer(rollups, many=True)
+        return to_json_http_response(serializer.data)
+    except Exception as e:
+        print(e)
+        return to_json_http_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+@csrf_exempt
+@require_http_methods(['PUT'])
+async def update_event(request, event_id):
+
+    try:
+        event_id = validate_id_format(event_id)
+    except ValueError as e:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    try:
+        data = parse_json_body(request)
+    except ValueError:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid JSON")
+
+    try:
+        if not data:
+            return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No data found")
+
+        if 'trans_id' in data:
+            try:
+                data['trans_id'] = validate_id_format(data['trans_id'])
+            except (ValueError, TypeError, AttributeError):
+                return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid Transaction ID format")
+
+        serializer = EventSerializer(data=data)
+        if serializer.is_valid():
+            event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+            updated_event = await event_service.aupdate_event(event_id, serializer.validated_data)
+
+            if not updated_event:
+                return to_json_http_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "Event not found")
+
+            return to_json_http_response(data=EventSerializer(updated_event).data)
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, serializer.errors)
+    except IntegrityError:
+        return to_json_http_error_response(HTTP_409_CONFLICT, CONFLICT_ERROR_CODE, "Another event has the same transaction ID, location and timestamp")
+    except Exception as e:
+        print(e)
+        return to_json_http_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+@csrf_exempt
+@require_http_methods(['DELETE'])
+async def delete_event(request, event_id):
+
+    try:
+        event_id = validate_id_format(event_id)
+    except ValueError as e:
+        return to_json_http_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    try:
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+        event = await event_service.adelete_event(event_id)
+
+        if not event:
+            return to_json_http_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "Event not found")
+
+        return to_json_http_response(data=EventSerializer(event).data)
+    except Exception as e:
+        print(e)
+        return to_json_http_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
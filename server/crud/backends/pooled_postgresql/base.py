@@ -0,0 +1,107 @@
+"""
+PostgreSQL backend that borrows connections from a per-process pool
+instead of opening one per request.
+
+Django's persistent connections (CONN_MAX_AGE) belong to a thread, and
+under ASGI every request runs its sync code on a fresh thread, so they are
+never reused there. Django's own pool needs psycopg 3; this one works with
+psycopg2. Settings come from the database's POOL dict, see ConnectionPool.
+"""
+from threading import Lock
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.utils.asyncio import async_unsafe
+from psycopg2 import Error as DatabaseError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from crud.utils.PoolUtil import ConnectionPool
+
+
+def check_connection(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    # Outside autocommit the check opened a transaction, which must not reach the next borrower
+    if not connection.autocommit:
+        connection.rollback()
+    return True
+
+
+def close_connection(connection):
+    connection.close()
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+
+    # One pool per alias and connection parameters, shared by the wrappers of every thread
+    _shared_pools = {}
+    _shared_pools_lock = Lock()
+
+    def get_connection_pool(self, conn_params=None):
+
+        if self.settings_dict.get("CONN_MAX_AGE", 0) != 0:
+            raise ImproperlyConfigured("The pooled backend hands connections back after every request, set CONN_MAX_AGE to 0.")
+
+        conn_params = conn_params or self.get_connection_params()
+        # Keyed by the parameters too, so switching to the test database does not reuse connections to the old one
+        key = (self.alias, repr(sorted(conn_params.items())))
+
+        with self._shared_pools_lock:
+            pool = self._shared_pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    close=close_connection,
+                    check=check_connection if self.settings_dict["CONN_HEALTH_CHECKS"] else None,
+                    **self.settings_dict.get("POOL", {}),
+                )
+                self._shared_pools[key] = pool
+        return pool
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        # Remembered so the connection goes back to the pool it came from
+        self._connection_pool = self.get_connection_pool(conn_params)
+        # The parent connects and sets the connection up once, reused connections keep that setup
+        return self._connection_pool.getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+
+    def _close(self):
+        if self.connection is not None:
+            connection = self.connection
+            discard = bool(connection.closed)
+
+            if not discard and connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                # Returned mid-transaction, e.g. closed inside atomic()
+                try:
+                    connection.rollback()
+                except DatabaseError:
+                    discard = True
+
+            with self.wrap_database_errors:
+                self._connection_pool.putconn(connection, discard=discard)
+            # Another thread may borrow it now
+            self.connection = None
+
+    def close_if_health_check_failed(self):
+        # The pool checks connections when handing them out
+        return
+
+    def warm_up(self):
+        conn_params = self.get_connection_params()
+        return self.get_connection_pool(conn_params).warm_up(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+
+    def close_connection_pool(self):
+        with self._shared_pools_lock:
+            keys = [key for key in self._shared_pools if key[0] == self.alias]
+            pools = [self._shared_pools.pop(key) for key in keys]
+        for pool in pools:
+            pool.close_all()
+
+    def close_pool(self):
+        # Django calls this before it clones or drops the test database
+        super().close_pool()
+        self.close_connection_pool()
+
+    def connection_pool_stats(self):
+        return self.get_connection_pool().stats()
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from crud.utils.PartitionUtil import add_months, month_start
+from crud.utils.ServiceUtil import ServiceUtil
+
+
+class Command(BaseCommand):
+    help = 'Creates the crud_event partitions for the current month and the months ahead, and for the rows in the DEFAULT partition'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=None, help='Months after the current one, EVENT_PARTITION_MONTHS_AHEAD by default')
+
+    def handle(self, *args, **options):
+
+        partition_service = ServiceUtil.get_service(ServiceUtil.PARTITION_SERVICE)
+
+        if not partition_service.is_partitioned():
+            raise CommandError('crud_event is not partitioned, see partition_events and EVENT_PARTITIONING')
+
+        months_ahead = options['months_ahead'] if options['months_ahead'] is not None else settings.EVENT_PARTITION_MONTHS_AHEAD
+        current = month_start(timezone.now())
+        created = partition_service.create_partitions(current, add_months(current, months_ahead))
+        # Rows written past EventService wait in the DEFAULT partition for their month
+        created += partition_service.drain_default()
+
+        for name in created:
+            self.stdout.write(f'Created {name}')
+
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions'))
@@ -0,0 +1,68 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from crud.utils.PartitionUtil import add_months, month_start, partition_name
+from crud.utils.ServiceUtil import ServiceUtil
+
+
+class Command(BaseCommand):
+    help = 'Detaches the crud_event partitions older than the retention period and drops or archives them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None, help='Full months kept before the current one, EVENT_RETENTION_MONTHS by default')
+        archive = parser.add_mutually_exclusive_group()
+        archive.add_argument('--archive-schema', help='Move the detached partitions to this schema instead of dropping them')
+        archive.add_argument('--archive-dir', help='Write the detached partitions to <dir>/<partition>.csv.gz before dropping them')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the partitions that would expire')
+
+    def handle(self, *args, **options):
+
+        partition_service = ServiceUtil.get_service(ServiceUtil.PARTITION_SERVICE)
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+
+        if not partition_service.is_partitioned():
+            raise CommandError('crud_event is not partitioned, see partition_events and EVENT_PARTITIONING')
+
+        months = options['months'] if options['months'] is not None else settings.EVENT_RETENTION_MONTHS
+        if months <= 0:
+            raise CommandError('No retention period, pass --months or set EVENT_RETENTION_MONTHS')
+
+        cutoff = add_months(month_start(timezone.now()), -months)
+
+        if options['dry_run']:
+            expired = [name for name, month in partition_service.list_partitions() if month < cutoff]
+            expired += [f'{partition_name(partition_service.table, month)} (rows in {partition_service.default_partition})'
+                        for month in partition_service.default_months() if month < cutoff]
+            for name in expired:
+                self.stdout.write(f'Would expire {name}')
+            self.stdout.write(self.style.SUCCESS(f'{len(expired)} partitions before {cutoff:%Y-%m} would expire'))
+            return
+
+        if options['archive_dir']:
+            os.makedirs(options['archive_dir'], exist_ok=True)
+
+        # Old rows in the DEFAULT partition get their month partition, and expire with it
+        partition_service.drain_default()
+
+        # Detached first, so the events leave the API and the rollups at once; the tables are handled one by one after
+        detached = event_service.detach_partitions(cutoff)
+
+        for name in detached:
+            try:
+                with transaction.atomic():
+                    if options['archive_schema']:
+                        partition_service.move_table(name, options['archive_schema'])
+                        self.stdout.write(f'Moved {name} to {options["archive_schema"]}')
+                    else:
+                        if options['archive_dir']:
+                            path = os.path.join(options['archive_dir'], f'{name}.csv.gz')
+                            partition_service.export_table(name, path)
+                            self.stdout.write(f'Archived {name} to {path}')
+                        partition_service.drop_table(name)
+                        self.stdout.write(f'Dropped {name}')
+            except Exception as e:
+                raise CommandError(f'{name} is detached but was not archived or dropped: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Expired {len(detached)} partitions before {cutoff:%Y-%m}'))
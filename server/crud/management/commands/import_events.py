@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from crud.services.event_service import ON_CONFLICT_MODES, SKIP_CONFLICTS
+from crud.services.import_service import run_import_range
+from crud.utils.ImportUtil import setup_import_worker
+from crud.utils.ServiceUtil import ServiceUtil
+
+# Same values as create-events-batch?mode=
+WRITE_MODES = {'copy': True, 'insert': False}
+
+
+class Command(BaseCommand):
+    help = 'Imports events from a JSONL file, split into byte ranges written in parallel; an interrupted import resumes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL file with one record, or one {"records": [...]} batch, per line')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes, EVENT_PREPROCESS_WORKERS by default; 1 imports in this process')
+        parser.add_argument('--ranges', type=int, default=None, help='Byte ranges to split a new import into, 4 per worker by default')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Events written and checkpointed at a time, EVENT_BATCH_CHUNK_SIZE by default')
+        parser.add_argument('--mode', choices=sorted(WRITE_MODES), default=None, help='Force COPY or INSERT, picked by chunk size by default')
+        parser.add_argument('--on-conflict', choices=ON_CONFLICT_MODES, default=SKIP_CONFLICTS, help='What to do with events whose natural key exists')
+        parser.add_argument('--max-failures', type=int, default=None, help='Failed lines kept per range in ImportCheckpoint.failures, IMPORT_MAX_FAILURES by default')
+        parser.add_argument('--restart', action='store_true', help='Forget the saved progress of this file and import it from the start')
+
+    def handle(self, *args, **options):
+
+        if not os.path.isfile(options['path']):
+            raise CommandError(f'No such file: {options["path"]}')
+
+        import_service = ServiceUtil.get_service(ServiceUtil.IMPORT_SERVICE)
+        workers = max(options['workers'] or settings.EVENT_PREPROCESS_WORKERS, 1)
+        checkpoints = import_service.plan(options['path'], options['ranges'] or workers * 4, restart=options['restart'])
+        pending = [checkpoint for checkpoint in checkpoints if checkpoint.position < checkpoint.end]
+        arguments = (options['chunk_size'], WRITE_MODES.get(options['mode']), options['on_conflict'], options['max_failures'])
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS(f'{options["path"]} is already imported, --restart imports it again'))
+            return
+
+        if len(pending) < len(checkpoints):
+            self.stdout.write(f'Resuming: {len(checkpoints) - len(pending)} of {len(checkpoints)} ranges already imported')
+
+        self.stdout.write(f'Importing {options["path"]} ({sum(c.end - c.start for c in pending)} bytes) in {len(pending)} ranges with {workers} workers')
+
+        totals = {}
+        started = time.perf_counter()
+
+        def report(done, counts, seconds):
+            for key, value in counts.items():
+                totals[key] = totals.get(key, 0) + value
+            self.stdout.write(
+                f'Range {done}/{len(pending)} done: {counts["lines"]} lines, {counts["events"]} events '
+                f'in {seconds:.1f} s ({counts["events"] / max(seconds, 1e-9):.0f} rows/s)'
+            )
+
+        try:
+            if workers == 1:
+                for done, checkpoint in enumerate(pending, start=1):
+                    report(done, *import_service.run_range(checkpoint, *arguments))
+            else:
+                # The workers must not inherit this process's connection
+                connections.close_all()
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=setup_import_worker) as executor:
+                    futures = [executor.submit(run_import_range, checkpoint.pk, *arguments) for checkpoint in pending]
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        report(done, *future.result())
+        except KeyboardInterrupt:
+            # Every saved chunk is checkpointed with its rows
+            raise CommandError('Interrupted, run the same command again to resume')
+
+        seconds = time.perf_counter() - started
+        events = totals.get('events', 0)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {totals.get("lines", 0)} lines: {totals.get("added_count", 0)} added, {totals.get("updated_count", 0)} updated, '
+            f'{totals.get("skipped_count", 0)} skipped, {totals.get("failed_count", 0)} failed '
+            f'in {seconds:.1f} s ({events / max(seconds, 1e-9):.0f} rows/s)'
+        ))
+
+        if totals.get('failed_count'):
+            self.stdout.write(f'Failed lines are listed by byte offset in ImportCheckpoint.failures for {os.path.abspath(options["path"])}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from crud.utils.ServiceUtil import ServiceUtil
+
+
+class Command(BaseCommand):
+    help = 'Turns crud_event into a table range partitioned by trans_tms month, or back into a plain table with --revert (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=None, help='Months after the current one to create, EVENT_PARTITION_MONTHS_AHEAD by default')
+        parser.add_argument('--revert', action='store_true', help='Copy the attached partitions back into a plain crud_event')
+
+    def handle(self, *args, **options):
+
+        partition_service = ServiceUtil.get_service(ServiceUtil.PARTITION_SERVICE)
+
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning crud_event needs PostgreSQL')
+
+        if options['revert']:
+            if not partition_service.table_is_partitioned():
+                raise CommandError('crud_event is not partitioned')
+            partition_service.unpartition_table()
+            self.stdout.write(self.style.SUCCESS('crud_event is a plain table again, unset EVENT_PARTITIONING'))
+            return
+
+        # Rewrites the whole table in one transaction, writers wait for it
+        created = partition_service.partition_table(options['months_ahead'])
+
+        for name in created:
+            self.stdout.write(f'Created {name}')
+
+        self.stdout.write(self.style.SUCCESS('crud_event is partitioned, set EVENT_PARTITIONING=true and restart the servers and workers'))
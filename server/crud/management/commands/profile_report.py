@@ -0,0 +1,95 @@
+import os
+import pstats
+from collections import defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from crud.utils.ProfileUtil import list_profiles
+
+SORT_KEYS = {'tottime': 2, 'cumtime': 3}
+
+
+def frame_label(frame):
+    filename, line, function = frame
+    if filename == '~':
+        # Built-ins are recorded without a file
+        return function
+    for prefix in ('site-packages' + os.sep, str(settings.BASE_DIR) + os.sep):
+        if prefix in filename:
+            filename = filename.split(prefix, 1)[1]
+            break
+    return f'{function} ({filename}:{line})'
+
+
+def hottest_frames(profile_paths, sort, limit):
+    stats = pstats.Stats(*profile_paths).stats
+    ordered = sorted(stats.items(), key=lambda item: item[1][SORT_KEYS[sort]], reverse=True)
+    return [(frame, calls, tottime, cumtime) for frame, (_, calls, tottime, cumtime, _) in ordered[:limit]]
+
+
+def slowest_statements(profiles, limit):
+    # Grouped by SQL text, a statement repeated per row shows up as one line with many calls
+    statements = defaultdict(lambda: [0, 0.0])
+    for profile in profiles:
+        for query in profile["queries"]:
+            statements[query["sql"]][0] += 1
+            statements[query["sql"]][1] += query["ms"]
+    return sorted(statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+
+
+class Command(BaseCommand):
+    help = 'Summarizes the request profiles stored in PROFILING_DIR by endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', help='Only this endpoint (route name, e.g. create-events-batch)')
+        parser.add_argument('--request-id', help='Only the profiles of this request id, or the one of this X-Profile-Id')
+        parser.add_argument('--list', action='store_true', help='List the stored profiles instead of summarizing them')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='tottime', help='Order frames by own or cumulative time')
+        parser.add_argument('--limit', type=int, default=15, help='Frames and statements shown per endpoint')
+        parser.add_argument('--dir', default=None, help='Profile directory, PROFILING_DIR by default')
+
+    def handle(self, *args, **options):
+
+        profiles = list_profiles(options['dir'])
+
+        if options['endpoint']:
+            profiles = [profile for profile in profiles if profile["endpoint"] == options['endpoint']]
+        if options['request_id']:
+            profiles = [profile for profile in profiles if options['request_id'] in (profile["request_id"], profile.get("profile_id"))]
+
+        profiles = [profile for profile in profiles if os.path.exists(profile["profile_path"])]
+
+        if not profiles:
+            raise CommandError('No profiles found')
+
+        if options['list']:
+            for profile in profiles:
+                self.stdout.write(
+                    f'{profile["profiled_at"]}  {profile.get("profile_id", profile["request_id"])}  {profile["method"]} {profile["path"]}  '
+                    f'{profile["status"]}  {profile["duration_ms"]:.1f} ms  {profile["query_count"]} queries'
+                )
+            return
+
+        by_endpoint = defaultdict(list)
+        for profile in profiles:
+            by_endpoint[profile["endpoint"] or 'unmatched'].append(profile)
+
+        for endpoint, endpoint_profiles in sorted(by_endpoint.items()):
+            durations = [profile["duration_ms"] for profile in endpoint_profiles]
+            query_ms = sum(profile["query_ms"] for profile in endpoint_profiles) / len(endpoint_profiles)
+            query_count = sum(profile["query_count"] for profile in endpoint_profiles) / len(endpoint_profiles)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(endpoint))
+            self.stdout.write(
+                f'  {len(endpoint_profiles)} profiles, mean {sum(durations) / len(durations):.1f} ms, max {max(durations):.1f} ms, '
+                f'mean {query_count:.1f} queries taking {query_ms:.1f} ms'
+            )
+
+            self.stdout.write(f'  {"tottime s":>10} {"cumtime s":>10} {"calls":>9}  function')
+            for frame, calls, tottime, cumtime in hottest_frames([p["profile_path"] for p in endpoint_profiles], options['sort'], options['limit']):
+                self.stdout.write(f'  {tottime:>10.4f} {cumtime:>10.4f} {calls:>9}  {frame_label(frame)}')
+
+            statements = slowest_statements(endpoint_profiles, options['limit'])
+            if statements:
+                self.stdout.write(f'  {"total ms":>10} {"calls":>9}  statement')
+                for sql, (calls, total_ms) in statements:
+                    self.stdout.write(f'  {total_ms:>10.1f} {calls:>9}  {" ".join(sql.split())[:160]}')
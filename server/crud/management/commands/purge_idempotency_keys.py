@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from crud.utils.ServiceUtil import ServiceUtil
+
+
+class Command(BaseCommand):
+    help = 'Deletes stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL'
+
+    def handle(self, *args, **options):
+
+        idempotency_service = ServiceUtil.get_service(ServiceUtil.IDEMPOTENCY_SERVICE)
+        count = idempotency_service.purge_expired()
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {count} idempotency keys'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from crud.utils.ServiceUtil import ServiceUtil
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the event rollup table from crud_event and checks it for consistency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report buckets that disagree with crud_event')
+
+    def handle(self, *args, **options):
+
+        rollup_service = ServiceUtil.get_service(ServiceUtil.ROLLUP_SERVICE)
+
+        if not options['check']:
+            count = rollup_service.rebuild()
+            self.stdout.write(f'Rebuilt {count} rollup buckets')
+
+        mismatches = rollup_service.check()
+
+        for (client_id, location_cd, hour), stored, expected in mismatches:
+            self.stderr.write(f'{client_id} / {location_cd} / {hour.isoformat()}: stored {stored}, expected {expected}')
+
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} rollup buckets are inconsistent')
+
+        self.stdout.write(self.style.SUCCESS('Event rollups are consistent'))
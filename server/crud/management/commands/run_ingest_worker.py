@@ -0,0 +1,43 @@
+import os
+import socket
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from crud.utils.ServiceUtil import ServiceUtil
+
+
+class Command(BaseCommand):
+    help = 'Runs queued batch ingestion jobs; start several to work through the queue in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--worker-id', default=None, help='Name recorded on claimed jobs (default: host:pid)')
+
+    def handle(self, *args, **options):
+
+        ingest_job_service = ServiceUtil.get_service(ServiceUtil.INGEST_JOB_SERVICE)
+        worker = options['worker_id'] or f'{socket.gethostname()}:{os.getpid()}'
+        poll_interval = options['poll_interval'] or settings.INGEST_WORKER_POLL_INTERVAL
+
+        self.stdout.write(f'Ingest worker {worker} started')
+
+        try:
+            while True:
+                count = ingest_job_service.run_pending(worker)
+
+                if count:
+                    self.stdout.write(f'Ran {count} ingest jobs')
+
+                if options['once']:
+                    break
+
+                time.sleep(poll_interval)
+                # Between polls only: --once runs inside the caller's connection, a test's transaction for one
+                close_old_connections()
+        except KeyboardInterrupt:
+            # A job interrupted mid-way is resumed by the next worker once its lease expires
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Ingest worker {worker} stopped'))
@@ -0,0 +1,144 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+from crud.utils.MetricsUtil import request_metrics, start_request, finish_request, UNMATCHED_ENDPOINT, KNOWN_METHODS
+from crud.utils.ProfileUtil import should_profile, request_id_for, profile_id_for, profile_call, profile_meta, write_profile
+from crud.utils.QueryBudgetUtil import recording_queries, check_query_budget, QueryBudgetExceeded, QUERY_BUDGET_RAISE, QUERY_BUDGET_WARN
+
+
+class RequestMetricsMiddleware:
+    """
+    Records count, latency, database queries and time, response size and
+    batch size of every request per endpoint, served at /metrics.
+
+    Goes first in MIDDLEWARE so the timing covers the other middleware.
+    Streamed responses are timed to their headers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        stats, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    def record(self, request, response, seconds, stats):
+        # Labelled by route name, not path, so event IDs do not each get their own series
+        match = request.resolver_match
+        endpoint = match.view_name if match else UNMATCHED_ENDPOINT
+        method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+        size = None if response.streaming else len(response.content)
+        request_metrics.observe_request(endpoint, method, response.status_code, seconds, stats, size)
+
+
+class RequestProfilingMiddleware(MiddlewareMixin):
+    """
+    Runs the view of an opted-in request under cProfile and stores the
+    profile and its query log in PROFILING_DIR, named after the request id
+    and a server-generated suffix.
+
+    A request opts in with the PROFILING_HEADER header, or is sampled at
+    PROFILING_SAMPLE_RATE. The view is called from process_view, on the
+    thread that runs it, which is what cProfile records. Async views are
+    not profiled, and streamed responses only up to their first byte.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if iscoroutinefunction(view_func) or not should_profile(request):
+            return None
+
+        request_id = request_id_for(request)
+        profile_id = profile_id_for(request_id)
+        response, profiler, query_log, seconds = profile_call(lambda: view_func(request, *view_args, **view_kwargs))
+
+        # DRF responses render after the middleware, render now so serialization is in the profile
+        if hasattr(response, 'render') and callable(response.render):
+            profiler.enable()
+            try:
+                response = response.render()
+            finally:
+                profiler.disable()
+
+        write_profile(profile_id, profiler, profile_meta(profile_id, request_id, request, response, query_log, seconds))
+        response['X-Profile-Id'] = profile_id
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Checks every request against the query budget of its endpoint in
+    QUERY_BUDGETS, and for N+1 patterns. QUERY_BUDGET_MODE=raise fails the
+    request (the test suite runs with it), warn prints the report.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.QUERY_BUDGET_MODE not in (QUERY_BUDGET_RAISE, QUERY_BUDGET_WARN):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with recording_queries() as queries:
+            response = self.get_response(request)
+        self.check(request, queries)
+        return response
+
+    async def __acall__(self, request):
+        with recording_queries() as queries:
+            response = await self.get_response(request)
+        self.check(request, queries)
+        return response
+
+    def check(self, request, queries):
+        match = request.resolver_match
+        if match is None:
+            return
+
+        try:
+            check_query_budget(queries, settings.QUERY_BUDGETS.get(match.view_name), f'{request.method} {match.view_name}')
+        except QueryBudgetExceeded as e:
+            if settings.QUERY_BUDGET_MODE == QUERY_BUDGET_RAISE:
+                raise
+            print(e)
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+def create_trans_tms_brin(apps, schema_editor):
+    # BRIN keeps wide trans_tms range scans cheap on the append-ordered table
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS event_tms_brin ON crud_event USING brin (trans_tms)')
+
+
+def drop_trans_tms_brin(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS event_tms_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0006_alter_event_location_cd'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['trans_tms', 'event_id'], name='event_tms_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['client_id', 'trans_tms', 'event_id'], name='event_client_tms_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['location_cd', 'trans_tms', 'event_id'], name='event_location_tms_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['trans_id'], name='event_trans_id_idx'),
+        ),
+        migrations.RunPython(create_trans_tms_brin, drop_trans_tms_brin),
+    ]
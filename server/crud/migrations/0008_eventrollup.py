@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:43
+
+from datetime import timezone
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    Event = apps.get_model('crud', 'Event')
+    EventRollup = apps.get_model('crud', 'EventRollup')
+
+    buckets = (
+        Event.objects
+        .annotate(hour=TruncHour('trans_tms', tzinfo=timezone.utc))
+        .values('client_id', 'location_cd', 'hour')
+        .annotate(total_cnt=Sum('event_cnt'), total_rows=Count('event_id'))
+        .order_by()
+    )
+    EventRollup.objects.bulk_create(
+        [
+            EventRollup(client_id=bucket['client_id'], location_cd=bucket['location_cd'], hour=bucket['hour'],
+                        event_cnt=bucket['total_cnt'], row_count=bucket['total_rows'])
+            for bucket in buckets.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0007_event_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=100)),
+                ('location_cd', models.CharField(max_length=100)),
+                ('hour', models.DateTimeField()),
+                ('event_cnt', models.BigIntegerField(default=0)),
+                ('row_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='event_rollup_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('client_id', 'location_cd', 'hour'), name='event_rollup_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    EventTableVersion = apps.get_model('crud', 'EventTableVersion')
+    EventTableVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0008_eventrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventTableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('modified_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:49
+
+import django.utils.timezone
+import rest_framework.utils.encoders
+from datetime import timezone
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+
+
+def remove_duplicate_events(apps, schema_editor):
+    # Rows repeated by retried batches would block the natural-key constraint, keep one per key
+    Event = apps.get_model('crud', 'Event')
+    EventRollup = apps.get_model('crud', 'EventRollup')
+
+    duplicates = (
+        Event.objects
+        .values('trans_id', 'location_cd', 'trans_tms')
+        .annotate(rows=Count('event_id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    deleted = 0
+    for group in duplicates.iterator():
+        # PostgreSQL has no min() over uuid, so pick the survivor in Python
+        event_ids = list(
+            Event.objects
+            .filter(trans_id=group['trans_id'], location_cd=group['location_cd'], trans_tms=group['trans_tms'])
+            .order_by('event_id')
+            .values_list('event_id', flat=True)
+        )
+        deleted += Event.objects.filter(event_id__in=event_ids[1:]).delete()[0]
+
+    if not deleted:
+        return
+
+    # Same recomputation as rebuild_event_rollups
+    buckets = (
+        Event.objects
+        .annotate(hour=TruncHour('trans_tms', tzinfo=timezone.utc))
+        .values('client_id', 'location_cd', 'hour')
+        .annotate(total_cnt=Sum('event_cnt'), total_rows=Count('event_id'))
+        .order_by()
+    )
+    EventRollup.objects.all().delete()
+    EventRollup.objects.bulk_create(
+        [
+            EventRollup(client_id=bucket['client_id'], location_cd=bucket['location_cd'], hour=bucket['hour'],
+                        event_cnt=bucket['total_cnt'], row_count=bucket['total_rows'])
+            for bucket in buckets.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0009_eventtableversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('status_code', models.IntegerField()),
+                ('response', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(remove_duplicate_events, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_trans_id_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('trans_id', 'location_cd', 'trans_tms'), name='event_natural_key_uniq'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:53
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0010_event_natural_key_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(default='pending', max_length=20)),
+                ('records', models.JSONField(null=True)),
+                ('use_copy', models.BooleanField(null=True)),
+                ('on_conflict', models.CharField(max_length=20)),
+                ('total_records', models.IntegerField(default=0)),
+                ('processed_records', models.IntegerField(default=0)),
+                ('added_count', models.IntegerField(default=0)),
+                ('updated_count', models.IntegerField(default=0)),
+                ('skipped_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('failures', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=255, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ingest_job_queue_idx')],
+            },
+        ),
+    ]
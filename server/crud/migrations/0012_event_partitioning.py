@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:05
+
+from django.db import migrations
+
+
+def is_partitioned(schema_editor, table):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [table])
+        return cursor.fetchone()[0]
+
+
+def add_event_indexes(Event, schema_editor):
+    # The indexes and the natural key under their usual names; the BRIN index is from migration 0007
+    for index in Event._meta.indexes:
+        schema_editor.add_index(Event, index)
+    for constraint in Event._meta.constraints:
+        schema_editor.add_constraint(Event, constraint)
+    schema_editor.execute(f'CREATE INDEX event_tms_brin ON {schema_editor.quote_name(Event._meta.db_table)} USING brin (trans_tms)')
+
+
+def unpartition_events(apps, schema_editor):
+    # Copies the attached partitions back into a plain table; detached or archived ones are left alone
+    Event = apps.get_model('crud', 'Event')
+    table = Event._meta.db_table
+    quote_name = schema_editor.quote_name
+
+    if schema_editor.connection.vendor != 'postgresql' or not is_partitioned(schema_editor, table):
+        return
+
+    plain = f'{table}_unpartitioned'
+    schema_editor.execute(f'CREATE TABLE {quote_name(plain)} (LIKE {quote_name(table)} INCLUDING DEFAULTS)')
+    schema_editor.execute(f'INSERT INTO {quote_name(plain)} SELECT * FROM {quote_name(table)}')
+    schema_editor.execute(f'DROP TABLE {quote_name(table)}')
+    schema_editor.execute(f'ALTER TABLE {quote_name(plain)} RENAME TO {quote_name(table)}')
+
+    schema_editor.execute(f'ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(table + "_pkey")} PRIMARY KEY (event_id)')
+    add_event_indexes(Event, schema_editor)
+    schema_editor.execute(f'ANALYZE {quote_name(table)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0011_ingestjob'),
+    ]
+
+    # Partitioning is a choice per database, made with the partition_events command rather than by
+    # migrate. Unapplying still turns a partitioned crud_event back, earlier migrations expect a plain table.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, unpartition_events),
+    ]
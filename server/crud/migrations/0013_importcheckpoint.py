@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0012_event_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024)),
+                ('file_size', models.BigIntegerField()),
+                ('start', models.BigIntegerField()),
+                ('end', models.BigIntegerField()),
+                ('position', models.BigIntegerField()),
+                ('lines', models.IntegerField(default=0)),
+                ('added_count', models.IntegerField(default=0)),
+                ('updated_count', models.IntegerField(default=0)),
+                ('skipped_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('failures', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('path', 'file_size', 'start'), name='import_checkpoint_range_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:49
+
+import rest_framework.utils.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0013_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response',
+            field=models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder, null=True),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='status_code',
+            field=models.IntegerField(null=True),
+        ),
+    ]
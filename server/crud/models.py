@@ -1,4 +1,5 @@
 import uuid
+from rest_framework.utils.encoders import JSONEncoder
 from django.db import models
 from django.utils import timezone
 
@@ -16,5 +17,128 @@ class Event(models.Model):
     location_id2 = models.CharField(max_length=50, blank=True, null=True)  # Second location ID
     addr_nbr = models.CharField(max_length=50, blank=True, null=True)  # Address number
 
+    class Meta:
+        # Tuned to EventService lookups; the trans_tms BRIN index is PostgreSQL only, see migration 0007
+        indexes = [
+            models.Index(fields=['trans_tms', 'event_id'], name='event_tms_id_idx'),  # Keyset pagination and export order
+            models.Index(fields=['client_id', 'trans_tms', 'event_id'], name='event_client_tms_idx'),
+            models.Index(fields=['location_cd', 'trans_tms', 'event_id'], name='event_location_tms_idx'),
+        ]
+        constraints = [
+            # Natural key, batch ingestion skips or updates rows that repeat it; also serves trans_id lookups
+            models.UniqueConstraint(fields=['trans_id', 'location_cd', 'trans_tms'], name='event_natural_key_uniq'),
+        ]
+
     def __str__(self):
         return f'Event {self.event_id} - Client {self.client_id}'
+
+
+
+class EventRollup(models.Model):
+    
+    # Sum of event_cnt and number of events per client, location and UTC hour, maintained by EventService
+    client_id = models.CharField(max_length=100)
+    location_cd = models.CharField(max_length=100)
+    hour = models.DateTimeField()  # trans_tms truncated to the hour, in UTC
+    event_cnt = models.BigIntegerField(default=0)
+    row_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['client_id', 'location_cd', 'hour'], name='event_rollup_bucket_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['hour'], name='event_rollup_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f'Rollup {self.client_id} - {self.location_cd} - {self.hour}'
+
+
+
+class EventTableVersion(models.Model):
+    
+    # Single row bumped by every EventService write, used as the listing validator (ETag / Last-Modified)
+    version = models.BigIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'Event table version {self.version}'
+
+
+
+class IdempotencyKey(models.Model):
+    
+    # Response stored for an Idempotency-Key header, replayed when a client retries the same request
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64)  # sha256 of the request body
+    status_code = models.IntegerField(null=True)  # None while the request holding the key runs
+    response = models.JSONField(encoder=JSONEncoder, null=True)  # Same encoding as the API responses
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'Idempotency key {self.key}'
+
+
+
+class IngestJob(models.Model):
+    
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    
+    # Batch upload queued by create-events-batch?async=1 and written by run_ingest_worker
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, default=PENDING)
+    records = models.JSONField(null=True)  # Uploaded records, cleared once the job finishes
+    use_copy = models.BooleanField(null=True)
+    on_conflict = models.CharField(max_length=20)
+    total_records = models.IntegerField(default=0)
+    processed_records = models.IntegerField(default=0)  # Records written so far, a restarted job resumes here
+    added_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    failures = models.JSONField(default=list)  # {"record": index, "errors": [...]} per failed record
+    error = models.TextField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=255, blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='ingest_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'Ingest job {self.job_id} - {self.status}'
+
+
+
+class ImportCheckpoint(models.Model):
+    
+    # One byte range of a file loaded by import_events, saved with the rows written from it
+    path = models.CharField(max_length=1024)  # Absolute path of the imported file
+    file_size = models.BigIntegerField()  # A file that changed size is imported afresh
+    start = models.BigIntegerField()
+    end = models.BigIntegerField()
+    position = models.BigIntegerField()  # Next byte to read, the range is done at end
+    lines = models.IntegerField(default=0)
+    added_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    failures = models.JSONField(default=list)  # {"offset": byte offset of the line, "errors": [...]} per failed line
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['path', 'file_size', 'start'], name='import_checkpoint_range_uniq'),
+        ]
+
+    def __str__(self):
+        return f'Import checkpoint {self.path} [{self.start}, {self.end})'
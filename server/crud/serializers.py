@@ -1,7 +1,241 @@
-from rest_framework import serializers
-from .models import Event
+import uuid
+from collections.abc import Mapping
+from datetime import datetime
+from functools import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import MaxLengthValidator, MaxValueValidator, MinValueValidator, ProhibitNullCharactersValidator
+from rest_framework import serializers, ISO_8601
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty, get_error_detail, SkipField
+from rest_framework.settings import api_settings
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+from .models import Event, EventRollup, IngestJob
 
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        # Natural-key conflicts are resolved by EventService, not with a lookup per event
+        validators = []
+
+class EventRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventRollup
+        fields = ['client_id', 'location_cd', 'hour', 'event_cnt', 'row_count']
+
+class IngestJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IngestJob
+        exclude = ['records']
+
+
+def _datetime_encoder(field):
+    # The field's timezone follows the active one, so it is looked up per serialize() rather than per value
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def encode_datetime(value):
+        # Same output as DRF's DateTimeField with the ISO 8601 format
+        if field_timezone is not None and value.utcoffset() is not None:
+            value = value.astimezone(field_timezone)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return encode_datetime
+
+
+def _field_encoder(field):
+    """
+    The encoder of a field's values. It comes as a function called once per
+    serialize(), which returns the encoder.
+    """
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+        return lambda: str
+
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return lambda: _datetime_encoder(field)
+
+    if isinstance(field, serializers.IntegerField):
+        return lambda: int
+
+    if isinstance(field, serializers.CharField):
+        return lambda: str
+
+    # Anything without a shortcut goes through DRF itself
+    return lambda: field.to_representation
+
+
+class EventRowSerializer:
+    """
+    Read-only counterpart of EventSerializer working on values_list() tuples.
+    The encoder table is derived from EventSerializer's fields, so both
+    produce the same JSON.
+    """
+
+    def __init__(self):
+        fields = EventSerializer().fields
+        self.field_names = tuple(name for name, field in fields.items() if not field.write_only)
+        self.encoders = tuple(_field_encoder(fields[name]) for name in self.field_names)
+
+    def _encoders(self):
+        return tuple(encoder() for encoder in self.encoders)
+
+    def _encode(self, row, encoders):
+        return {
+            name: None if value is None else encode(value)
+            for name, encode, value in zip(self.field_names, encoders, row)
+        }
+
+    def to_representation(self, row):
+        return self._encode(row, self._encoders())
+
+    def serialize(self, rows):
+        encoders = self._encoders()
+        return [self._encode(row, encoders) for row in rows]
+
+
+@cache
+def get_event_row_serializer():
+    return EventRowSerializer()
+
+
+# Value a fast check returns when the DRF field has to decide
+_SLOW = object()
+
+_CHAR_VALIDATORS = (MaxLengthValidator, ProhibitNullCharactersValidator, ProhibitSurrogateCharactersValidator)
+_INTEGER_VALIDATORS = (MaxValueValidator, MinValueValidator)
+
+
+def _fast_check(field):
+    """
+    Inline check for the common values of a field, returning what the DRF
+    field would, or _SLOW. It comes as a function called once per batch,
+    which returns the check. None for fields without a shortcut.
+    """
+    validator_types = {type(validator) for validator in field.validators}
+
+    if type(field) is serializers.UUIDField and not validator_types:
+        def check_uuid(value):
+            if isinstance(value, uuid.UUID):
+                return value
+            if type(value) is str:
+                try:
+                    # How DRF parses strings, its error is left to the field
+                    return uuid.UUID(hex=value)
+                except ValueError:
+                    pass
+            return _SLOW
+
+        return lambda: check_uuid
+
+    if type(field) is serializers.DateTimeField and not validator_types:
+        return lambda: _datetime_check(field)
+
+    if type(field) is serializers.IntegerField and validator_types <= set(_INTEGER_VALIDATORS):
+        min_value, max_value = field.min_value, field.max_value
+
+        def check_integer(value):
+            if type(value) is int and (min_value is None or value >= min_value) and (max_value is None or value <= max_value):
+                return value
+            return _SLOW
+
+        return lambda: check_integer
+
+    if type(field) is serializers.CharField and field.trim_whitespace and field.min_length is None and validator_types <= set(_CHAR_VALIDATORS):
+        max_length, allow_null = field.max_length, field.allow_null
+
+        def check_char(value):
+            if type(value) is str:
+                value = value.strip()
+                # ASCII has no surrogates; blanks and long, NUL-bearing or other text get DRF's errors
+                if value and value.isascii() and '\x00' not in value and (max_length is None or len(value) <= max_length):
+                    return value
+            elif value is None and allow_null:
+                return None
+            return _SLOW
+
+        return lambda: check_char
+
+    return None
+
+
+def _datetime_check(field):
+    # The field's timezone follows the active one, so it is looked up per batch rather than per value
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def check_datetime(value):
+        # Naive values, which DRF makes aware with its own checks, and dates are left to the field
+        if field_timezone is None or type(value) is not datetime or value.utcoffset() is None:
+            return _SLOW
+        try:
+            return value.astimezone(field_timezone)
+        except OverflowError:
+            return _SLOW
+
+    return check_datetime
+
+
+class EventBatchValidator:
+    """
+    Column-wise counterpart of EventSerializer(data=rows, many=True) for the
+    batch write paths. Common values are checked inline, column by column;
+    anything else goes through the DRF field itself, so validated data and
+    errors are the same as the serializer's.
+    """
+
+    def __init__(self):
+        self.serializer = EventSerializer()
+        # EventSerializer has no validate_<field> methods or object-level validators to run
+        self.columns = tuple((field.field_name, field, _fast_check(field)) for field in self.serializer._writable_fields)
+
+    def validate(self, rows):
+        """
+        Returns (validated, errors) with one entry per row: the validated data,
+        None for invalid rows, and the errors, {} for valid rows, like
+        ListSerializer.errors.
+        """
+        validated = [{} for _ in rows]
+        errors = [{} for _ in rows]
+
+        # Anything but a dict fails as a whole, with the serializer's own error
+        mappings = []
+        for index, row in enumerate(rows):
+            if isinstance(row, Mapping):
+                mappings.append((index, row))
+                continue
+            try:
+                self.serializer.run_validation(row)
+            except ValidationError as exc:
+                errors[index] = exc.detail
+
+        for name, field, bind in self.columns:
+            check = bind() if bind is not None else None
+            # Left out, like DRF does for a missing optional field without a default
+            skip_missing = not field.required and field.default is empty
+
+            for index, row in mappings:
+                value = row.get(name, empty)
+                if value is empty and skip_missing:
+                    continue
+                try:
+                    result = check(value) if check is not None else _SLOW
+                    if result is _SLOW:
+                        result = field.run_validation(value)
+                except ValidationError as exc:
+                    errors[index][name] = exc.detail
+                except DjangoValidationError as exc:
+                    errors[index][name] = get_error_detail(exc)
+                except SkipField:
+                    pass
+                else:
+                    validated[index][name] = result
+
+        return [None if error else data for data, error in zip(validated, errors)], errors
+
+
+@cache
+def get_event_batch_validator():
+    return EventBatchValidator()
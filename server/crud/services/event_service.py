@@ -1,42 +1,670 @@
-from crud.models import Event
+from itertools import islice
+from uuid import UUID, uuid4
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError, IntegrityError
+from django.db.models import F, Q
+from django.db.models.functions import Now
+from crud.models import Event, EventTableVersion
+from crud.services.partition_service import PartitionService
+from crud.services.rollup_service import RollupService, RollupDeltas, utc_trans_tms
+from crud.utils.CacheUtil import EventCache
+from crud.utils.CopyUtil import CopyStream
+from crud.utils.CursorUtil import encode_cursor, NEXT_CURSOR, PREV_CURSOR
+from crud.utils.PartitionUtil import month_start, partition_bounds
+
+# Listing filters and the lookups they map to
+EVENT_FILTERS = {
+    'client_id': 'client_id',
+    'location_cd': 'location_cd',
+    'rc_num': 'rc_num',
+    'trans_tms_from': 'trans_tms__gte',
+    'trans_tms_to': 'trans_tms__lt',
+}
+
+# Primary key of the single EventTableVersion row
+EVENT_TABLE_VERSION_ID = 1
+
+# Natural key of an event, unique in crud_event; batch writes resolve conflicts on it
+NATURAL_KEY = ('trans_id', 'location_cd', 'trans_tms')
+
+SKIP_CONFLICTS = 'skip'
+UPDATE_CONFLICTS = 'update'
+ON_CONFLICT_MODES = (SKIP_CONFLICTS, UPDATE_CONFLICTS)
+
+# PostgreSQL's limit on bind parameters in one statement
+MAX_QUERY_PARAMS = 65535
+
+
+# Columns the event rollups are keyed on or sum up
+ROLLUP_FIELDS = ('client_id', 'location_cd', 'trans_tms', 'event_cnt')
+
+
+def convert_returned(fields, values):
+    # Raw RETURNING values go through the same converters the ORM applies to query results
+    converted = []
+    for field, value in zip(fields, values):
+        expression = field.get_col(field.model._meta.db_table)
+        for converter in connection.ops.get_db_converters(expression) + expression.get_db_converters(connection):
+            value = converter(value, expression, connection)
+        converted.append(value)
+    return converted
+
+
+def returned_event(fields, row):
+    return Event.from_db(connection.alias, [field.attname for field in fields], convert_returned(fields, row))
+
+
+def natural_key(event):
+    return (Event._meta.get_field('trans_id').to_python(event.trans_id), event.location_cd, utc_trans_tms(event.trans_tms))
+
+
+def batch_result(outcome):
+    # Every outcome list is reported with its count, in the outcome's order
+    result = {}
+    for key, items in outcome.items():
+        result[key] = items
+        result[f"{key}_count"] = len(items)
+    return result
 
 class EventService:
+    def __init__(self, rollup_service=None, cache=None, partition_service=None):
+        # Every write keeps the event rollups up to date in the same transaction
+        self.rollup_service = rollup_service or RollupService()
+        self.cache = cache or EventCache()
+        # With a partitioned crud_event, writes create the month partitions they need first
+        self.partition_service = partition_service or PartitionService()
+
+    def _record_write(self):
+        
+        # The version row is bumped inside the write transaction, readers see it change on commit
+        updated = EventTableVersion.objects.filter(pk=EVENT_TABLE_VERSION_ID).update(version=F('version') + 1, modified_at=Now())
+        if not updated:
+            EventTableVersion.objects.get_or_create(pk=EVENT_TABLE_VERSION_ID, defaults={"version": 1})
+
+    def get_table_version(self):
+        """
+        Returns the (version, modified_at) marker of the event table.
+        """
+        marker = EventTableVersion.objects.filter(pk=EVENT_TABLE_VERSION_ID).values_list('version', 'modified_at').first()
+        return marker or (0, None)
+
+    async def aget_table_version(self):
+        marker = await EventTableVersion.objects.filter(pk=EVENT_TABLE_VERSION_ID).values_list('version', 'modified_at').afirst()
+        return marker or (0, None)
+
+    def get_cache_stats(self):
+        return self.cache.stats()
+
     def get_all_events(self):
         return Event.objects.all()
 
+    def get_events_page(self, filters=None, cursor=None, limit=None, fields=None, version=None):
+        """
+        The page cached under the table version, read unless given. A caller
+        that answers with the version, like the listing ETag, passes it in so
+        the body and the ETag come from the same version.
+        """
+        limit = limit or settings.EVENT_PAGE_SIZE
+        params = (sorted((filters or {}).items()), cursor, limit, tuple(fields or ()))
+        
+        if version is None:
+            version = self.get_table_version()[0]
+        
+        return self.cache.get_page(version, params, lambda: self._load_events_page(filters, cursor, limit, fields))
+
+    async def aget_events_page(self, filters=None, cursor=None, limit=None, fields=None, version=None):
+        
+        limit = limit or settings.EVENT_PAGE_SIZE
+        params = (sorted((filters or {}).items()), cursor, limit, tuple(fields or ()))
+        
+        if version is None:
+            version = (await self.aget_table_version())[0]
+        
+        return await self.cache.aget_page(version, params, lambda: self._aload_events_page(filters, cursor, limit, fields))
+
+    def _load_events_page(self, filters, cursor, limit, fields):
+        events, build_page = self._events_page_query(filters, cursor, limit, fields)
+        return build_page(list(events))
+
+    async def _aload_events_page(self, filters, cursor, limit, fields):
+        events, build_page = self._events_page_query(filters, cursor, limit, fields)
+        return build_page([event async for event in events])
+
+    def _events_page_query(self, filters, cursor, limit, fields):
+        """
+        Keyset pagination over (trans_tms, event_id). cursor is a decoded
+        (trans_tms, event_id, direction) position, see CursorUtil.
+        With fields, rows are values_list() tuples instead of model instances;
+        fields must include trans_tms and event_id.
+        Returns the page query and the function that turns its rows into the page.
+        """
+        events = Event.objects.filter(**{EVENT_FILTERS[key]: value for key, value in (filters or {}).items()})
+        
+        if cursor is None:
+            trans_tms, event_id, direction = None, None, NEXT_CURSOR
+        else:
+            trans_tms, event_id, direction = cursor
+        
+        # The redundant plain trans_tms bound lets the planner start the index scan at the
+        # cursor and prune the crud_event partitions before it, without unpicking the OR
+        if direction == NEXT_CURSOR:
+            if cursor is not None:
+                events = events.filter(Q(trans_tms__gt=trans_tms) | Q(trans_tms=trans_tms, event_id__gt=event_id), trans_tms__gte=trans_tms)
+            events = events.order_by('trans_tms', 'event_id')
+        else:
+            events = events.filter(Q(trans_tms__lt=trans_tms) | Q(trans_tms=trans_tms, event_id__lt=event_id), trans_tms__lte=trans_tms)
+            events = events.order_by('-trans_tms', '-event_id')
+        
+        if fields:
+            events = events.values_list(*fields)
+            tms_index, id_index = fields.index('trans_tms'), fields.index('event_id')
+            position = lambda row: (row[tms_index], row[id_index])
+        else:
+            position = lambda event: (event.trans_tms, event.event_id)
+        
+        def build_page(page):
+            # One extra row tells whether there is a page beyond this one
+            has_more = len(page) > limit
+            page = page[:limit]
+            
+            if direction == PREV_CURSOR:
+                page.reverse()
+            
+            next_cursor = None
+            prev_cursor = None
+            
+            if page:
+                if has_more or direction == PREV_CURSOR:
+                    next_cursor = encode_cursor(*position(page[-1]), NEXT_CURSOR)
+                if cursor is not None and (has_more or direction == NEXT_CURSOR):
+                    prev_cursor = encode_cursor(*position(page[0]), PREV_CURSOR)
+            
+            return {"events": page, "next": next_cursor, "prev": prev_cursor}
+        
+        return events[:limit + 1], build_page
+
+    def iter_events(self, filters=None, chunk_size=None, fields=None):
+        
+        chunk_size = chunk_size or settings.EVENT_EXPORT_CHUNK_SIZE
+        
+        events = Event.objects.filter(**{EVENT_FILTERS[key]: value for key, value in (filters or {}).items()})
+        
+        events = events.order_by('trans_tms', 'event_id')
+        
+        if fields:
+            events = events.values_list(*fields)
+        
+        # iterator() streams through a server-side cursor on PostgreSQL. In autocommit Django
+        # declares it WITH HOLD, which builds the whole result before the first row; inside a
+        # transaction the rows come as they are read
+        with transaction.atomic():
+            yield from events.iterator(chunk_size=chunk_size)
+
+    async def aiter_events(self, filters=None, chunk_size=None, fields=None):
+        
+        chunk_size = chunk_size or settings.EVENT_EXPORT_CHUNK_SIZE
+        rows = self.iter_events(filters, chunk_size, fields)
+        
+        # The generator holds the transaction open, so every step runs on the one thread
+        # sync_to_async gives the request
+        next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+        
+        try:
+            while chunk := await next_chunk():
+                for row in chunk:
+                    yield row
+        finally:
+            await sync_to_async(rows.close)()
+
     def get_event_by_id(self, event_id):
         return Event.objects.filter(event_id=event_id).first()
 
     def create_event(self, data):
-        event = Event(**data)
-        event.save()
+        with transaction.atomic():
+            event = Event(**data)
+            self.partition_service.ensure_partitions([event.trans_tms])
+            event.save()
+            self.rollup_service.apply_events([event])
+            self._record_write()
         return event
     
-    def create_events_batch(self, events):
+    def create_events_batch(self, events, chunk_size=None, use_copy=None, on_conflict=SKIP_CONFLICTS):
+        """
+        Rows whose natural key already exists are skipped, or overwritten
+        with on_conflict='update', so retried batches do not duplicate events.
+        """
+        if on_conflict not in ON_CONFLICT_MODES:
+            raise ValueError(f"Unknown conflict mode: {on_conflict}")
         
-        success_events = []
-        failed_events = []
+        events = list(events)
         
-        for event in events:
-            
-            try:
-                self.create_event(event)
-                success_events.append(event)
-            except Exception as e:
-                failed_events.append(event)
+        if use_copy is None:
+            use_copy = len(events) >= settings.EVENT_COPY_THRESHOLD
+        
+        # COPY is PostgreSQL only, other backends and conflict updates keep the bulk INSERT path
+        if use_copy and connection.vendor == 'postgresql' and on_conflict == SKIP_CONFLICTS:
+            return self._copy_events_batch(events, chunk_size)
+        
+        return self._insert_events_batch(events, chunk_size, on_conflict)
+
+    def _insert_events_batch(self, events, chunk_size=None, on_conflict=SKIP_CONFLICTS):
+        
+        chunk_size = chunk_size or settings.EVENT_BATCH_CHUNK_SIZE
+        
+        outcome = {"added": [], "updated": [], "skipped": [], "failed": []}
+        
+        # One transaction for the whole batch, one savepoint per chunk
+        with transaction.atomic():
+            for start in range(0, len(events), chunk_size):
+                self._insert_chunk(events[start:start + chunk_size], outcome, on_conflict)
+            self._record_write()
+                
+        return batch_result(outcome)
+
+    def _copy_events_batch(self, events, chunk_size=None):
+        
+        outcome = {"added": [], "updated": [], "skipped": [], "failed": []}
+        prepared = []
+        
+        fields = Event._meta.concrete_fields
+        quote_name = connection.ops.quote_name
+        table = quote_name(Event._meta.db_table)
+        staging = quote_name(f'{Event._meta.db_table}_staging_{uuid4().hex}')
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        conflict_target = ', '.join(quote_name(Event._meta.get_field(name).column) for name in NATURAL_KEY)
+        
+        def prepared_rows():
+            # Rows the database would reject on type conversion are sorted out while streaming
+            for event in events:
+                try:
+                    instance = Event(**event)
+                    row = [field.get_db_prep_save(getattr(instance, field.attname), connection) for field in fields]
+                except Exception:
+                    outcome["failed"].append(event)
+                    continue
+                prepared.append((event, instance))
+                yield row
+        
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'CREATE TEMPORARY TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP')
+                cursor.copy_expert(f'COPY {staging} ({columns}) FROM STDIN', CopyStream(prepared_rows()))
+                self.partition_service.ensure_partitions(instance.trans_tms for _, instance in prepared)
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} '
+                    f'ON CONFLICT ({conflict_target}) DO NOTHING RETURNING {quote_name(Event._meta.pk.column)}'
+                )
+                inserted = {UUID(str(row[0])) for row in cursor.fetchall()}
+                cursor.execute(f'DROP TABLE {staging}')
+                
+                deltas = RollupDeltas()
+                for event, instance in prepared:
+                    if instance.event_id in inserted:
+                        deltas.add(instance)
+                        outcome["added"].append(event)
+                    else:
+                        outcome["skipped"].append(event)
                 
-        return {"added": success_events, "added_count": len(success_events), "failed": failed_events, "failed_count": len(failed_events)}
+                self.rollup_service.apply(deltas)
+                self._record_write()
+        except DatabaseError as e:
+            # The whole COPY is rolled back, retry with the bisecting INSERT path
+            print(f'COPY failed, retrying with INSERT: {e}')
+            return self._insert_events_batch(events, chunk_size)
+        
+        return batch_result(outcome)
+
+    def _insert_chunk(self, chunk, outcome, on_conflict):
+        
+        if self._insert_chunk_rows(chunk, outcome, on_conflict):
+            return
+        
+        # A single row that still fails is rejected
+        if len(chunk) == 1:
+            outcome["failed"].append(chunk[0])
+            return
+        
+        # Bisect the failed chunk so that only the bad rows are rejected
+        middle = len(chunk) // 2
+        self._insert_chunk(chunk[:middle], outcome, on_conflict)
+        self._insert_chunk(chunk[middle:], outcome, on_conflict)
+
+    def _insert_chunk_rows(self, chunk, outcome, on_conflict):
+        
+        try:
+            with transaction.atomic():
+                written = self._write_rows(chunk, on_conflict)
+        except Exception:
+            return False
+        
+        for key, events in written.items():
+            outcome[key].extend(events)
+        return True
+
+    def _write_rows(self, events, on_conflict):
+        
+        outcome = {"added": [], "updated": [], "skipped": []}
+        
+        # Of rows repeating a key within the chunk, the first is written under skip and the last under update
+        unique = {}
+        for event in events:
+            instance = Event(**event)
+            key = natural_key(instance)
+            if key not in unique:
+                unique[key] = (event, instance)
+            elif on_conflict == UPDATE_CONFLICTS:
+                outcome["skipped"].append(unique[key][0])
+                unique[key] = (event, instance)
+            else:
+                outcome["skipped"].append(event)
+        
+        deltas = RollupDeltas()
+        existing = set()
+        
+        if on_conflict == UPDATE_CONFLICTS:
+            # Rows about to be overwritten leave their rollup buckets first
+            trans_ids = {key[0] for key in unique}
+            for row in Event.objects.select_for_update().filter(trans_id__in=trans_ids):
+                key = natural_key(row)
+                if key in unique:
+                    existing.add(key)
+                    deltas.add(row, -1)
+        
+        self.partition_service.ensure_partitions(instance.trans_tms for _, instance in unique.values())
+        inserted = self._upsert_rows([instance for _, instance in unique.values()], on_conflict)
+        
+        for key, (event, instance) in unique.items():
+            if key in existing:
+                deltas.add(instance)
+                outcome["updated"].append(event)
+            elif instance.event_id in inserted:
+                deltas.add(instance)
+                outcome["added"].append(event)
+            else:
+                outcome["skipped"].append(event)
+        
+        self.rollup_service.apply(deltas)
+        return outcome
+
+    def _upsert_rows(self, instances, on_conflict):
+        """
+        INSERT ... ON CONFLICT on the natural key. Returns the event_ids of
+        the rows that were newly inserted.
+        """
+        fields = Event._meta.concrete_fields
+        quote_name = connection.ops.quote_name
+        table = quote_name(Event._meta.db_table)
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        conflict_target = ', '.join(quote_name(Event._meta.get_field(name).column) for name in NATURAL_KEY)
+        
+        if on_conflict == UPDATE_CONFLICTS:
+            updates = ', '.join(
+                f'{quote_name(field.column)} = EXCLUDED.{quote_name(field.column)}'
+                for field in fields if not field.primary_key and field.name not in NATURAL_KEY
+            )
+            action = f'DO UPDATE SET {updates}'
+        else:
+            action = 'DO NOTHING'
+        
+        placeholders = f'({", ".join(["%s"] * len(fields))})'
+        batch_size = max(min(connection.ops.bulk_batch_size(fields, instances), MAX_QUERY_PARAMS // len(fields)), 1)
+        inserted = set()
+        
+        with connection.cursor() as cursor:
+            for start in range(0, len(instances), batch_size):
+                batch = instances[start:start + batch_size]
+                params = [field.get_db_prep_save(getattr(instance, field.attname), connection) for instance in batch for field in fields]
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) VALUES {", ".join([placeholders] * len(batch))} '
+                    f'ON CONFLICT ({conflict_target}) {action} RETURNING {quote_name(Event._meta.pk.column)}',
+                    params,
+                )
+                inserted.update(UUID(str(row[0])) for row in cursor.fetchall())
+        
+        return inserted
 
     def update_event(self, event_id, data):
-        event = Event.objects.filter(event_id=event_id).first()
-        if event:
-            for key, value in data.items():
-                setattr(event, key, value)
-            event.save()
+        """
+        Writes the columns in data with one UPDATE ... RETURNING and returns
+        the updated event, or None when it does not exist.
+        """
+        data = {key: value for key, value in data.items() if key != Event._meta.pk.attname}
+        
+        if not data:
+            return Event.objects.filter(event_id=event_id).first()
+        
+        with transaction.atomic():
+            if 'trans_tms' in data:
+                self.partition_service.ensure_partitions([data['trans_tms']])
+            updated = self._update_returning(event_id, data)
+            if updated is None:
+                return None
+            
+            event, previous = updated
+            if previous is not None:
+                deltas = RollupDeltas()
+                deltas.add(previous, -1)
+                deltas.add(event)
+                self.rollup_service.apply(deltas)
+            self._record_write()
         return event
 
+    def _update_returning(self, event_id, data):
+        """
+        Returns None when the event does not exist, else (event, previous).
+        previous holds the rollup columns from before the update, and is
+        None when data does not change any of them.
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(Event._meta.db_table)
+        pk = quote_name(Event._meta.pk.column)
+        fields = Event._meta.concrete_fields
+        columns = ', '.join(f'{table}.{quote_name(field.column)}' for field in fields)
+        
+        assignments = []
+        params = []
+        for key, value in data.items():
+            field = Event._meta.get_field(key)
+            assignments.append(f'{quote_name(field.column)} = %s')
+            params.append(field.get_db_prep_save(value, connection))
+        assignments = ', '.join(assignments)
+        
+        event_id = Event._meta.pk.to_python(event_id)
+        touches_rollups = any(name in data for name in ROLLUP_FIELDS)
+        rollup_fields = [Event._meta.get_field(name) for name in ROLLUP_FIELDS]
+        previous_values = None
+        
+        with connection.cursor() as cursor:
+            if touches_rollups and connection.vendor == 'postgresql':
+                # The locked pre-update row is joined in, so one statement returns the old and the new values
+                old_columns = ', '.join(quote_name(field.column) for field in rollup_fields)
+                cursor.execute(
+                    f'UPDATE {table} SET {assignments} '
+                    f'FROM (SELECT {pk}, {old_columns} FROM {table} WHERE {pk} = %s FOR UPDATE) AS previous '
+                    f'WHERE {table}.{pk} = previous.{pk} '
+                    f'RETURNING {columns}, {", ".join(f"previous.{quote_name(field.column)}" for field in rollup_fields)}',
+                    [*params, Event._meta.pk.get_db_prep_value(event_id, connection)],
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                row, previous_values = row[:len(fields)], row[len(fields):]
+            else:
+                # Other databases cannot RETURN columns of a joined row, the old values are read first
+                if touches_rollups:
+                    previous_values = Event.objects.select_for_update().filter(event_id=event_id).values_list(*ROLLUP_FIELDS).first()
+                    if previous_values is None:
+                        return None
+                cursor.execute(
+                    f'UPDATE {table} SET {assignments} WHERE {pk} = %s RETURNING {columns}',
+                    [*params, Event._meta.pk.get_db_prep_value(event_id, connection)],
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+        
+        event = returned_event(fields, row)
+        previous = None
+        if previous_values is not None:
+            if connection.vendor == 'postgresql':
+                previous_values = convert_returned(rollup_fields, previous_values)
+            previous = Event(**dict(zip(ROLLUP_FIELDS, previous_values)))
+        return event, previous
+
     def delete_event(self, event_id):
-        event = Event.objects.filter(event_id=event_id).first()
-        if event:
-            event.delete()
+        """
+        Deletes with one DELETE ... RETURNING and returns the deleted event,
+        or None when it does not exist.
+        """
+        with transaction.atomic():
+            events = self._delete_returning([event_id])
+            if not events:
+                return None
+            
+            event = events[0]
+            self.rollup_service.apply_events([event], -1)
+            self._record_write()
         return event
+
+    def _delete_returning(self, event_ids):
+        # The deleted rows come back with the statement, their rollup columns need no SELECT first
+        quote_name = connection.ops.quote_name
+        table = quote_name(Event._meta.db_table)
+        fields = Event._meta.concrete_fields
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        params = [Event._meta.pk.get_db_prep_value(Event._meta.pk.to_python(event_id), connection) for event_id in event_ids]
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {quote_name(Event._meta.pk.column)} IN ({", ".join(["%s"] * len(params))}) RETURNING {columns}',
+                params,
+            )
+            return [returned_event(fields, row) for row in cursor.fetchall()]
+
+    def update_events_bulk(self, updates, chunk_size=None):
+        """
+        updates maps event_ids to the columns to write. Each chunk is
+        written with one bulk_update. Returns the updated, not_found and
+        failed event_ids; failed ones would repeat another event's natural key.
+        """
+        chunk_size = chunk_size or settings.EVENT_BATCH_CHUNK_SIZE
+        pk_name = Event._meta.pk.attname
+        updates = [
+            (Event._meta.pk.to_python(event_id), {key: value for key, value in data.items() if key != pk_name})
+            for event_id, data in updates.items()
+        ]
+        
+        outcome = {"updated": [], "not_found": [], "failed": []}
+        
+        # One transaction for the whole request, one savepoint per chunk
+        with transaction.atomic():
+            for start in range(0, len(updates), chunk_size):
+                self._update_chunk(updates[start:start + chunk_size], outcome)
+            if outcome["updated"]:
+                self._record_write()
+        
+        return batch_result(outcome)
+
+    def _update_chunk(self, chunk, outcome):
+        
+        try:
+            with transaction.atomic():
+                updated, not_found = self._bulk_update_rows(chunk)
+        except IntegrityError:
+            if len(chunk) == 1:
+                outcome["failed"].append(chunk[0][0])
+                return
+            # Bisect the failed chunk so that only the conflicting rows are rejected
+            middle = len(chunk) // 2
+            self._update_chunk(chunk[:middle], outcome)
+            self._update_chunk(chunk[middle:], outcome)
+            return
+        
+        outcome["updated"].extend(updated)
+        outcome["not_found"].extend(not_found)
+
+    def _bulk_update_rows(self, chunk):
+        
+        events = Event.objects.select_for_update().in_bulk([event_id for event_id, _ in chunk])
+        deltas = RollupDeltas()
+        changed = []
+        not_found = []
+        fields = set()
+        
+        for event_id, data in chunk:
+            event = events.get(event_id)
+            if event is None:
+                not_found.append(event_id)
+                continue
+            
+            deltas.add(event, -1)
+            for key, value in data.items():
+                setattr(event, key, value)
+                fields.add(key)
+            deltas.add(event)
+            changed.append(event)
+        
+        # Columns only some rows change are written back unchanged for the others
+        if changed and fields:
+            if 'trans_tms' in fields:
+                self.partition_service.ensure_partitions(event.trans_tms for event in changed)
+            Event.objects.bulk_update(changed, sorted(fields))
+        
+        self.rollup_service.apply(deltas)
+        return [event.event_id for event in changed], not_found
+
+    def delete_events_bulk(self, event_ids, chunk_size=None):
+        """
+        Deletes the events with one DELETE ... RETURNING per chunk. Returns
+        the deleted and not_found event_ids.
+        """
+        chunk_size = chunk_size or settings.EVENT_BATCH_CHUNK_SIZE
+        event_ids = list(dict.fromkeys(Event._meta.pk.to_python(event_id) for event_id in event_ids))
+        
+        deleted = set()
+        
+        with transaction.atomic():
+            for start in range(0, len(event_ids), chunk_size):
+                events = self._delete_returning(event_ids[start:start + chunk_size])
+                self.rollup_service.apply_events(events, -1)
+                deleted.update(event.event_id for event in events)
+            if deleted:
+                self._record_write()
+        
+        return batch_result({
+            "deleted": [event_id for event_id in event_ids if event_id in deleted],
+            "not_found": [event_id for event_id in event_ids if event_id not in deleted],
+        })
+
+    def detach_partitions(self, before):
+        """
+        Detaches the crud_event partitions of the months wholly before
+        `before` and removes their rollup buckets, in one transaction.
+        Returns the detached partition names; those tables still hold the
+        rows until the caller drops or archives them.
+        """
+        cutoff = month_start(before)
+        expired = [(name, month) for name, month in self.partition_service.list_partitions() if month < cutoff]
+
+        if not expired:
+            return []
+
+        with transaction.atomic():
+            for name, month in expired:
+                self.partition_service.detach_partition(name)
+                self.rollup_service.remove_range(*partition_bounds(month))
+            self._record_write()
+
+        return [name for name, _ in expired]
+
+    # Writes update the rollups and the table version in one transaction, which the async
+    # ORM cannot open; async callers run them on the sync thread instead
+    async def acreate_event(self, data):
+        return await sync_to_async(self.create_event)(data)
+
+    async def aupdate_event(self, event_id, data):
+        return await sync_to_async(self.update_event)(event_id, data)
+
+    async def adelete_event(self, event_id):
+        return await sync_to_async(self.delete_event)(event_id)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from crud.models import IdempotencyKey
+
+
+class IdempotencyKeyReused(Exception):
+    pass
+
+
+class IdempotencyKeyInProgress(Exception):
+    pass
+
+
+class IdempotencyService:
+    """
+    Stores the responses of requests sent with an Idempotency-Key. The key
+    row is inserted before the request runs and completed after, so of two
+    concurrent requests with the same key only one runs.
+    """
+
+    def _cutoff(self):
+        return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+    def _pending_cutoff(self):
+        return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_PENDING_TIMEOUT)
+
+    def get_response(self, key, fingerprint):
+        """
+        Returns (status_code, response) stored for the key, or None. Raises
+        IdempotencyKeyReused when the key was sent with a different request,
+        IdempotencyKeyInProgress while the request holding it still runs.
+        """
+        record = IdempotencyKey.objects.filter(key=key, created_at__gte=self._cutoff()).first()
+        
+        # A reservation older than IDEMPOTENCY_PENDING_TIMEOUT was left by a request that died
+        if record is None or (record.status_code is None and record.created_at < self._pending_cutoff()):
+            return None
+        
+        if record.fingerprint != fingerprint:
+            raise IdempotencyKeyReused("Idempotency-Key was already used for a different request")
+        
+        if record.status_code is None:
+            raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still in progress")
+        
+        return record.status_code, record.response
+
+    def reserve(self, key, fingerprint):
+        """
+        Takes the key for a request about to run and returns None, or returns
+        what get_response does when the key is already taken.
+        """
+        stored = self.get_response(key, fingerprint)
+        
+        if stored is not None:
+            return stored
+        
+        try:
+            with transaction.atomic():
+                # An expired or abandoned record under the same key is replaced
+                IdempotencyKey.objects.filter(
+                    Q(created_at__lt=self._cutoff()) | Q(status_code__isnull=True, created_at__lt=self._pending_cutoff()),
+                    key=key,
+                ).delete()
+                IdempotencyKey.objects.create(key=key, fingerprint=fingerprint, created_at=timezone.now())
+        except IntegrityError:
+            # A concurrent request with the same key inserted its row first
+            stored = self.get_response(key, fingerprint)
+            if stored is None:
+                raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still in progress")
+            return stored
+        
+        return None
+
+    def save_response(self, key, fingerprint, status_code, response):
+        IdempotencyKey.objects.filter(key=key, fingerprint=fingerprint, status_code__isnull=True).update(
+            status_code=status_code, response=response, created_at=timezone.now()
+        )
+
+    def release(self, key, fingerprint):
+        # The request failed, a retry with the key runs it again
+        IdempotencyKey.objects.filter(key=key, fingerprint=fingerprint, status_code__isnull=True).delete()
+
+    def purge_expired(self):
+        return IdempotencyKey.objects.filter(created_at__lt=self._cutoff()).delete()[0]
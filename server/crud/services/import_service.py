@@ -0,0 +1,149 @@
+import os
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from crud.models import ImportCheckpoint
+from crud.serializers import get_event_batch_validator
+from crud.services.event_service import EventService, SKIP_CONFLICTS
+from crud.utils.ImportUtil import split_byte_ranges, read_lines, parse_import_line
+from crud.utils.PreprocessUtil import process_event
+from crud.utils.ServiceUtil import ServiceUtil
+
+# Counters copied from each create_events_batch result onto the checkpoint
+RESULT_COUNTS = ('added_count', 'updated_count', 'skipped_count')
+
+
+class ImportService:
+
+    def __init__(self, event_service=None):
+        self.event_service = event_service or EventService()
+
+    def plan(self, path, pieces, restart=False):
+        """
+        The checkpoints of the file's byte ranges. An import of the same file
+        that was interrupted keeps its ranges and resumes them; restart
+        forgets its progress.
+        """
+        path = os.path.abspath(path)
+        file_size = os.path.getsize(path)
+        checkpoints = ImportCheckpoint.objects.filter(path=path, file_size=file_size)
+
+        if restart:
+            checkpoints.delete()
+        elif checkpoints.exists():
+            return list(checkpoints.order_by('start'))
+
+        ImportCheckpoint.objects.bulk_create(
+            ImportCheckpoint(path=path, file_size=file_size, start=start, end=end, position=start)
+            for start, end in split_byte_ranges(path, pieces)
+        )
+        return list(checkpoints.order_by('start'))
+
+    def run_range(self, checkpoint, chunk_size=None, use_copy=None, on_conflict=SKIP_CONFLICTS, max_failures=None):
+        """
+        Imports the rest of the checkpoint's byte range, saving progress with
+        every chunk of chunk_size events and up to max_failures failed lines.
+        Returns the counts of this run and its duration in seconds.
+        """
+        chunk_size = chunk_size or settings.EVENT_BATCH_CHUNK_SIZE
+        max_failures = settings.IMPORT_MAX_FAILURES if max_failures is None else max_failures
+        started = time.perf_counter()
+        totals = dict.fromkeys(('lines', 'events', *RESULT_COUNTS, 'failed_count'), 0)
+
+        step = {"lines": 0, "events": [], "failures": {}}
+
+        def fail(offset, error):
+            step["failures"].setdefault(offset, []).append(error)
+
+        def save(position):
+            counts = self._save_step(checkpoint, step["lines"], step["events"], step["failures"], position, use_copy, on_conflict, max_failures)
+            for key, value in counts.items():
+                totals[key] += value
+            step.update(lines=0, events=[], failures={})
+
+        with open(checkpoint.path, 'rb') as source:
+            for offset, next_offset, line in read_lines(source, checkpoint.position, checkpoint.end):
+
+                if not line.strip():
+                    continue
+
+                step["lines"] += 1
+
+                try:
+                    records = parse_import_line(line)
+                except ValueError:
+                    fail(offset, "Invalid record")
+                    records = []
+
+                for item in records:
+                    for event in item["event"]:
+
+                        try:
+                            event_copy = process_event(item, event)
+                        except (KeyError, TypeError, AttributeError, ValueError):
+                            event_copy = None
+
+                        if not event_copy:
+                            fail(offset, "Invalid Transaction ID or timestamp")
+                            continue
+
+                        step["events"].append((offset, event_copy))
+
+                # Chunks end on line boundaries, so a resumed range starts at a whole line
+                if len(step["events"]) >= chunk_size:
+                    save(next_offset)
+
+        save(checkpoint.end)
+        return totals, time.perf_counter() - started
+
+    def _save_step(self, checkpoint, lines, candidates, failures, position, use_copy, on_conflict, max_failures):
+
+        counts = dict.fromkeys(RESULT_COUNTS, 0)
+        events = []
+        offsets = {}
+
+        # The step's events are validated together, column by column
+        validated_rows, row_errors = get_event_batch_validator().validate([event_copy for _, event_copy in candidates])
+
+        for (offset, _), validated, error in zip(candidates, validated_rows, row_errors):
+            if error:
+                failures.setdefault(offset, []).append(error)
+                continue
+
+            events.append(validated)
+            offsets[id(validated)] = offset
+
+        # The rows and the position after them commit together, a resumed range neither skips nor repeats lines
+        with transaction.atomic():
+            if events:
+                result = self.event_service.create_events_batch(events, use_copy=use_copy, on_conflict=on_conflict)
+
+                for key in RESULT_COUNTS:
+                    counts[key] = result[key]
+
+                for event in result["failed"]:
+                    failures.setdefault(offsets[id(event)], []).append("Failed to save event")
+
+            counts["lines"] = lines
+            counts["events"] = len(events)
+            counts["failed_count"] = sum(len(errors) for errors in failures.values())
+
+            for key in ('lines', *RESULT_COUNTS, 'failed_count'):
+                setattr(checkpoint, key, getattr(checkpoint, key) + counts[key])
+
+            room = max_failures - len(checkpoint.failures)
+            checkpoint.failures.extend({"offset": offset, "errors": errors} for offset, errors in sorted(failures.items())[:max(room, 0)])
+            checkpoint.position = position
+            checkpoint.updated_at = timezone.now()
+            checkpoint.save()
+
+        return counts
+
+
+def run_import_range(checkpoint_id, chunk_size=None, use_copy=None, on_conflict=SKIP_CONFLICTS, max_failures=None):
+    # Entry point of the import_events pool workers, which set Django up in their initializer
+    close_old_connections()
+    checkpoint = ImportCheckpoint.objects.get(pk=checkpoint_id)
+    import_service = ServiceUtil.get_service(ServiceUtil.IMPORT_SERVICE)
+    return import_service.run_range(checkpoint, chunk_size, use_copy, on_conflict, max_failures)
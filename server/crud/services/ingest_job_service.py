@@ -0,0 +1,171 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from crud.models import IngestJob
+from crud.serializers import get_event_batch_validator
+from crud.services.event_service import EventService, SKIP_CONFLICTS
+from crud.utils.PreprocessUtil import process_event
+
+# Counters copied from each create_events_batch result onto the job
+RESULT_COUNTS = ('added_count', 'updated_count', 'skipped_count')
+
+
+class IngestJobLeaseLost(Exception):
+    pass
+
+
+class IngestJobService:
+
+    def __init__(self, event_service=None):
+        self.event_service = event_service or EventService()
+
+    def enqueue(self, records, use_copy=None, on_conflict=SKIP_CONFLICTS):
+        return IngestJob.objects.create(records=records, use_copy=use_copy, on_conflict=on_conflict, total_records=len(records))
+
+    def get_job(self, job_id):
+        # The stored upload is not needed to report progress
+        return IngestJob.objects.defer('records').filter(job_id=job_id).first()
+
+    def claim_next(self, worker):
+        """
+        Locks the oldest pending job, or a running one whose worker stopped
+        sending heartbeats, and marks it running for this worker. SKIP LOCKED
+        lets several workers poll the same queue.
+        """
+        stale = timezone.now() - timedelta(seconds=settings.INGEST_JOB_LEASE)
+
+        while True:
+            with transaction.atomic():
+                job = (
+                    IngestJob.objects
+                    .select_for_update(skip_locked=True)
+                    .defer('records')
+                    .filter(Q(status=IngestJob.PENDING) | Q(status=IngestJob.RUNNING, heartbeat_at__lt=stale))
+                    .order_by('created_at')
+                    .first()
+                )
+
+                if job is None:
+                    return None
+
+                now = timezone.now()
+
+                if job.attempts >= settings.INGEST_JOB_MAX_ATTEMPTS:
+                    self._finish(job, IngestJob.FAILED, "Job was abandoned by its workers too many times")
+                    continue
+
+                job.status = IngestJob.RUNNING
+                job.attempts += 1
+                job.worker = worker
+                job.heartbeat_at = now
+                job.started_at = job.started_at or now
+                job.save(update_fields=['status', 'attempts', 'worker', 'heartbeat_at', 'started_at'])
+                return job
+
+    def run_job(self, job):
+
+        records = IngestJob.objects.values_list('records', flat=True).get(job_id=job.job_id) or []
+        chunk_size = settings.INGEST_JOB_CHUNK_SIZE
+        validator = get_event_batch_validator()
+
+        try:
+            # A job taken over from a lost worker resumes after its last saved step
+            for start in range(job.processed_records, len(records), chunk_size):
+                self._run_step(job, records, start, min(start + chunk_size, len(records)), validator)
+            self._finish(job, IngestJob.SUCCEEDED)
+        except IngestJobLeaseLost as e:
+            # Another worker took the job over, it owns the outcome now
+            print(e)
+        except Exception as e:
+            print(e)
+            self._finish(job, IngestJob.FAILED, str(e))
+
+        return job
+
+    def run_pending(self, worker, limit=None):
+        """
+        Runs queued jobs until the queue is empty or limit jobs have run.
+        Returns the number of jobs run.
+        """
+        count = 0
+
+        while limit is None or count < limit:
+            job = self.claim_next(worker)
+            if job is None:
+                break
+            self.run_job(job)
+            count += 1
+
+        return count
+
+    def _run_step(self, job, records, start, end, validator):
+
+        candidates = []
+        events = []
+        positions = {}
+        failures = {}
+
+        def fail(index, error):
+            failures.setdefault(index, []).append(error)
+
+        for index in range(start, end):
+            item = records[index]
+
+            if not isinstance(item, dict) or not isinstance(item.get("event"), list):
+                fail(index, "Invalid record")
+                continue
+
+            for event in item["event"]:
+
+                try:
+                    event_copy = process_event(item, event)
+                except (KeyError, TypeError, AttributeError, ValueError):
+                    event_copy = None
+
+                if not event_copy:
+                    fail(index, "Invalid Transaction ID or timestamp")
+                    continue
+
+                candidates.append((index, event_copy))
+
+        # The step's events are validated together, column by column
+        validated_rows, row_errors = validator.validate([event_copy for _, event_copy in candidates])
+
+        for (index, _), validated, error in zip(candidates, validated_rows, row_errors):
+            if error:
+                fail(index, error)
+                continue
+
+            events.append(validated)
+            positions[id(validated)] = index
+
+        # The rows and the progress that records them commit together, so a resumed job neither skips nor repeats a step
+        with transaction.atomic():
+            if not IngestJob.objects.select_for_update().filter(job_id=job.job_id, worker=job.worker, status=IngestJob.RUNNING).exists():
+                raise IngestJobLeaseLost(f"Ingest job {job.job_id} was taken over by another worker")
+
+            if events:
+                result = self.event_service.create_events_batch(events, use_copy=job.use_copy, on_conflict=job.on_conflict)
+
+                for key in RESULT_COUNTS:
+                    setattr(job, key, getattr(job, key) + result[key])
+
+                for event in result["failed"]:
+                    fail(positions[id(event)], "Failed to save event")
+
+            job.failed_count += sum(len(errors) for errors in failures.values())
+            room = settings.INGEST_JOB_MAX_FAILURES - len(job.failures)
+            job.failures.extend({"record": index, "errors": errors} for index, errors in sorted(failures.items())[:max(room, 0)])
+            job.processed_records = end
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=[*RESULT_COUNTS, 'failed_count', 'failures', 'processed_records', 'heartbeat_at'])
+
+    def _finish(self, job, status, error=None):
+
+        job.status = status
+        job.error = error
+        job.finished_at = timezone.now()
+        job.records = None
+        job.save(update_fields=['status', 'error', 'finished_at', 'records'])
@@ -0,0 +1,270 @@
+import gzip
+from datetime import timezone
+from threading import Lock
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone as django_timezone
+from crud.models import Event
+from crud.utils.PartitionUtil import add_months, month_start, month_range, partition_name, partition_month, partition_bounds, default_partition_name
+from crud.utils.QueryBudgetUtil import unbudgeted
+
+
+class PartitionService:
+    """
+    Monthly trans_tms range partitions of crud_event, on PostgreSQL once
+    partition_events has partitioned the table and EVENT_PARTITIONING is
+    set. Everywhere else the methods are no-ops.
+    """
+
+    def __init__(self):
+        # Months known to have a partition, loaded on first use and only grown after commit
+        self._known_months = None
+        self._partitioned = None
+        self._lock = Lock()
+
+    @property
+    def table(self):
+        return Event._meta.db_table
+
+    @property
+    def default_partition(self):
+        return default_partition_name(self.table)
+
+    def reset(self):
+        # Forgets what was loaded from the catalog, after the table was rebuilt
+        with self._lock:
+            self._known_months = None
+            self._partitioned = None
+
+    def is_partitioned(self):
+        if not settings.EVENT_PARTITIONING or connection.vendor != 'postgresql':
+            return False
+        if self._partitioned is None:
+            with unbudgeted():
+                self._partitioned = self.table_is_partitioned()
+        return self._partitioned
+
+    def table_is_partitioned(self):
+        """
+        Whether crud_event is a partitioned table, whatever EVENT_PARTITIONING says.
+        """
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [self.table])
+            return cursor.fetchone()[0]
+
+    def partition_table(self, months_ahead=None):
+        """
+        Rebuilds crud_event as a table range partitioned by trans_tms month,
+        copying the rows over: one partition per month with events, the
+        current month and months_ahead more, and a DEFAULT partition.
+        A table that is already partitioned only gets its DEFAULT partition
+        if it has none. Returns the names of the partitions created.
+        """
+        table = self.table
+        quote_name = connection.ops.quote_name
+        months_ahead = settings.EVENT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        created = []
+
+        with connection.schema_editor() as schema_editor:
+            if self.table_is_partitioned():
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT to_regclass(%s) IS NULL', [self.default_partition])
+                    missing = cursor.fetchone()[0]
+                if missing:
+                    schema_editor.execute(f'CREATE TABLE {quote_name(self.default_partition)} PARTITION OF {quote_name(table)} DEFAULT')
+                    created.append(self.default_partition)
+                self.reset()
+                return created
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT DISTINCT date_trunc('month', trans_tms AT TIME ZONE 'UTC') FROM {quote_name(table)}")
+                months = {row[0].replace(tzinfo=timezone.utc) for row in cursor.fetchall()}
+
+            current = month_start(django_timezone.now())
+            months.update(add_months(current, count) for count in range(months_ahead + 1))
+
+            partitioned = f'{table}_partitioned'
+            schema_editor.execute(f'CREATE TABLE {quote_name(partitioned)} (LIKE {quote_name(table)} INCLUDING DEFAULTS) PARTITION BY RANGE (trans_tms)')
+            for month in sorted(months):
+                name = partition_name(table, month)
+                schema_editor.execute(
+                    f'CREATE TABLE {quote_name(name)} PARTITION OF {quote_name(partitioned)} FOR VALUES FROM (%s) TO (%s)',
+                    list(partition_bounds(month)),
+                )
+                created.append(name)
+            schema_editor.execute(f'CREATE TABLE {quote_name(self.default_partition)} PARTITION OF {quote_name(partitioned)} DEFAULT')
+            created.append(self.default_partition)
+
+            schema_editor.execute(f'INSERT INTO {quote_name(partitioned)} SELECT * FROM {quote_name(table)}')
+            schema_editor.execute(f'DROP TABLE {quote_name(table)}')
+            schema_editor.execute(f'ALTER TABLE {quote_name(partitioned)} RENAME TO {quote_name(table)}')
+
+            # Unique constraints of a partitioned table must include trans_tms, so does the primary key
+            schema_editor.execute(f'ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(table + "_pkey")} PRIMARY KEY (event_id, trans_tms)')
+            self._add_indexes(schema_editor)
+
+        self.reset()
+        return created
+
+    def unpartition_table(self):
+        """
+        Copies the attached partitions, DEFAULT included, back into a plain
+        crud_event. Detached or archived partitions are left alone.
+        """
+        table = self.table
+        quote_name = connection.ops.quote_name
+
+        with connection.schema_editor() as schema_editor:
+            plain = f'{table}_unpartitioned'
+            schema_editor.execute(f'CREATE TABLE {quote_name(plain)} (LIKE {quote_name(table)} INCLUDING DEFAULTS)')
+            schema_editor.execute(f'INSERT INTO {quote_name(plain)} SELECT * FROM {quote_name(table)}')
+            schema_editor.execute(f'DROP TABLE {quote_name(table)}')
+            schema_editor.execute(f'ALTER TABLE {quote_name(plain)} RENAME TO {quote_name(table)}')
+
+            schema_editor.execute(f'ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(table + "_pkey")} PRIMARY KEY (event_id)')
+            self._add_indexes(schema_editor)
+
+        self.reset()
+
+    def _add_indexes(self, schema_editor):
+        # The indexes and the natural key under their usual names; the BRIN index is from migration 0007
+        for index in Event._meta.indexes:
+            schema_editor.add_index(Event, index)
+        for constraint in Event._meta.constraints:
+            schema_editor.add_constraint(Event, constraint)
+        schema_editor.execute(f'CREATE INDEX event_tms_brin ON {schema_editor.quote_name(self.table)} USING brin (trans_tms)')
+        schema_editor.execute(f'ANALYZE {schema_editor.quote_name(self.table)}')
+
+    def list_partitions(self):
+        """
+        (name, month) of the attached monthly partitions, oldest first.
+        """
+        if not self.is_partitioned():
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)',
+                [self.table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        partitions = [(name, partition_month(self.table, name)) for name in names]
+        return sorted((name, month) for name, month in partitions if month is not None)
+
+    def default_months(self):
+        """
+        The months of the rows in the DEFAULT partition, oldest first.
+        """
+        if not self.is_partitioned():
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [self.default_partition])
+            if not cursor.fetchone()[0]:
+                return []
+            cursor.execute(f"SELECT DISTINCT date_trunc('month', trans_tms AT TIME ZONE 'UTC') FROM {connection.ops.quote_name(self.default_partition)}")
+            return sorted(row[0].replace(tzinfo=timezone.utc) for row in cursor.fetchall())
+
+    def drain_default(self):
+        """
+        Moves the rows of the DEFAULT partition into month partitions, created
+        for them. Returns the new partition names.
+        """
+        return [partition_name(self.table, month) for month in self.default_months() if self.create_partition(month)]
+
+    def _known(self):
+        with self._lock:
+            if self._known_months is None:
+                self._known_months = {month for _, month in self.list_partitions()}
+            return self._known_months
+
+    def ensure_partitions(self, timestamps):
+        """
+        Creates the partitions the trans_tms values need before they are written.
+        Joins the caller's transaction, so a rolled back write takes them along.
+        """
+        if not self.is_partitioned():
+            return
+        field = Event._meta.get_field('trans_tms')
+        months = {month_start(field.to_python(value)) for value in timestamps if value is not None}
+        # Once per month and process, kept out of the request query budgets
+        with unbudgeted():
+            for month in sorted(months - self._known()):
+                self.create_partition(month)
+
+    def create_partitions(self, first, last):
+        """
+        Creates the partitions for the months from first to last, returns the new partition names.
+        """
+        if not self.is_partitioned():
+            return []
+        return [partition_name(self.table, month) for month in month_range(first, last) if self.create_partition(month)]
+
+    def create_partition(self, month):
+        quote_name = connection.ops.quote_name
+        name = partition_name(self.table, month)
+        created = False
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Serializes workers creating the same month, the loser finds the table there
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [name])
+            cursor.execute('SELECT to_regclass(%s) IS NOT NULL, to_regclass(%s) IS NOT NULL', [name, self.default_partition])
+            exists, has_default = cursor.fetchone()
+            if not exists:
+                start, end = partition_bounds(month)
+                # Created standalone and attached: ATTACH only takes a SHARE UPDATE EXCLUSIVE
+                # lock on crud_event, so concurrent reads and writes carry on
+                cursor.execute(f'CREATE TABLE {quote_name(name)} (LIKE {quote_name(self.table)} INCLUDING DEFAULTS)')
+                if has_default:
+                    # ATTACH refuses a month that still has rows in the DEFAULT partition, they move over first
+                    cursor.execute(
+                        f'WITH moved AS (DELETE FROM {quote_name(self.default_partition)} WHERE trans_tms >= %s AND trans_tms < %s RETURNING *) '
+                        f'INSERT INTO {quote_name(name)} SELECT * FROM moved',
+                        [start, end],
+                    )
+                cursor.execute(
+                    f'ALTER TABLE {quote_name(self.table)} ATTACH PARTITION {quote_name(name)} FOR VALUES FROM (%s) TO (%s)',
+                    [start, end],
+                )
+                created = True
+
+        def remember():
+            with self._lock:
+                if self._known_months is not None:
+                    self._known_months.add(month)
+
+        transaction.on_commit(remember)
+        return created
+
+    def detach_partition(self, name):
+        """
+        Takes the partition out of crud_event; its rows stay in the detached table.
+        """
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {quote_name(self.table)} DETACH PARTITION {quote_name(name)}')
+
+        def forget():
+            with self._lock:
+                if self._known_months is not None:
+                    self._known_months.discard(partition_month(self.table, name))
+
+        transaction.on_commit(forget)
+
+    def drop_table(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {connection.ops.quote_name(name)}')
+
+    def move_table(self, name, schema):
+        # A catalog update, the rows are not copied
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {quote_name(schema)}')
+            cursor.execute(f'ALTER TABLE {quote_name(name)} SET SCHEMA {quote_name(schema)}')
+
+    def export_table(self, name, path):
+        """
+        Writes the table to path as gzipped CSV with a header line.
+        """
+        with gzip.open(path, 'wb') as archive, connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {connection.ops.quote_name(name)} TO STDOUT WITH (FORMAT csv, HEADER true)', archive)
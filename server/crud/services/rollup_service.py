@@ -0,0 +1,149 @@
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from crud.models import Event, EventRollup
+
+# Rollup filters and the lookups they map to
+ROLLUP_FILTERS = {
+    'client_id': 'client_id',
+    'location_cd': 'location_cd',
+    'hour_from': 'hour__gte',
+    'hour_to': 'hour__lt',
+}
+
+# Buckets written per upsert statement
+UPSERT_CHUNK_SIZE = 100
+
+
+def utc_trans_tms(trans_tms):
+    trans_tms = Event._meta.get_field('trans_tms').to_python(trans_tms)
+    if timezone.is_naive(trans_tms):
+        trans_tms = timezone.make_aware(trans_tms)
+    return trans_tms.astimezone(dt_timezone.utc)
+
+
+def hour_bucket(trans_tms):
+    return utc_trans_tms(trans_tms).replace(minute=0, second=0, microsecond=0)
+
+
+class RollupDeltas:
+    """
+    Pending (event_cnt, row_count) changes per (client_id, location_cd, hour) bucket.
+    """
+
+    def __init__(self):
+        self.buckets = defaultdict(lambda: [0, 0])
+
+    def add(self, event, sign=1):
+        bucket = self.buckets[(event.client_id, event.location_cd, hour_bucket(event.trans_tms))]
+        bucket[0] += sign * int(event.event_cnt)
+        bucket[1] += sign
+
+    def add_all(self, events, sign=1):
+        for event in events:
+            self.add(event, sign)
+
+    def changed(self):
+        # Sorted so concurrent writers lock buckets in the same order
+        return sorted((key, value) for key, value in self.buckets.items() if value != [0, 0])
+
+
+class RollupService:
+
+    def apply(self, deltas):
+
+        changed = deltas.changed()
+
+        if not changed:
+            return
+
+        table = connection.ops.quote_name(EventRollup._meta.db_table)
+        hour_field = EventRollup._meta.get_field('hour')
+
+        # Joins the caller's transaction without a savepoint of its own, a failure rolls the whole write back
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            for start in range(0, len(changed), UPSERT_CHUNK_SIZE):
+                chunk = changed[start:start + UPSERT_CHUNK_SIZE]
+                params = []
+                for (client_id, location_cd, hour), (event_cnt, row_count) in chunk:
+                    params.extend([client_id, location_cd, hour_field.get_db_prep_value(hour, connection), event_cnt, row_count])
+
+                # Increment in place so concurrent writes to the same bucket add up
+                cursor.execute(
+                    f'INSERT INTO {table} (client_id, location_cd, hour, event_cnt, row_count) '
+                    f'VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(chunk))} '
+                    f'ON CONFLICT (client_id, location_cd, hour) DO UPDATE SET '
+                    f'event_cnt = {table}.event_cnt + EXCLUDED.event_cnt, '
+                    f'row_count = {table}.row_count + EXCLUDED.row_count',
+                    params,
+                )
+
+            # Buckets whose last event went away are removed
+            emptied = Q()
+            for (client_id, location_cd, hour), (event_cnt, row_count) in changed:
+                if row_count < 0:
+                    emptied |= Q(client_id=client_id, location_cd=location_cd, hour=hour)
+            if emptied:
+                EventRollup.objects.filter(emptied, row_count__lte=0).delete()
+
+    def apply_events(self, events, sign=1):
+        deltas = RollupDeltas()
+        deltas.add_all(events, sign)
+        self.apply(deltas)
+
+    def remove_range(self, start, end):
+        # For events dropped wholesale, e.g. with a detached crud_event partition
+        return EventRollup.objects.filter(hour__gte=start, hour__lt=end).delete()[0]
+
+    def get_rollups(self, filters=None):
+        rollups = EventRollup.objects.filter(**{ROLLUP_FILTERS[key]: value for key, value in (filters or {}).items()})
+        return rollups.order_by('hour', 'client_id', 'location_cd')
+
+    def compute_rollups(self):
+        """
+        Aggregates the rollup buckets from crud_event, keyed like RollupDeltas.
+        """
+        buckets = (
+            Event.objects
+            .annotate(hour=TruncHour('trans_tms', tzinfo=dt_timezone.utc))
+            .values('client_id', 'location_cd', 'hour')
+            .annotate(total_cnt=Sum('event_cnt'), total_rows=Count('event_id'))
+            .order_by()
+        )
+        return {
+            (bucket['client_id'], bucket['location_cd'], bucket['hour']): [bucket['total_cnt'], bucket['total_rows']]
+            for bucket in buckets
+        }
+
+    def check(self):
+        """
+        Returns (bucket, stored, expected) for every bucket that disagrees with crud_event.
+        """
+        expected = self.compute_rollups()
+        stored = {
+            (rollup.client_id, rollup.location_cd, rollup.hour): [rollup.event_cnt, rollup.row_count]
+            for rollup in EventRollup.objects.all()
+        }
+        return [
+            (key, stored.get(key), expected.get(key))
+            for key in sorted(expected.keys() | stored.keys())
+            if stored.get(key) != expected.get(key)
+        ]
+
+    def rebuild(self):
+
+        with transaction.atomic():
+            buckets = self.compute_rollups()
+            EventRollup.objects.all().delete()
+            EventRollup.objects.bulk_create(
+                [
+                    EventRollup(client_id=client_id, location_cd=location_cd, hour=hour, event_cnt=event_cnt, row_count=row_count)
+                    for (client_id, location_cd, hour), (event_cnt, row_count) in buckets.items()
+                ],
+                batch_size=UPSERT_CHUNK_SIZE,
+            )
+
+        return len(buckets)
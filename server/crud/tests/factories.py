@@ -0,0 +1,35 @@
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import caches
+
+
+def make_record(**overrides):
+    # A record as create-events-batch, create-events-stream, ingest jobs and import_events take it
+    record = {
+        "trans_id": str(uuid4()),
+        "trans_tms": "20151022102011927EDT",
+        "rc_num": "10002",
+        "client_id": "RPS-00001",
+        "event": [{"event_cnt": 1, "location_cd": "DESTINATION"}, {"event_cnt": 2, "location_cd": "OUTLET ID"}],
+    }
+    record.update(overrides)
+    return record
+
+
+def make_event(**overrides):
+    # Event values as EventService and the ORM take them
+    event = {
+        "trans_id": uuid4(),
+        "trans_tms": "2015-10-22 10:20:11.927+05:30",
+        "rc_num": "10002",
+        "client_id": "RPS-00001",
+        "event_cnt": 1,
+        "location_cd": "DESTINATION",
+    }
+    event.update(overrides)
+    return event
+
+
+def clear_event_cache():
+    # Cached pages are keyed by the table version, which every test's rollback sets back
+    caches[settings.EVENT_CACHE_ALIAS].clear()
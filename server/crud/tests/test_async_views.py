@@ -0,0 +1,129 @@
+import json
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from rest_framework import status
+from crud.models import Event
+from crud.utils.HttpResponseUtil import VALIDATION_ERROR_CODE, NOT_FOUND_ERROR_CODE, CONFLICT_ERROR_CODE
+from crud.utils.QueryBudgetUtil import QUERY_BUDGET_RAISE
+from crud.tests.factories import clear_event_cache
+from unittest.mock import patch
+from uuid import uuid4
+
+@override_settings(QUERY_BUDGET_MODE=QUERY_BUDGET_RAISE)
+class AsyncEventAPITestCase(TestCase):
+
+    def setUp(self):
+        clear_event_cache()
+        self.event = Event.objects.create(
+            trans_id=uuid4(),
+            trans_tms="2015-10-22 10:20:11.927+05:30",
+            rc_num="10002",
+            client_id="RPS-00001",
+            event_cnt=1,
+            location_cd="DESTINATION",
+            addr_nbr="0000000001"
+        )
+        self.event_data = {
+            "trans_id": str(uuid4()),
+            "trans_tms": "2015-10-22 10:20:11.927+05:30",
+            "rc_num": "10003",
+            "client_id": "RPS-00002",
+            "event_cnt": 2,
+            "location_cd": "OUTLET ID"
+        }
+
+    async def test_create_event(self):
+        response = await self.async_client.post('/api/async/create-event/', self.event_data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(await Event.objects.acount(), 2)
+
+        response = await self.async_client.post('/api/async/create-event/', self.event_data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json()['error']['code'], CONFLICT_ERROR_CODE)
+
+    async def test_create_event_invalid(self):
+        response = await self.async_client.post('/api/async/create-event/', "{not json", content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = await self.async_client.post('/api/async/create-event/', dict(self.event_data, client_id=""), content_type='application/json')
+        self.assertEqual(response.json()['error']['code'], VALIDATION_ERROR_CODE)
+        self.assertIn('client_id', response.json()['error']['detail'])
+
+    async def test_get_events_matches_sync_view(self):
+        later = dict(self.event_data, trans_tms="2016-01-01 00:00:00+00:00")
+        await self.async_client.post('/api/async/create-event/', later, content_type='application/json')
+
+        sync_response = await self.async_client.get('/api/get-events/?limit=1')
+        response = await self.async_client.get('/api/async/get-events/?limit=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual(response['ETag'], sync_response['ETag'])
+
+        next_page = await self.async_client.get(f'/api/async/get-events/?limit=1&cursor={response.json()["next"]}')
+        self.assertEqual(next_page.json()['data'][0]['rc_num'], "10003")
+
+        not_modified = await self.async_client.get('/api/async/get-events/?limit=1', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_export_events(self):
+        response = await self.async_client.get('/api/async/export-events/?export_format=ndjson')
+
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+
+        self.assertEqual([row['event_id'] for row in rows], [str(self.event.event_id)])
+
+    async def test_export_events_runs_in_a_transaction(self):
+        iterator = QuerySet.iterator
+        depths = []
+
+        def recording_iterator(queryset, *args, **kwargs):
+            depths.append(len(connection.atomic_blocks))
+            return iterator(queryset, *args, **kwargs)
+
+        depth = await sync_to_async(lambda: len(connection.atomic_blocks))()
+        with patch.object(QuerySet, 'iterator', recording_iterator):
+            for url in ('/api/async/export-events/', '/api/export-events/'):
+                response = await self.async_client.get(url)
+                [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(depths, [depth + 1, depth + 1])
+
+    @override_settings(EVENT_EXPORT_CHUNK_SIZE=1)
+    async def test_sync_export_streams_over_asgi(self):
+        await Event.objects.acreate(trans_id=uuid4(), trans_tms="2016-01-01 00:00:00+00:00", rc_num="10003",
+                                    client_id="RPS-00002", location_cd="OUTLET ID")
+
+        # The DRF view hands ASGI an async iterator, Django would read a sync one whole before sending it
+        response = await self.async_client.get('/api/export-events/?export_format=ndjson')
+
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([json.loads(chunk)['rc_num'] for chunk in chunks], ["10002", "10003"])
+
+    async def test_update_and_delete_event(self):
+        response = await self.async_client.put(f'/api/async/update-event/{self.event.event_id}/', dict(self.event_data, rc_num="10009"), content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['data']['rc_num'], "10009")
+
+        response = await self.async_client.delete(f'/api/async/delete-event/{self.event.event_id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await Event.objects.filter(event_id=self.event.event_id).aexists())
+
+        response = await self.async_client.delete(f'/api/async/delete-event/{self.event.event_id}/')
+        self.assertEqual(response.json()['error']['code'], NOT_FOUND_ERROR_CODE)
+
+    async def test_get_event_rollups(self):
+        await self.async_client.post('/api/async/create-event/', self.event_data, content_type='application/json')
+
+        response = await self.async_client.get('/api/async/get-event-rollups/?client_id=RPS-00002')
+
+        self.assertEqual([(rollup['location_cd'], rollup['event_cnt']) for rollup in response.json()['data']], [("OUTLET ID", 2)])
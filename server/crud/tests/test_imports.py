@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from crud.models import Event, ImportCheckpoint
+from crud.services.event_service import EventService
+from crud.utils.ImportUtil import split_byte_ranges, read_lines, parse_import_line
+from crud.tests.factories import clear_event_cache, make_record
+
+
+class ImportFileTestMixin:
+
+    def write_file(self, lines):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(handle, 'w') as target:
+            target.writelines(f'{line}\n' for line in lines)
+        self.addCleanup(os.remove, path)
+        return path
+
+
+class ImportUtilTest(ImportFileTestMixin, SimpleTestCase):
+
+    def test_ranges_cover_whole_lines(self):
+        lines = [json.dumps({"n": index, "pad": "x" * (index % 7)}) for index in range(100)]
+        path = self.write_file(lines)
+
+        for pieces in (1, 3, 8, 500):
+            ranges = split_byte_ranges(path, pieces)
+            self.assertLessEqual(len(ranges), min(pieces, 100))
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], os.path.getsize(path))
+
+            read = []
+            with open(path, 'rb') as source:
+                for (start, end), following in zip(ranges, ranges[1:] + [None]):
+                    if following:
+                        self.assertEqual(end, following[0])
+                    read.extend(line.decode().rstrip('\n') for _, _, line in read_lines(source, start, end))
+            self.assertEqual(read, lines)
+
+    def test_parse_import_line(self):
+        record = make_record()
+
+        self.assertEqual(parse_import_line(json.dumps(record)), [record])
+        self.assertEqual(parse_import_line(json.dumps({"records": [record, record]})), [record, record])
+        for line in ('not json', '[1, 2]', json.dumps({"trans_id": "x"}), json.dumps({"records": [1]})):
+            with self.assertRaises(ValueError):
+                parse_import_line(line)
+
+
+class ImportEventsCommandTest(ImportFileTestMixin, TestCase):
+
+    def setUp(self):
+        clear_event_cache()
+        self.path = self.write_file(
+            [json.dumps(make_record()) for _ in range(10)]
+            + ['not json', json.dumps(make_record(trans_id="invalid_uuid")), '']
+            + [json.dumps({"records": [make_record(), make_record()]})]
+        )
+
+    def import_events(self, *args):
+        out = StringIO()
+        call_command('import_events', self.path, '--workers', '1', '--ranges', '3', '--chunk-size', '4', *args, stdout=out)
+        return out.getvalue()
+
+    def test_import(self):
+        output = self.import_events()
+
+        self.assertEqual(Event.objects.count(), 24)
+        self.assertIn('Imported 13 lines: 24 added, 0 updated, 0 skipped, 3 failed', output)
+        self.assertIn('rows/s', output)
+
+        checkpoints = ImportCheckpoint.objects.order_by('start')
+        self.assertEqual(len(checkpoints), 3)
+        self.assertTrue(all(checkpoint.position == checkpoint.end for checkpoint in checkpoints))
+        failures = [failure for checkpoint in checkpoints for failure in checkpoint.failures]
+        self.assertEqual([len(failure["errors"]) for failure in failures], [1, 2])
+
+    def test_max_failures(self):
+        output = self.import_events('--max-failures', '0')
+
+        self.assertIn('3 failed', output)
+        self.assertFalse(any(checkpoint.failures for checkpoint in ImportCheckpoint.objects.all()))
+
+    def test_completed_import_is_not_repeated(self):
+        self.import_events()
+
+        self.assertIn('already imported', self.import_events())
+        self.assertEqual(Event.objects.count(), 24)
+
+        self.assertIn('0 added, 24 updated', self.import_events('--restart', '--on-conflict', 'update'))
+        self.assertEqual(Event.objects.count(), 24)
+
+    def test_interrupted_import_resumes(self):
+        create_events_batch = EventService.create_events_batch
+        calls = []
+
+        def failing_batch(service, events, *args, **kwargs):
+            calls.append(len(events))
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return create_events_batch(service, events, *args, **kwargs)
+
+        with patch.object(EventService, 'create_events_batch', failing_batch):
+            with self.assertRaisesMessage(CommandError, 'run the same command again to resume'):
+                self.import_events()
+
+        written = Event.objects.count()
+        self.assertEqual(written, sum(calls[:2]))
+
+        output = self.import_events()
+
+        self.assertIn(f'{24 - written} added', output)
+        self.assertEqual(Event.objects.count(), 24)
+        self.assertEqual(sum(checkpoint.added_count for checkpoint in ImportCheckpoint.objects.all()), 24)
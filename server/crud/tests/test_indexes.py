@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from crud.models import Event
+from crud.services.event_service import EventService
+from crud.utils.CursorUtil import decode_cursor
+from crud.tests.factories import clear_event_cache
+from uuid import uuid4
+
+SEED_ROWS = 20000
+SEED_CLIENTS = 500
+SEED_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are checked against PostgreSQL only')
+class EventIndexPlanTest(TestCase):
+    """
+    Runs the EventService queries against a seeded table and checks their
+    EXPLAIN output, so schema changes cannot silently bring back full scans.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Event.objects.bulk_create(
+            [
+                Event(
+                    trans_id=uuid4(),
+                    trans_tms=SEED_START + timedelta(minutes=i),
+                    rc_num=str(10000 + i % 50),
+                    client_id=f'RPS-{i % SEED_CLIENTS:05d}',
+                    event_cnt=1,
+                    location_cd=('DESTINATION', 'OUTLET ID', 'CUSTOMER NUMBER')[i % 3],
+                )
+                for i in range(SEED_ROWS)
+            ],
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Event._meta.db_table}')
+
+    def setUp(self):
+        clear_event_cache()
+        self.event_service = EventService()
+
+    def explain(self, call):
+        # Explain the last statement the service call actually ran
+        with CaptureQueriesContext(connection) as context:
+            call()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + context.captured_queries[-1]['sql'])
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def assert_uses_index(self, plan, index_name):
+        # On a partitioned crud_event the seeded rows are in one partition, the empty ones cost nothing to scan
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT DISTINCT tableoid::regclass::text FROM {Event._meta.db_table}')
+            for (table,) in cursor.fetchall():
+                self.assertNotIn(f'Seq Scan on {table} ', plan)
+        # and the plan names the partition's copy of the index
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)', [index_name])
+            names = [index_name, *(row[0] for row in cursor.fetchall())]
+        self.assertTrue(any(name in plan for name in names), plan)
+
+    def test_get_event_by_id(self):
+        event = Event.objects.first()
+        plan = self.explain(lambda: self.event_service.get_event_by_id(event.event_id))
+        self.assert_uses_index(plan, 'pkey')
+
+    def test_lookup_by_trans_id(self):
+        event = Event.objects.first()
+        plan = self.explain(lambda: list(Event.objects.filter(trans_id=event.trans_id)))
+        self.assert_uses_index(plan, 'event_natural_key_uniq')
+
+    def test_first_page(self):
+        plan = self.explain(lambda: self.event_service.get_events_page(limit=100))
+        self.assert_uses_index(plan, 'event_tms_id_idx')
+
+    def test_next_page(self):
+        first = self.event_service.get_events_page(limit=100)
+        plan = self.explain(lambda: self.event_service.get_events_page(cursor=decode_cursor(first['next']), limit=100))
+        self.assert_uses_index(plan, 'event_tms_id_idx')
+
+    def test_page_by_client(self):
+        plan = self.explain(lambda: self.event_service.get_events_page({'client_id': 'RPS-00042'}, limit=100))
+        self.assert_uses_index(plan, 'event_client_tms_idx')
+
+    def test_page_by_client_and_time_range(self):
+        filters = {
+            'client_id': 'RPS-00042',
+            'trans_tms_from': SEED_START + timedelta(days=3),
+            'trans_tms_to': SEED_START + timedelta(days=4),
+        }
+        plan = self.explain(lambda: self.event_service.get_events_page(filters, limit=100))
+        self.assert_uses_index(plan, 'event_client_tms_idx')
+
+    def test_time_range_count(self):
+        start = SEED_START + timedelta(days=3)
+        plan = self.explain(lambda: Event.objects.filter(trans_tms__gte=start, trans_tms__lt=start + timedelta(hours=6)).count())
+        self.assertNotIn(f'Seq Scan on {Event._meta.db_table}', plan)
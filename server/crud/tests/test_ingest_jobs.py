@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from crud.models import Event, IngestJob
+from crud.serializers import get_event_batch_validator
+from crud.services.ingest_job_service import IngestJobService, IngestJobLeaseLost
+from crud.utils.HttpResponseUtil import NOT_FOUND_ERROR_CODE
+from crud.utils.QueryBudgetUtil import QUERY_BUDGET_RAISE
+from crud.tests.factories import clear_event_cache, make_record
+from uuid import uuid4
+
+@override_settings(QUERY_BUDGET_MODE=QUERY_BUDGET_RAISE)
+class IngestJobTest(APITestCase):
+
+    def setUp(self):
+        clear_event_cache()
+        self.ingest_job_service = IngestJobService()
+        self.create_url_batch = '/api/create-events-batch/'
+
+    @override_settings(INGEST_JOB_CHUNK_SIZE=2)
+    def test_async_batch(self):
+        records = [make_record(), make_record(trans_id="invalid_uuid"), {"trans_id": str(uuid4())}, make_record()]
+
+        response = self.client.post(f'{self.create_url_batch}?async=1', {"records": records}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['data']['status'], IngestJob.PENDING)
+        self.assertEqual(Event.objects.count(), 0)
+
+        out = StringIO()
+        call_command('run_ingest_worker', '--once', '--worker-id', 'test-worker', stdout=out)
+        self.assertIn('Ran 1 ingest jobs', out.getvalue())
+
+        job = self.client.get(response['Location']).data['data']
+
+        self.assertEqual(job['status'], IngestJob.SUCCEEDED)
+        self.assertEqual((job['processed_records'], job['total_records']), (4, 4))
+        self.assertEqual((job['added_count'], job['failed_count']), (4, 3))
+        self.assertEqual([failure['record'] for failure in job['failures']], [1, 2])
+        self.assertEqual(job['worker'], 'test-worker')
+        self.assertNotIn('records', job)
+        self.assertEqual(Event.objects.count(), 4)
+        self.assertIsNone(IngestJob.objects.get(job_id=job['job_id']).records)
+
+    def test_get_ingest_job_not_found(self):
+        response = self.client.get(f'/api/get-ingest-job/{uuid4()}/')
+
+        self.assertEqual(response.data['error']['code'], NOT_FOUND_ERROR_CODE)
+
+    @override_settings(INGEST_JOB_CHUNK_SIZE=1)
+    def test_stale_job_is_resumed(self):
+        records = [make_record() for _ in range(3)]
+        job = self.ingest_job_service.enqueue(records)
+
+        # The first worker writes one step and then stops sending heartbeats
+        lost = self.ingest_job_service.claim_next('lost-worker')
+        self.ingest_job_service._run_step(lost, records, 0, 1, get_event_batch_validator())
+        IngestJob.objects.filter(job_id=job.job_id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        taken_over = self.ingest_job_service.claim_next('other-worker')
+        self.assertEqual((taken_over.processed_records, taken_over.attempts), (1, 2))
+
+        with self.assertRaises(IngestJobLeaseLost):
+            self.ingest_job_service._run_step(lost, records, 1, 2, get_event_batch_validator())
+
+        self.ingest_job_service.run_job(taken_over)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.SUCCEEDED)
+        self.assertEqual((job.added_count, job.skipped_count), (6, 0))
+        self.assertEqual(Event.objects.count(), 6)
+
+    @override_settings(INGEST_JOB_MAX_ATTEMPTS=1)
+    def test_abandoned_job_fails(self):
+        job = self.ingest_job_service.enqueue([make_record()])
+        self.ingest_job_service.claim_next('lost-worker')
+        IngestJob.objects.filter(job_id=job.job_id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertIsNone(self.ingest_job_service.claim_next('other-worker'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.FAILED)
+        self.assertIsNone(job.records)
@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from crud.models import Event, EventTableVersion
+from crud.services.event_service import EVENT_TABLE_VERSION_ID
+from crud.utils.MetricsUtil import RequestMetrics, RequestStats, request_metrics, PROMETHEUS_CONTENT_TYPE
+from crud.tests.factories import clear_event_cache
+from uuid import uuid4
+
+def metric_value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+class RequestMetricsTest(SimpleTestCase):
+
+    def stats(self, queries=0, db_seconds=0.0, batch_size=None):
+        stats = RequestStats()
+        stats.queries, stats.db_seconds, stats.batch_size = queries, db_seconds, batch_size
+        return stats
+
+    def test_render_histogram_buckets_are_cumulative(self):
+        metrics = RequestMetrics()
+        metrics.observe_request('get-events', 'GET', 200, 0.004, self.stats(queries=2), 500)
+        metrics.observe_request('get-events', 'GET', 200, 0.2, self.stats(queries=3), 500)
+        metrics.observe_request('get-events', 'GET', 200, 60.0, self.stats(queries=3), 500)
+
+        text = metrics.render()
+        labels = 'endpoint="get-events",method="GET"'
+
+        self.assertEqual(metric_value(text, f'http_requests_total{{{labels},status="200"}}'), 3)
+        self.assertEqual(metric_value(text, f'http_request_duration_seconds_bucket{{{labels},le="0.005"}}'), 1)
+        self.assertEqual(metric_value(text, f'http_request_duration_seconds_bucket{{{labels},le="0.25"}}'), 2)
+        self.assertEqual(metric_value(text, f'http_request_duration_seconds_bucket{{{labels},le="30.0"}}'), 2)
+        self.assertEqual(metric_value(text, f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'), 3)
+        self.assertEqual(metric_value(text, f'http_request_duration_seconds_count{{{labels}}}'), 3)
+        self.assertAlmostEqual(metric_value(text, f'http_request_duration_seconds_sum{{{labels}}}'), 60.204)
+        self.assertEqual(metric_value(text, f'http_request_db_queries_bucket{{{labels},le="2"}}'), 1)
+        self.assertEqual(metric_value(text, f'http_request_db_queries_sum{{{labels}}}'), 8)
+        # No batch size was observed
+        self.assertNotIn('http_request_batch_size_count{', text)
+
+    def test_metrics_dir_adds_up_processes(self):
+        with tempfile.TemporaryDirectory() as metrics_dir, override_settings(METRICS_DIR=metrics_dir):
+            other = {
+                "requests": [["get-events", "GET", "200", 4]],
+                "histograms": [["http_request_batch_size", "get-events", "GET", [0, 0, 2, 0, 0, 0, 0, 0, 0, 200]]],
+            }
+            with open(os.path.join(metrics_dir, f'{os.getpid() + 1}.json'), 'w') as snapshot:
+                json.dump(other, snapshot)
+
+            metrics = RequestMetrics()
+            metrics.observe_request('get-events', 'GET', 200, 0.01, self.stats(batch_size=50))
+            text = metrics.render()
+
+            self.assertEqual(metric_value(text, 'http_requests_total{endpoint="get-events",method="GET",status="200"}'), 5)
+            self.assertEqual(metric_value(text, 'http_request_batch_size_count{endpoint="get-events",method="GET"}'), 3)
+            self.assertEqual(metric_value(text, 'http_request_batch_size_sum{endpoint="get-events",method="GET"}'), 250)
+            # The first observation wrote this process's counters as well
+            self.assertTrue(os.path.exists(os.path.join(metrics_dir, f'{os.getpid()}.json')))
+
+
+class MetricsEndpointTest(APITestCase):
+
+    def setUp(self):
+        clear_event_cache()
+        EventTableVersion.objects.get_or_create(pk=EVENT_TABLE_VERSION_ID)
+        self.event = Event.objects.create(
+            trans_id=uuid4(),
+            trans_tms="2015-10-22 10:20:11.927+05:30",
+            rc_num="10002",
+            client_id="RPS-00001",
+            event_cnt=1,
+            location_cd="DESTINATION",
+            addr_nbr="0000000001"
+        )
+        request_metrics.reset()
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], PROMETHEUS_CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_requests_are_counted_per_route(self):
+        self.client.get('/api/get-events/')
+        self.client.get('/api/get-events/')
+        self.client.delete(f'/api/delete-event/{uuid4()}/')
+        self.client.get('/no-such-page/')
+
+        text = self.scrape()
+
+        self.assertEqual(metric_value(text, 'http_requests_total{endpoint="get-events",method="GET",status="200"}'), 2)
+        self.assertEqual(metric_value(text, 'http_requests_total{endpoint="delete-event",method="DELETE",status="400"}'), 1)
+        self.assertEqual(metric_value(text, 'http_requests_total{endpoint="unmatched",method="GET",status="404"}'), 1)
+        self.assertGreater(metric_value(text, 'http_request_db_queries_sum{endpoint="get-events",method="GET"}'), 0)
+        self.assertGreater(metric_value(text, 'http_response_size_bytes_sum{endpoint="get-events",method="GET"}'), 0)
+
+    def test_batch_size_is_recorded(self):
+        record = {
+            "trans_id": str(uuid4()),
+            "trans_tms": "20151022102011927EDT",
+            "rc_num": "10002",
+            "client_id": "RPS-00001",
+            "event": [{"event_cnt": 1, "location_cd": "DESTINATION", "location_id1": "T8C", "addr_nbr": "0000000001"}],
+        }
+        self.client.post('/api/create-events-batch/', {"records": [record, dict(record, trans_id=str(uuid4()))]}, format='json')
+
+        text = self.scrape()
+
+        self.assertEqual(metric_value(text, 'http_request_batch_size_sum{endpoint="create-events-batch",method="POST"}'), 2)
+
+    async def test_async_views_count_their_queries(self):
+        await self.async_client.get('/api/async/get-events/')
+
+        text = (await self.async_client.get('/metrics')).content.decode()
+
+        self.assertEqual(metric_value(text, 'http_requests_total{endpoint="async-get-events",method="GET",status="200"}'), 1)
+        self.assertGreater(metric_value(text, 'http_request_db_queries_sum{endpoint="async-get-events",method="GET"}'), 0)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
+from crud.models import Event, EventRollup, EventTableVersion
+from crud.services.event_service import EVENT_TABLE_VERSION_ID
+from crud.utils.CursorUtil import decode_cursor
+from crud.utils.PartitionUtil import add_months, month_start, month_range, partition_name, partition_month
+from crud.utils.ServiceUtil import ServiceUtil
+from crud.tests.factories import clear_event_cache
+from uuid import uuid4
+
+
+class PartitionUtilTest(SimpleTestCase):
+
+    def test_month_start_is_utc(self):
+        # Late on Oct 31 in New York is already November in UTC
+        value = datetime(2015, 10, 31, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+        self.assertEqual(month_start(value), datetime(2015, 11, 1, tzinfo=timezone.utc))
+
+    def test_add_months(self):
+        month = datetime(2015, 11, 1, tzinfo=timezone.utc)
+        self.assertEqual(add_months(month, 2), datetime(2016, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(add_months(month, -11), datetime(2014, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(add_months(month, 0), month)
+
+    def test_month_range(self):
+        months = month_range(datetime(2015, 11, 20, tzinfo=timezone.utc), datetime(2016, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual([(month.year, month.month) for month in months], [(2015, 11), (2015, 12), (2016, 1), (2016, 2)])
+
+    def test_partition_names(self):
+        month = datetime(2015, 3, 1, tzinfo=timezone.utc)
+        self.assertEqual(partition_name('crud_event', month), 'crud_event_p2015_03')
+        self.assertEqual(partition_month('crud_event', 'crud_event_p2015_03'), month)
+        self.assertIsNone(partition_month('crud_event', 'crud_eventrollup'))
+        self.assertIsNone(partition_month('crud_event', 'other_p2015_03'))
+
+
+@override_settings(EVENT_PARTITIONING=True)
+class PartitionCommandTest(TestCase):
+
+    @skipUnless(connection.vendor != 'postgresql', 'Checks the commands against an unpartitioned backend')
+    def test_commands_need_a_partitioned_table(self):
+        with self.assertRaisesMessage(CommandError, 'needs PostgreSQL'):
+            call_command('partition_events', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'not partitioned'):
+            call_command('create_event_partitions', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'not partitioned'):
+            call_command('expire_event_partitions', '--months', '12', stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Partitioning needs PostgreSQL')
+@override_settings(EVENT_PARTITIONING=True)
+class PartitionedEventTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # In the class transaction, the plain table is back once the tests ran
+        call_command('partition_events', stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        ServiceUtil.get_service(ServiceUtil.PARTITION_SERVICE).reset()
+
+    def setUp(self):
+        clear_event_cache()
+        EventTableVersion.objects.get_or_create(pk=EVENT_TABLE_VERSION_ID)
+        self.partition_service = ServiceUtil.get_service(ServiceUtil.PARTITION_SERVICE)
+        self.event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+        # Partitions created by earlier tests were rolled back with them
+        self.partition_service.reset()
+        self.current = month_start(django_timezone.now())
+
+    def event_data(self, trans_tms, **values):
+        return {"trans_id": uuid4(), "trans_tms": trans_tms, "rc_num": "10002", "client_id": "RPS-00001",
+                "event_cnt": 1, "location_cd": "DESTINATION", **values}
+
+    def partitions(self):
+        return [name for name, _ in self.partition_service.list_partitions()]
+
+    def table_exists(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+            return cursor.fetchone()[0]
+
+    def count_rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {table}')
+            return cursor.fetchone()[0]
+
+    def test_partition_events(self):
+        self.assertTrue(self.partition_service.is_partitioned())
+        self.assertIn(partition_name('crud_event', add_months(self.current, 3)), self.partitions())
+        self.assertTrue(self.table_exists('crud_event_default'))
+
+        # Running either command again finds everything there
+        out = StringIO()
+        call_command('create_event_partitions', '--months-ahead', '3', stdout=out)
+        call_command('partition_events', stdout=out)
+        self.assertNotIn('Created crud_event', out.getvalue())
+
+    def test_orm_writes_go_to_the_default_partition(self):
+        event = Event.objects.create(**self.event_data(datetime(2011, 8, 3, tzinfo=timezone.utc)))
+        self.assertEqual(self.count_rows('crud_event_default'), 1)
+
+        out = StringIO()
+        call_command('create_event_partitions', stdout=out)
+
+        self.assertIn('Created crud_event_p2011_08', out.getvalue())
+        self.assertEqual(self.count_rows('crud_event_default'), 0)
+        self.assertEqual(self.count_rows('crud_event_p2011_08'), 1)
+        self.assertTrue(Event.objects.filter(event_id=event.event_id).exists())
+
+    def test_revert(self):
+        event = self.event_service.create_event(self.event_data(datetime(2011, 5, 3, tzinfo=timezone.utc)))
+        Event.objects.create(**self.event_data(datetime(2011, 8, 3, tzinfo=timezone.utc)))
+
+        call_command('partition_events', '--revert', stdout=StringIO())
+
+        self.assertFalse(self.partition_service.table_is_partitioned())
+        self.assertFalse(self.partition_service.is_partitioned())
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertTrue(Event.objects.filter(event_id=event.event_id).exists())
+
+    def test_writes_create_missing_partitions(self):
+        self.event_service.create_event(self.event_data(datetime(2011, 5, 3, tzinfo=timezone.utc)))
+        self.event_service.create_events_batch([
+            self.event_data(datetime(2011, 6, 30, 23, tzinfo=timezone.utc)),
+            self.event_data(datetime(2011, 7, 1, 1, tzinfo=timezone.utc)),
+        ])
+
+        for name in ('crud_event_p2011_05', 'crud_event_p2011_06', 'crud_event_p2011_07'):
+            self.assertIn(name, self.partitions())
+        self.assertEqual(Event.objects.filter(trans_tms__year=2011).count(), 3)
+
+    def test_update_moves_the_event_to_its_new_month(self):
+        event = self.event_service.create_event(self.event_data(datetime(2011, 5, 3, tzinfo=timezone.utc)))
+
+        updated = self.event_service.update_event(event.event_id, {"trans_tms": datetime(2011, 9, 3, tzinfo=timezone.utc)})
+
+        self.assertEqual(updated.trans_tms, datetime(2011, 9, 3, tzinfo=timezone.utc))
+        self.assertIn('crud_event_p2011_09', self.partitions())
+        self.assertEqual(Event.objects.get(event_id=event.event_id).trans_tms.month, 9)
+
+    def test_range_queries_prune_partitions(self):
+        first = datetime(2011, 1, 1, tzinfo=timezone.utc)
+        self.partition_service.create_partitions(first, add_months(first, 5))
+        Event.objects.bulk_create([
+            Event(**self.event_data(add_months(first, month) + timedelta(hours=hour)))
+            for month in range(6) for hour in range(50)
+        ])
+
+        def plan(call):
+            with CaptureQueriesContext(connection) as context:
+                call()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + context.captured_queries[-1]['sql'])
+                return '\n'.join(row[0] for row in cursor.fetchall())
+
+        filters = {"trans_tms_from": datetime(2011, 5, 1, tzinfo=timezone.utc), "trans_tms_to": datetime(2011, 6, 1, tzinfo=timezone.utc)}
+        ranged = plan(lambda: self.event_service.get_events_page(filters, limit=10))
+        self.assertIn('crud_event_p2011_05', ranged)
+        self.assertNotIn('crud_event_p2011_04', ranged)
+
+        # A cursor in April leaves the earlier months out of the next page; the first 10 of April's 50 rows keep it there
+        page = self.event_service.get_events_page({"trans_tms_from": datetime(2011, 4, 1, tzinfo=timezone.utc)}, limit=10)
+        self.assertEqual(decode_cursor(page['next'])[0].month, 4)
+        following = plan(lambda: self.event_service.get_events_page(cursor=decode_cursor(page['next']), limit=10))
+        self.assertIn('crud_event_p2011_04', following)
+        self.assertNotIn('crud_event_p2011_03', following)
+
+    def test_create_event_partitions(self):
+        out = StringIO()
+        call_command('create_event_partitions', '--months-ahead', '14', stdout=out)
+
+        self.assertIn(partition_name('crud_event', add_months(self.current, 14)), self.partitions())
+        self.assertIn('Created', out.getvalue())
+
+    def test_expire_event_partitions(self):
+        old = add_months(self.current, -20)
+        kept = add_months(self.current, -3)
+        old_event = self.event_service.create_event(self.event_data(old + timedelta(days=2)))
+        kept_event = self.event_service.create_event(self.event_data(kept + timedelta(days=2)))
+        old_name = partition_name('crud_event', old)
+
+        out = StringIO()
+        call_command('expire_event_partitions', '--months', '12', '--dry-run', stdout=out)
+        self.assertIn(f'Would expire {old_name}', out.getvalue())
+        self.assertIn(old_name, self.partitions())
+
+        version = self.event_service.get_table_version()[0]
+        call_command('expire_event_partitions', '--months', '12', stdout=StringIO())
+
+        self.assertNotIn(old_name, self.partitions())
+        self.assertFalse(self.table_exists(old_name))
+        self.assertFalse(Event.objects.filter(event_id=old_event.event_id).exists())
+        self.assertTrue(Event.objects.filter(event_id=kept_event.event_id).exists())
+        self.assertFalse(EventRollup.objects.filter(hour__lt=add_months(old, 1)).exists())
+        self.assertTrue(EventRollup.objects.filter(hour__gte=kept).exists())
+        self.assertGreater(self.event_service.get_table_version()[0], version)
+
+    def test_expire_to_archive_schema(self):
+        old = add_months(self.current, -20)
+        self.event_service.create_event(self.event_data(old + timedelta(days=2)))
+        old_name = partition_name('crud_event', old)
+
+        call_command('expire_event_partitions', '--months', '12', '--archive-schema', 'crud_archive', stdout=StringIO())
+
+        self.assertNotIn(old_name, self.partitions())
+        self.assertTrue(self.table_exists(f'crud_archive.{old_name}'))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM crud_archive.{old_name}')
+            self.assertEqual(cursor.fetchone()[0], 1)
@@ -0,0 +1,123 @@
+import os
+import pstats
+import shutil
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from crud.models import EventTableVersion
+from crud.services.event_service import EVENT_TABLE_VERSION_ID
+from crud.utils.ProfileUtil import list_profiles
+from crud.tests.factories import clear_event_cache
+from uuid import uuid4
+
+PROFILING_DIR = tempfile.mkdtemp(prefix='crud-profiles-')
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_DIR=PROFILING_DIR, PROFILING_SAMPLE_RATE=0.0)
+class RequestProfilingTest(APITestCase):
+
+    def setUp(self):
+        clear_event_cache()
+        EventTableVersion.objects.get_or_create(pk=EVENT_TABLE_VERSION_ID)
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+        self.batch = {"records": [
+            {
+                "trans_id": str(uuid4()),
+                "trans_tms": "20151022102011927EDT",
+                "rc_num": "10002",
+                "client_id": "RPS-00001",
+                "event": [{"event_cnt": 1, "location_cd": "DESTINATION", "location_id1": "T8C", "addr_nbr": "0000000001"}],
+            }
+            for _ in range(3)
+        ]}
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def post_batch(self, **headers):
+        return self.client.post('/api/create-events-batch/', self.batch, format='json', headers=headers)
+
+    def test_profiles_requests_with_the_header(self):
+        response = self.post_batch(**{'X-Profile': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["data"]["added_count"], 3)
+
+        profiles = list_profiles()
+        self.assertEqual(len(profiles), 1)
+        profile = profiles[0]
+        self.assertEqual(response["X-Profile-Id"], profile["profile_id"])
+        self.assertEqual(os.path.basename(profile["profile_path"]), f'{profile["profile_id"]}.prof')
+        self.assertEqual(profile["endpoint"], 'create-events-batch')
+        self.assertEqual(profile["status"], 200)
+        self.assertGreater(profile["query_count"], 0)
+        self.assertEqual(len(profile["queries"]), profile["query_count"])
+
+        functions = {function for _, _, function in pstats.Stats(profile["profile_path"]).stats}
+        self.assertIn('create_events_batch', functions)
+        self.assertIn('preprocess_records', functions)
+
+    def test_other_requests_are_not_profiled(self):
+        response = self.post_batch()
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(list_profiles(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_profiled(self):
+        self.client.get('/api/get-events/')
+
+        self.assertEqual([profile["endpoint"] for profile in list_profiles()], ['get-events'])
+
+    def test_request_id_names_the_profile(self):
+        first = self.post_batch(**{'X-Profile': '1', 'X-Request-ID': 'slow-upload-42'})
+        second = self.client.get('/api/get-events/', headers={'X-Profile': '1', 'X-Request-ID': 'slow-upload-42'})
+        self.client.get('/api/get-events/', headers={'X-Profile': '1', 'X-Request-ID': '../../etc/passwd'})
+
+        request_ids = [profile["request_id"] for profile in list_profiles()]
+        self.assertEqual(request_ids.count('slow-upload-42'), 2)
+        self.assertNotIn('../../etc/passwd', request_ids)
+
+        # A reused request id gets a profile of its own
+        self.assertNotEqual(first["X-Profile-Id"], second["X-Profile-Id"])
+        for response in (first, second):
+            self.assertTrue(response["X-Profile-Id"].startswith('slow-upload-42-'))
+            self.assertTrue(os.path.exists(os.path.join(PROFILING_DIR, f'{response["X-Profile-Id"]}.prof')))
+
+    @override_settings(PROFILING_KEEP=2)
+    def test_keeps_the_newest_profiles(self):
+        for index in range(4):
+            self.client.get('/api/get-events/', headers={'X-Profile': '1', 'X-Request-ID': f'request-{index}'})
+
+        self.assertEqual(len(list_profiles()), 2)
+        self.assertEqual(len(os.listdir(PROFILING_DIR)), 4)
+
+    def test_profile_report(self):
+        self.post_batch(**{'X-Profile': '1'})
+        listing = self.client.get('/api/get-events/', headers={'X-Profile': '1'})
+
+        out = StringIO()
+        call_command('profile_report', '--endpoint', 'create-events-batch', '--sort', 'cumtime', stdout=out)
+        report = out.getvalue()
+
+        self.assertIn('create-events-batch', report)
+        self.assertIn('1 profiles', report)
+        self.assertIn('_insert_events_batch', report)
+        self.assertIn('INSERT', report)
+        self.assertNotIn('get-events', report)
+
+        out = StringIO()
+        call_command('profile_report', '--list', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+        out = StringIO()
+        call_command('profile_report', '--list', '--request-id', listing["X-Profile-Id"], stdout=out)
+        self.assertEqual(out.getvalue().split()[1], listing["X-Profile-Id"])
+
+        with self.assertRaises(CommandError):
+            call_command('profile_report', '--endpoint', 'delete-event', stdout=StringIO())
@@ -0,0 +1,114 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from crud.models import Event, EventTableVersion
+from crud.services.event_service import EVENT_TABLE_VERSION_ID
+from crud.utils.QueryBudgetUtil import query_shape, check_query_budget, query_budget, QueryBudgetExceeded, QUERY_BUDGET_RAISE, QUERY_BUDGET_WARN
+from crud.tests.factories import clear_event_cache
+from uuid import uuid4
+
+class QueryShapeTest(SimpleTestCase):
+
+    def test_values_are_folded(self):
+        self.assertEqual(
+            query_shape('SELECT "crud_event"."event_id" FROM "crud_event" WHERE "crud_event"."event_id" IN (%s, %s, %s) LIMIT 21'),
+            'SELECT "crud_event"."event_id" FROM "crud_event" WHERE "crud_event"."event_id" IN (...) LIMIT ?',
+        )
+        self.assertEqual(
+            query_shape('INSERT INTO "crud_event" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            query_shape('INSERT INTO "crud_event" ("a", "b") VALUES (%s, %s)'),
+        )
+        self.assertEqual(query_shape("SELECT 1 WHERE name = 'it''s'"), 'SELECT ? WHERE name = ?')
+
+    def test_identifiers_are_kept(self):
+        self.assertEqual(query_shape('SAVEPOINT "s1398_x66"'), 'SAVEPOINT "s1398_x66"')
+        self.assertEqual(query_shape('SELECT "location_id1" FROM "crud_event"'), 'SELECT "location_id1" FROM "crud_event"')
+
+    def test_within_budget(self):
+        check_query_budget(['SELECT 1', 'SAVEPOINT "s1"', 'SELECT 2', 'RELEASE SAVEPOINT "s1"'], 2, 'block')
+
+    def test_over_budget_report(self):
+        queries = ['BEGIN', 'SELECT * FROM a WHERE id = %s', 'UPDATE b SET x = %s', 'SELECT * FROM a WHERE id = %s', 'COMMIT']
+
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            check_query_budget(queries, 2, 'get-events')
+
+        self.assertEqual(str(raised.exception), '\n'.join([
+            'get-events ran 3 queries, 1 over its budget of 2',
+            '      2 x SELECT * FROM a WHERE id = ?',
+            '      1 x UPDATE b SET x = ?',
+        ]))
+
+    def test_repeated_shapes_are_flagged(self):
+        queries = [f'SELECT * FROM a WHERE id = {index}' for index in range(3)] + ['SELECT count(*) FROM b']
+
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            check_query_budget(queries, None, 'loop', repeat_threshold=3)
+
+        report = str(raised.exception)
+        self.assertIn('Possible N+1: 1 query shapes repeated 3 times or more', report)
+        self.assertIn('+     3 x SELECT * FROM a WHERE id = ?', report)
+        self.assertIn('      1 x SELECT count(*) FROM b', report)
+
+
+class QueryBudgetMiddlewareTest(APITestCase):
+
+    def setUp(self):
+        clear_event_cache()
+        EventTableVersion.objects.get_or_create(pk=EVENT_TABLE_VERSION_ID)
+        self.events = [
+            Event.objects.create(
+                trans_id=uuid4(),
+                trans_tms="2015-10-22 10:20:11.927+05:30",
+                rc_num="10002",
+                client_id="RPS-00001",
+                event_cnt=1,
+                location_cd="DESTINATION",
+                addr_nbr="0000000001"
+            )
+            for _ in range(3)
+        ]
+
+    @override_settings(QUERY_BUDGET_MODE=QUERY_BUDGET_RAISE, QUERY_BUDGETS={'get-events': 1})
+    def test_raise_mode_fails_the_request(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'GET get-events ran 2 queries, 1 over its budget of 1'):
+            self.client.get('/api/get-events/')
+
+    @override_settings(QUERY_BUDGET_MODE=QUERY_BUDGET_WARN, QUERY_BUDGETS={'get-events': 1})
+    def test_warn_mode_reports(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            response = self.client.get('/api/get-events/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('GET get-events ran 2 queries', out.getvalue())
+
+    @override_settings(QUERY_BUDGET_MODE=QUERY_BUDGET_RAISE)
+    def test_batch_upload_writes_in_chunks(self):
+        records = [
+            {
+                "trans_id": str(uuid4()),
+                "trans_tms": "20151022102011927EDT",
+                "rc_num": "10002",
+                "client_id": "RPS-00001",
+                "event": [{"event_cnt": 1, "location_cd": "DESTINATION", "location_id1": "T8C", "addr_nbr": "0000000001"}],
+            }
+            for _ in range(50)
+        ]
+
+        # Per-event INSERTs would repeat one shape 50 times
+        response = self.client.post('/api/create-events-batch/', {"records": records}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["data"]["added_count"], 50)
+
+    def test_query_budget_flags_n_plus_one(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'Possible N+1'):
+            with query_budget(10, 'events one by one', repeat_threshold=3):
+                for event in self.events:
+                    Event.objects.get(pk=event.pk)
+
+        with query_budget(1, 'events at once', repeat_threshold=3):
+            list(Event.objects.filter(pk__in=[event.pk for event in self.events]))
@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from crud.models import Event, EventRollup
+from crud.services.event_service import EventService
+from crud.services.rollup_service import RollupService
+from crud.tests.factories import clear_event_cache, make_event
+
+HOUR = datetime(2015, 10, 22, 4, tzinfo=timezone.utc)
+
+class EventRollupTest(TestCase):
+
+    def setUp(self):
+        clear_event_cache()
+        self.event_service = EventService()
+        self.rollup_service = RollupService()
+
+    def rollups(self):
+        return {
+            (rollup.client_id, rollup.location_cd, rollup.hour): (rollup.event_cnt, rollup.row_count)
+            for rollup in EventRollup.objects.all()
+        }
+
+    def assert_consistent(self):
+        self.assertEqual(self.rollup_service.check(), [])
+
+    def test_create_event(self):
+        self.event_service.create_event(make_event())
+        self.event_service.create_event(make_event(event_cnt=3))
+
+        self.assertEqual(self.rollups(), {("RPS-00001", "DESTINATION", HOUR): (4, 2)})
+        self.assert_consistent()
+
+    def test_create_events_batch(self):
+        events = [make_event() for _ in range(4)]
+        events.append(make_event(client_id="RPS-00002", trans_tms="2015-10-22 11:59:59+00:00"))
+        events.append(make_event(trans_tms="Invalid Timestamp"))
+
+        result = self.event_service.create_events_batch(events, chunk_size=4)
+
+        self.assertEqual(result['failed_count'], 1)
+        self.assertEqual(self.rollups(), {
+            ("RPS-00001", "DESTINATION", HOUR): (4, 4),
+            ("RPS-00002", "DESTINATION", datetime(2015, 10, 22, 11, tzinfo=timezone.utc)): (1, 1),
+        })
+        self.assert_consistent()
+
+    def test_retried_batch_is_not_counted_twice(self):
+        events = [make_event() for _ in range(3)]
+        self.event_service.create_events_batch(events)
+
+        self.event_service.create_events_batch([dict(event) for event in events])
+        self.event_service.create_events_batch([dict(events[0], event_cnt=7)], on_conflict='update')
+
+        self.assertEqual(self.rollups(), {("RPS-00001", "DESTINATION", HOUR): (9, 3)})
+        self.assert_consistent()
+
+    def test_update_event_moves_bucket(self):
+        event = self.event_service.create_event(make_event())
+        self.event_service.create_event(make_event())
+
+        self.event_service.update_event(event.event_id, {"location_cd": "OUTLET ID", "event_cnt": 5})
+
+        self.assertEqual(self.rollups(), {
+            ("RPS-00001", "DESTINATION", HOUR): (1, 1),
+            ("RPS-00001", "OUTLET ID", HOUR): (5, 1),
+        })
+        self.assert_consistent()
+
+    def test_delete_event_removes_empty_bucket(self):
+        event = self.event_service.create_event(make_event())
+
+        self.event_service.delete_event(event.event_id)
+
+        self.assertEqual(self.rollups(), {})
+        self.assert_consistent()
+
+    def test_bulk_update_and_delete(self):
+        events = [self.event_service.create_event(make_event()) for _ in range(4)]
+
+        self.event_service.update_events_bulk({
+            events[0].event_id: {"location_cd": "OUTLET ID"},
+            events[1].event_id: {"event_cnt": 5},
+        }, chunk_size=1)
+        self.assertEqual(self.rollups(), {
+            ("RPS-00001", "DESTINATION", HOUR): (7, 3),
+            ("RPS-00001", "OUTLET ID", HOUR): (1, 1),
+        })
+
+        self.event_service.delete_events_bulk([event.event_id for event in events[:3]], chunk_size=2)
+        self.assertEqual(self.rollups(), {("RPS-00001", "DESTINATION", HOUR): (1, 1)})
+        self.assert_consistent()
+
+    def test_rebuild_command(self):
+        self.event_service.create_event(make_event())
+        Event.objects.create(**make_event(client_id="RPS-00009"))  # Bypasses the service
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_event_rollups', '--check', stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_event_rollups', stdout=out)
+
+        self.assertIn('consistent', out.getvalue())
+        self.assertEqual(self.rollups()[("RPS-00009", "DESTINATION", HOUR)], (1, 1))
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.test import TestCase
+from django.utils import timezone
+from unittest.mock import patch
+from crud.models import Event
+from crud.serializers import EventSerializer, EventRowSerializer, EventBatchValidator
+from crud.tests.factories import make_event
+from uuid import uuid4
+
+class EventRowSerializerTest(TestCase):
+
+    def setUp(self):
+        self.serializer = EventRowSerializer()
+        Event.objects.create(
+            trans_id=uuid4(),
+            trans_tms="2015-10-22 10:20:11.927+05:30",
+            rc_num="10002",
+            client_id="RPS-00001",
+            event_cnt=3,
+            location_cd="DESTINATION",
+            location_id1="T8C",
+            location_id2="1J7",
+            addr_nbr="0000000001"
+        )
+        Event.objects.create(
+            trans_id=uuid4(),
+            trans_tms=datetime(2024, 2, 29, 23, 59, 59, tzinfo=dt_timezone(timedelta(hours=-4))),
+            rc_num="",
+            client_id="RPS-00002",
+            location_cd="OUTLET ID"
+        )
+        Event.objects.create(
+            trans_id=uuid4(),
+            trans_tms=datetime(2000, 1, 1, tzinfo=dt_timezone.utc),
+            rc_num="10004",
+            client_id="RPS-00003",
+            location_cd="CUSTOMER NUMBER",
+            addr_nbr=None
+        )
+
+    def assert_parity(self):
+        events = Event.objects.order_by('trans_tms')
+        rows = events.values_list(*self.serializer.field_names)
+
+        self.assertEqual(self.serializer.serialize(rows), EventSerializer(events, many=True).data)
+
+    def test_field_names_match_event_serializer(self):
+        self.assertEqual(list(self.serializer.field_names), list(EventSerializer().fields.keys()))
+
+    def test_parity_with_event_serializer(self):
+        self.assert_parity()
+
+    def test_parity_with_active_timezone(self):
+        with timezone.override('Asia/Kolkata'):
+            self.assert_parity()
+
+    def test_timezone_is_looked_up_once_per_call(self):
+        rows = list(Event.objects.order_by('trans_tms').values_list(*self.serializer.field_names))
+
+        with patch('django.utils.timezone.get_current_timezone', wraps=timezone.get_current_timezone) as lookup:
+            self.serializer.serialize(rows * 10)
+
+        self.assertEqual(lookup.call_count, 1)
+
+
+class EventBatchValidatorTest(TestCase):
+
+    def setUp(self):
+        self.validator = EventBatchValidator()
+
+    def make_row(self, **overrides):
+        return make_event(**{
+            "trans_tms": datetime(2015, 10, 22, 10, 20, 11, 927000, tzinfo=dt_timezone(timedelta(hours=-4))),
+            "location_id1": "T8C",
+            "location_id2": "1J7",
+            "addr_nbr": "0000000001",
+            **overrides,
+        })
+
+    def assert_parity(self, rows):
+        serializer = EventSerializer(data=rows, many=True)
+        validated, errors = self.validator.validate(rows)
+
+        if serializer.is_valid():
+            self.assertEqual(errors, [{} for _ in rows])
+            self.assertEqual(validated, serializer.validated_data)
+        else:
+            self.assertEqual(errors, serializer.errors)
+            self.assertTrue(any(errors))
+
+        # Rows are validated independently; a serializer of None alone has its own error
+        for row, row_data, row_errors in zip(rows, validated, errors):
+            if row is None:
+                continue
+            single = EventSerializer(data=row)
+            self.assertEqual((row_data, row_errors), (single.validated_data, {}) if single.is_valid() else (None, single.errors))
+
+    def test_valid_rows(self):
+        self.assert_parity([self.make_row() for _ in range(3)])
+
+    def test_string_values(self):
+        self.assert_parity([
+            self.make_row(trans_id=str(uuid4()), trans_tms="2015-10-22T10:20:11.927-04:00", event_cnt="7"),
+            self.make_row(trans_id=str(uuid4()).upper(), trans_tms="2024-02-29 23:59:59"),
+            self.make_row(trans_id=uuid4().hex, client_id="  RPS-00002  ", location_id1=" "),
+        ])
+
+    def test_invalid_values(self):
+        for overrides in (
+            {"trans_id": "not-a-uuid"},
+            {"trans_id": 12},
+            {"trans_tms": "bad"},
+            {"trans_tms": datetime(2015, 10, 22).date()},
+            {"rc_num": "x" * 101},
+            {"client_id": "   "},
+            {"client_id": ""},
+            {"location_cd": "DEST\x00"},
+            {"location_cd": None},
+            {"location_id1": "x" * 51},
+            {"addr_nbr": ["0000000001"]},
+            {"event_cnt": "1.5"},
+            {"event_cnt": 1.5},
+            {"event_cnt": "many"},
+            {"event_cnt": None},
+            {"event_cnt": 2 ** 40},
+            {"event_cnt": -2 ** 40},
+        ):
+            with self.subTest(overrides=overrides):
+                self.assert_parity([self.make_row(), self.make_row(**overrides)])
+
+    def test_coerced_values(self):
+        for overrides in (
+            {"event_cnt": "1.0"},
+            {"event_cnt": 2.0},
+            {"event_cnt": True},
+            {"rc_num": 10002},
+            {"location_cd": "DESTINATIÓN"},
+            {"location_id1": None, "location_id2": "", "addr_nbr": None},
+            {"trans_tms": datetime(2015, 10, 22, 10, 20, 11)},
+        ):
+            with self.subTest(overrides=overrides):
+                self.assert_parity([self.make_row(**overrides)])
+
+    def test_missing_and_extra_keys(self):
+        row = self.make_row(event_id=uuid4(), unknown="ignored")
+        missing = self.make_row()
+        for key in ("trans_tms", "event_cnt", "client_id", "location_cd", "location_id1"):
+            del missing[key]
+
+        self.assert_parity([row, missing])
+
+    def test_rows_that_are_not_dicts(self):
+        self.assert_parity([self.make_row(), None, "row", [self.make_row()]])
+
+    def test_parity_with_active_timezone(self):
+        rows = [self.make_row(), self.make_row(trans_tms=datetime(2000, 1, 1, 12)), self.make_row(trans_tms="2000-01-01T12:00:00")]
+
+        with timezone.override('Asia/Kolkata'):
+            self.assert_parity(rows)
@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.test import TestCase
 from unittest.mock import patch
-from crud.models import Event
-from crud.services.event_service import EventService
+from crud.models import Event, EventTableVersion, IdempotencyKey
+from crud.services.event_service import EventService, EVENT_TABLE_VERSION_ID
+from crud.services.idempotency_service import IdempotencyService, IdempotencyKeyReused, IdempotencyKeyInProgress
 from uuid import uuid4
+from datetime import datetime, timedelta, timezone
+from crud.utils.CursorUtil import decode_cursor
+from crud.tests.factories import clear_event_cache
 
 class EventServiceTest(TestCase):
     
     def setUp(self):
+        clear_event_cache()
         self.event_service = EventService()
         self.test_event = Event.objects.create(
             event_id=uuid4(),
@@ -43,6 +49,41 @@ class EventServiceTest(TestCase):
         events = self.event_service.get_all_events()
         self.assertEqual(len(events), 1)
     
+    def test_get_events_page_walks_forward_and_back(self):
+        base = datetime(2016, 1, 1, tzinfo=timezone.utc)
+        for i in range(5):
+            # Pairs of rows share a timestamp so the event_id tie-breaker is exercised
+            Event.objects.create(trans_id=uuid4(), trans_tms=base + timedelta(hours=i // 2), rc_num="1",
+                                 client_id="RPS-00002", location_cd="DESTINATION")
+        expected = list(Event.objects.filter(client_id="RPS-00002").order_by('trans_tms', 'event_id'))
+        filters = {"client_id": "RPS-00002"}
+        
+        first = self.event_service.get_events_page(filters, limit=2)
+        second = self.event_service.get_events_page(filters, decode_cursor(first['next']), limit=2)
+        third = self.event_service.get_events_page(filters, decode_cursor(second['next']), limit=2)
+        
+        self.assertEqual(first['events'] + second['events'] + third['events'], expected)
+        self.assertIsNone(first['prev'])
+        self.assertIsNone(third['next'])
+        
+        back = self.event_service.get_events_page(filters, decode_cursor(third['prev']), limit=2)
+        self.assertEqual(back['events'], second['events'])
+        self.assertEqual(back['next'], second['next'])
+        
+        start = self.event_service.get_events_page(filters, decode_cursor(back['prev']), limit=2)
+        self.assertEqual(start['events'], first['events'])
+        self.assertIsNone(start['prev'])
+    
+    def test_get_events_page_time_range(self):
+        page = self.event_service.get_events_page({
+            "trans_tms_from": datetime(2015, 10, 22, tzinfo=timezone.utc),
+            "trans_tms_to": datetime(2015, 10, 23, tzinfo=timezone.utc),
+        })
+        self.assertEqual(page['events'], [self.test_event])
+        
+        page = self.event_service.get_events_page({"trans_tms_from": datetime(2015, 10, 23, tzinfo=timezone.utc)})
+        self.assertEqual(page['events'], [])
+    
     def test_get_event_by_id(self):
         event = self.event_service.get_event_by_id(self.test_event.event_id)
         self.assertEqual(event.event_id, self.test_event.event_id)
@@ -63,9 +104,7 @@ class EventServiceTest(TestCase):
         
     @patch.object(EventService, 'create_event')
     def test_create_events_batch(self, mock_create_event):
-        # Simulate success for the first event and failure for the second
-        mock_create_event.side_effect = [None, Exception('Failed to create event')]
-        
+        version = self.event_service.get_table_version()[0]
         events = [self.valid_event, self.invalid_event]
         
         result = self.event_service.create_events_batch(events)
@@ -80,8 +119,99 @@ class EventServiceTest(TestCase):
         self.assertEqual(len(result['failed']), 1)
         self.assertEqual(result['failed'][0]['trans_id'], self.invalid_event['trans_id'])
 
-        # Verify that create_event was called twice
-        self.assertEqual(mock_create_event.call_count, 2)
+        # Rows left alone after bisecting stay on the batch path, with one version bump for the batch
+        mock_create_event.assert_not_called()
+        self.assertEqual(self.event_service.get_table_version()[0], version + 1)
+    
+    def test_create_events_batch_chunked(self):
+        events = [dict(self.valid_event, event_id=uuid4(), trans_id=uuid4()) for _ in range(5)]
+        events.insert(3, self.invalid_event)
+        
+        result = self.event_service.create_events_batch(events, chunk_size=4)
+        
+        # Only the invalid row is rejected, its chunk neighbours are still written
+        self.assertEqual(result['added_count'], 5)
+        self.assertEqual(result['failed_count'], 1)
+        self.assertEqual(result['failed'][0]['event_id'], self.invalid_event['event_id'])
+        self.assertEqual(Event.objects.count(), 6)
+    
+    def test_create_events_batch_copy_falls_back_without_postgres(self):
+        events = [dict(self.valid_event, event_id=uuid4(), trans_id=uuid4()) for _ in range(3)]
+        
+        result = self.event_service.create_events_batch(events, use_copy=True)
+        
+        self.assertEqual(result['added_count'], 3)
+        self.assertEqual(result['failed_count'], 0)
+        self.assertEqual(Event.objects.count(), 4)
+    
+    def test_create_events_batch_retry_is_noop(self):
+        events = [dict(self.valid_event, event_id=uuid4(), trans_id=uuid4()) for _ in range(3)]
+        self.event_service.create_events_batch(events)
+        
+        # A retry carries fresh event_ids but the same natural keys
+        retry = [dict(event, event_id=uuid4()) for event in events]
+        result = self.event_service.create_events_batch(retry, chunk_size=2)
+        
+        self.assertEqual(result['added_count'], 0)
+        self.assertEqual(result['skipped_count'], 3)
+        self.assertEqual(Event.objects.count(), 4)
+    
+    def test_create_events_batch_skips_repeats_within_batch(self):
+        event = dict(self.valid_event, trans_id=self.test_event.trans_id, trans_tms=self.test_event.trans_tms)
+        events = [event, dict(self.valid_event, event_id=uuid4()), dict(self.valid_event, event_id=uuid4())]
+        
+        result = self.event_service.create_events_batch(events)
+        
+        self.assertEqual(result['added_count'], 1)
+        self.assertEqual(result['skipped_count'], 2)
+        self.assertEqual(Event.objects.count(), 2)
+    
+    def test_create_events_batch_update_conflicts(self):
+        event = dict(self.valid_event, trans_id=self.test_event.trans_id, trans_tms=self.test_event.trans_tms,
+                     client_id="RPS-00009", event_cnt=4)
+        
+        result = self.event_service.create_events_batch([event, dict(self.valid_event)], on_conflict='update')
+        
+        self.assertEqual(result['added_count'], 1)
+        self.assertEqual(result['updated_count'], 1)
+        self.test_event.refresh_from_db()
+        self.assertEqual(self.test_event.client_id, "RPS-00009")
+        self.assertEqual(self.test_event.event_cnt, 4)
+        self.assertEqual(Event.objects.count(), 2)
+    
+    def test_update_event_invalidates_cached_pages(self):
+        self.event_service.get_events_page()
+        
+        self.event_service.update_event(self.test_event.event_id, {"rc_num": "10005"})
+        
+        self.assertEqual(self.event_service.get_events_page()['events'][0].rc_num, "10005")
+    
+    def test_writes_invalidate_cached_pages(self):
+        self.assertEqual(len(self.event_service.get_events_page()['events']), 1)
+        # A cached page costs only the table version lookup
+        with self.assertNumQueries(1):
+            self.event_service.get_events_page()
+        
+        self.event_service.create_event(dict(self.valid_event))
+        self.assertEqual(len(self.event_service.get_events_page()['events']), 2)
+        
+        self.event_service.create_events_batch([dict(self.valid_event, event_id=uuid4(), trans_id=uuid4()) for _ in range(2)])
+        self.assertEqual(len(self.event_service.get_events_page()['events']), 4)
+        
+        self.event_service.delete_event(self.test_event.event_id)
+        self.assertEqual(len(self.event_service.get_events_page()['events']), 3)
+        self.assertIsNone(self.event_service.get_event_by_id(self.test_event.event_id))
+        self.assertEqual(self.event_service.get_cache_stats()['page_hits'], 1)
+    
+    def test_cached_pages_follow_the_table_version(self):
+        self.event_service.get_events_page()
+        version = self.event_service.get_table_version()[0]
+        
+        # A write made by another process bumps the version row, this process's cache is untouched
+        Event.objects.create(**self.valid_event)
+        EventTableVersion.objects.update_or_create(pk=EVENT_TABLE_VERSION_ID, defaults={"version": version + 1})
+        
+        self.assertEqual(len(self.event_service.get_events_page()['events']), 2)
     
     def test_update_event(self):
         new_data = {
@@ -96,3 +226,71 @@ class EventServiceTest(TestCase):
         self.event_service.delete_event(self.test_event.event_id)
         deleted_event = self.event_service.get_event_by_id(self.test_event.event_id)
         self.assertIsNone(deleted_event)
+
+    def test_update_events_bulk(self):
+        other = Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01 00:00:00+00:00", rc_num="1",
+                                     client_id="RPS-00001", location_cd="OUTLET ID")
+        missing = uuid4()
+        # Moving other onto test_event's natural key conflicts, the rest of the chunk is still written
+        updates = {
+            self.test_event.event_id: {"rc_num": "10004"},
+            missing: {"rc_num": "10004"},
+            other.event_id: {"trans_id": self.test_event.trans_id, "trans_tms": self.test_event.trans_tms, "location_cd": "DESTINATION"},
+        }
+        
+        result = self.event_service.update_events_bulk(updates, chunk_size=2)
+        
+        self.assertEqual(result["updated"], [self.test_event.event_id])
+        self.assertEqual(result["not_found"], [missing])
+        self.assertEqual(result["failed"], [other.event_id])
+        self.assertEqual(Event.objects.get(event_id=self.test_event.event_id).rc_num, "10004")
+        self.assertEqual(Event.objects.get(event_id=other.event_id).location_cd, "OUTLET ID")
+    
+    def test_delete_events_bulk(self):
+        others = [Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01 00:00:00+00:00", rc_num="1",
+                                       client_id="RPS-00001", location_cd="DESTINATION") for _ in range(3)]
+        missing = uuid4()
+        
+        result = self.event_service.delete_events_bulk([others[0].event_id, missing, str(others[1].event_id), others[2].event_id], chunk_size=2)
+        
+        self.assertEqual(result["deleted"], [event.event_id for event in others])
+        self.assertEqual(result["not_found"], [missing])
+        self.assertEqual(result["deleted_count"], 3)
+        self.assertEqual(list(Event.objects.all()), [self.test_event])
+        self.assertIsNone(self.event_service.get_event_by_id(others[0].event_id))
+
+
+class IdempotencyServiceTest(TestCase):
+    
+    def setUp(self):
+        self.idempotency_service = IdempotencyService()
+    
+    def test_reserve_key(self):
+        self.assertIsNone(self.idempotency_service.reserve("key-1", "a"))
+        
+        with self.assertRaises(IdempotencyKeyInProgress):
+            self.idempotency_service.reserve("key-1", "a")
+        with self.assertRaises(IdempotencyKeyReused):
+            self.idempotency_service.reserve("key-1", "b")
+        
+        self.idempotency_service.save_response("key-1", "a", 200, {"data": 1})
+        
+        self.assertEqual(self.idempotency_service.reserve("key-1", "a"), (200, {"data": 1}))
+    
+    def test_released_key_is_reserved_again(self):
+        self.idempotency_service.reserve("key-1", "a")
+        self.idempotency_service.release("key-1", "a")
+        
+        self.assertIsNone(self.idempotency_service.reserve("key-1", "a"))
+    
+    def test_abandoned_and_expired_keys_are_replaced(self):
+        self.idempotency_service.reserve("pending", "a")
+        self.idempotency_service.reserve("done", "a")
+        self.idempotency_service.save_response("done", "a", 200, {})
+        
+        IdempotencyKey.objects.filter(key="pending").update(created_at=datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_PENDING_TIMEOUT + 1))
+        IdempotencyKey.objects.filter(key="done").update(created_at=datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1))
+        
+        self.assertIsNone(self.idempotency_service.reserve("pending", "b"))
+        self.assertIsNone(self.idempotency_service.reserve("done", "b"))
+        self.assertEqual(IdempotencyKey.objects.filter(fingerprint="b").count(), 2)
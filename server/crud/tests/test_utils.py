@@ -0,0 +1,239 @@
+from datetime import datetime, timedelta, timezone
+from django.test import SimpleTestCase, override_settings
+from uuid import uuid4
+from crud.utils.CopyUtil import CopyStream, to_copy_line
+from crud.utils.PoolUtil import ConnectionPool, PoolTimeout
+from crud.utils.DateTimeUtil import convert_to_iso, parse_timestamp, parse_timestamps
+from crud.utils.PreprocessUtil import (
+    AUTO_STRATEGY, CHUNKED_STRATEGY, INLINE_STRATEGY, PROCESS_STRATEGY,
+    preprocess_records, process_records_inline, select_strategy,
+)
+
+
+class CopyUtilTest(SimpleTestCase):
+
+    def test_to_copy_line_escapes_values(self):
+        line = to_copy_line(["a\tb", None, "back\\slash", "multi\nline", 3])
+        self.assertEqual(line, "a\\tb\t\\N\tback\\\\slash\tmulti\\nline\t3\n")
+
+    def test_to_copy_line_formats_datetimes_and_uuids(self):
+        value = uuid4()
+        line = to_copy_line([value, datetime(2015, 10, 22, 10, 20, 11, 927000, tzinfo=timezone.utc)])
+        self.assertEqual(line, f"{value}\t2015-10-22T10:20:11.927000+00:00\n")
+
+    def test_copy_stream_reads_in_chunks(self):
+        rows = [[str(i), "x" * 10] for i in range(100)]
+        stream = CopyStream(iter(rows))
+
+        chunks = []
+        while True:
+            chunk = stream.read(64)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 64)
+            chunks.append(chunk)
+
+        self.assertEqual(b"".join(chunks).decode(), "".join(to_copy_line(row) for row in rows))
+
+
+class DateTimeUtilTest(SimpleTestCase):
+
+    def test_parse_timestamp_matches_convert_to_iso(self):
+        # convert_to_iso ignores the suffix and reads the digits as server local time,
+        # parse_timestamp reads the same wall-clock fields in the suffix's offset
+        for trans_tms in ["20151022102011927EDT", "20000101000000000EDT", "20241231235959999EDT"]:
+            expected = datetime.fromisoformat(convert_to_iso(trans_tms)).astimezone()
+            parsed = parse_timestamp(trans_tms)
+
+            self.assertEqual(parsed.replace(tzinfo=None), expected.replace(tzinfo=None))
+            self.assertEqual(parsed.utcoffset(), timedelta(hours=-4))
+
+    def test_parse_timestamp_zone_suffixes(self):
+        self.assertEqual(
+            parse_timestamp("20151022102011927EST"),
+            datetime(2015, 10, 22, 15, 20, 11, 927000, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            parse_timestamp("20151022102011927PDT"),
+            datetime(2015, 10, 22, 17, 20, 11, 927000, tzinfo=timezone.utc)
+        )
+        self.assertEqual(parse_timestamp("20151022102011927UTC").utcoffset(), timedelta(0))
+
+    def test_parse_timestamp_invalid(self):
+        for trans_tms in ["Invalid Timestamp", "20151022102011927", "20151022102011927XYZ",
+                          "20151322102011927EDT", "2015102210201192EDT", "2015-10-22T10:20EDT", None, 20151022]:
+            with self.assertRaises(ValueError):
+                parse_timestamp(trans_tms)
+
+    def test_parse_timestamps_column(self):
+        column = ["20151022102011927EDT", "bad", "20151022102011927EDT", None, "20151022102011927CDT"]
+
+        parsed = parse_timestamps(column)
+
+        self.assertEqual(len(parsed), len(column))
+        self.assertEqual(parsed[0], parse_timestamp(column[0]))
+        self.assertIsNone(parsed[1])
+        self.assertEqual(parsed[2], parsed[0])
+        self.assertIsNone(parsed[3])
+        self.assertEqual(parsed[4], parsed[0] + timedelta(hours=1))
+
+
+class PreprocessUtilTest(SimpleTestCase):
+
+    def setUp(self):
+        self.records = [
+            {
+                "trans_id": str(uuid4()),
+                "trans_tms": "20151022102011927EDT",
+                "rc_num": "10002",
+                "client_id": "RPS-00001",
+                "event": [
+                    {"event_cnt": 1, "location_cd": "DESTINATION", "addr_nbr": "0000000001"},
+                    {"event_cnt": 1, "location_cd": "OUTLET ID", "location_id1": "I029"}
+                ]
+            },
+            {
+                "trans_id": "invalid_uuid",
+                "trans_tms": "20151022102011927EDT",
+                "rc_num": "10003",
+                "client_id": "RPS-00002",
+                "event": [{"event_cnt": 1, "location_cd": "DESTINATION"}]
+            },
+            {
+                "trans_id": str(uuid4()),
+                "trans_tms": "20151022102011927EDT",
+                "rc_num": "10004",
+                "client_id": "RPS-00003",
+                "event": [
+                    {"event_cnt": 2, "location_cd": "DESTINATION"},
+                    {"event_cnt": 1, "location_cd": "DESTINATION", "trans_tms": "bad"}
+                ]
+            },
+        ]
+
+    def test_strategies_agree(self):
+        expected = process_records_inline(self.records)
+
+        self.assertEqual(len(expected[0]), 3)
+        self.assertEqual(expected[1], 2)
+
+        for strategy in (CHUNKED_STRATEGY, PROCESS_STRATEGY):
+            with self.subTest(strategy=strategy):
+                result = preprocess_records(self.records, strategy=strategy, chunk_size=2, workers=2)
+                self.assertEqual(result, expected)
+
+    @override_settings(EVENT_PREPROCESS_STRATEGY=AUTO_STRATEGY, EVENT_PROCESS_POOL_THRESHOLD=3)
+    def test_select_strategy_by_batch_size(self):
+        self.assertEqual(select_strategy(self.records[:2]), CHUNKED_STRATEGY)
+        self.assertEqual(select_strategy(self.records), PROCESS_STRATEGY)
+        self.assertEqual(select_strategy(self.records, INLINE_STRATEGY), INLINE_STRATEGY)
+
+    @override_settings(EVENT_PREPROCESS_STRATEGY=AUTO_STRATEGY, EVENT_PROCESS_POOL_THRESHOLD=0)
+    def test_select_strategy_without_process_pool(self):
+        self.assertEqual(select_strategy(self.records), CHUNKED_STRATEGY)
+
+    def test_select_strategy_unknown(self):
+        with self.assertRaises(ValueError):
+            select_strategy(self.records, 'threads')
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+
+class PoolUtilTest(SimpleTestCase):
+
+    def make_pool(self, **options):
+        self.opened = []
+
+        def close(connection):
+            connection.closed = True
+
+        return ConnectionPool(close=close, check=lambda connection: connection.healthy, **options)
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def test_reuses_returned_connections(self):
+        pool = self.make_pool(max_size=2)
+
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        second = pool.getconn(self.connect)
+
+        self.assertIs(second, first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()['reused'], 1)
+
+    def test_replaces_connections_that_fail_the_check(self):
+        pool = self.make_pool(max_size=1)
+
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        first.healthy = False
+        second = pool.getconn(self.connect)
+
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_recently_returned_connections_skip_the_check(self):
+        pool = self.make_pool(check_after=60)
+
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        first.healthy = False
+
+        self.assertIs(pool.getconn(self.connect), first)
+        self.assertEqual(pool.stats()['checks'], 0)
+
+    def test_expired_and_discarded_connections_are_closed(self):
+        pool = self.make_pool(max_lifetime=0)
+
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        self.assertTrue(first.closed)
+
+        pool = self.make_pool()
+        first = pool.getconn(self.connect)
+        pool.putconn(first, discard=True)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_waits_for_a_free_connection(self):
+        pool = self.make_pool(max_size=1, timeout=0.01)
+
+        first = pool.getconn(self.connect)
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(self.connect)
+
+        pool.putconn(first)
+        self.assertIs(pool.getconn(self.connect), first)
+
+    def test_warm_up_opens_min_size(self):
+        pool = self.make_pool(min_size=3, max_size=5)
+
+        self.assertEqual(pool.warm_up(self.connect), 3)
+        self.assertEqual(pool.warm_up(self.connect), 0)
+        self.assertEqual(pool.stats()['idle'], 3)
+
+        pool.close_all()
+        self.assertTrue(all(connection.closed for connection in self.opened))
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = self.make_pool(max_size=1)
+
+        def fail():
+            raise OSError("connection refused")
+
+        with self.assertRaises(OSError):
+            pool.getconn(fail)
+        self.assertEqual(pool.stats()['size'], 0)
+        pool.getconn(self.connect)
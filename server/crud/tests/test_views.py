@@ -1,12 +1,24 @@
+import json
+from django.db import connection
+from django.db.models import F, QuerySet
+from django.test import override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
-from crud.models import Event
-from crud.utils.HttpResponseUtil import INTERNAL_SERVER_ERROR_CODE, VALIDATION_ERROR_CODE, NOT_FOUND_ERROR_CODE
+from crud.models import Event, EventTableVersion
+from crud.services.event_service import EVENT_TABLE_VERSION_ID
+from crud.utils.HttpResponseUtil import VALIDATION_ERROR_CODE, NOT_FOUND_ERROR_CODE, CONFLICT_ERROR_CODE
+from crud.utils.QueryBudgetUtil import QUERY_BUDGET_RAISE
+from crud.utils.ServiceUtil import ServiceUtil
+from crud.tests.factories import clear_event_cache
+from unittest.mock import patch
 from uuid import uuid4
 
+@override_settings(QUERY_BUDGET_MODE=QUERY_BUDGET_RAISE)
 class EventAPITestCase(APITestCase):
 
     def setUp(self):
+        clear_event_cache()
+        EventTableVersion.objects.get_or_create(pk=EVENT_TABLE_VERSION_ID)
         self.event = Event.objects.create(
             event_id=uuid4(),
             trans_id=uuid4(),
@@ -22,6 +34,11 @@ class EventAPITestCase(APITestCase):
         self.delete_url = f'/api/delete-event/{self.event.event_id}/'
         self.get_url = '/api/get-events/'
         self.create_url_batch = '/api/create-events-batch/'
+        self.create_url_stream = '/api/create-events-stream/'
+        self.export_url = '/api/export-events/'
+        self.rollups_url = '/api/get-event-rollups/'
+        self.bulk_update_url = '/api/bulk-update-events/'
+        self.bulk_delete_url = '/api/bulk-delete-events/'
 
     def test_create_event(self):
         data = {
@@ -37,12 +54,166 @@ class EventAPITestCase(APITestCase):
         response = self.client.post(self.create_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_create_event_conflict(self):
+        data = {
+            "trans_id": str(self.event.trans_id),
+            "trans_tms": "2015-10-22 10:20:11.927+05:30",
+            "rc_num": "10003",
+            "client_id": "RPS-00002",
+            "location_cd": "DESTINATION"
+        }
+        response = self.client.post(self.create_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['error']['code'], CONFLICT_ERROR_CODE)
+
     def test_get_events(self):
         response = self.client.get(self.get_url, format='json')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['data']), 1)
 
+    def test_get_events_paginated(self):
+        for _ in range(2):
+            Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01 00:00:00+00:00", rc_num="10002",
+                                 client_id="RPS-00001", location_cd="DESTINATION")
+
+        response = self.client.get(self.get_url, {"limit": 2, "client_id": "RPS-00001"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['data']), 2)
+        self.assertIsNone(response.data['prev'])
+
+        response = self.client.get(self.get_url, {"limit": 2, "client_id": "RPS-00001", "cursor": response.data['next']})
+
+        self.assertEqual(len(response.data['data']), 1)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['prev'])
+
+    def test_get_events_filtered(self):
+        response = self.client.get(self.get_url, {"location_cd": "OUTLET ID"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], [])
+
+    def test_get_events_invalid_params(self):
+        for params in ({"cursor": "not-a-cursor"}, {"limit": 0}, {"limit": "ten"}, {"trans_tms_from": "yesterday"}):
+            response = self.client.get(self.get_url, params)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data['error']['code'], VALIDATION_ERROR_CODE)
+
+    def test_export_events_json(self):
+        Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01 00:00:00+00:00", rc_num="10003",
+                             client_id="RPS-00002", location_cd="OUTLET ID")
+
+        response = self.client.get(self.export_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['rc_num'] for row in rows], ["10002", "10003"])
+        self.assertEqual(rows[0]['event_id'], str(self.event.event_id))
+
+    def test_export_events_runs_in_a_transaction(self):
+        iterator = QuerySet.iterator
+        depths = []
+
+        def recording_iterator(queryset, *args, **kwargs):
+            depths.append(len(connection.atomic_blocks))
+            return iterator(queryset, *args, **kwargs)
+
+        # Outside a transaction the server-side cursor is WITH HOLD, read whole before the first row
+        with patch.object(QuerySet, 'iterator', recording_iterator):
+            response = self.client.get(self.export_url)
+            b''.join(response.streaming_content)
+
+        self.assertEqual(depths, [len(connection.atomic_blocks) + 1])
+
+    def test_export_events_ndjson_filtered(self):
+        response = self.client.get(self.export_url, {"export_format": "ndjson", "client_id": "RPS-00001"})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['client_id'], "RPS-00001")
+
+    def test_export_events_empty(self):
+        response = self.client.get(self.export_url, {"client_id": "nobody"})
+
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+    def test_export_events_invalid_format(self):
+        response = self.client.get(self.export_url, {"export_format": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_event_rollups(self):
+        self.client.post(self.create_url, {
+            "trans_id": str(uuid4()),
+            "trans_tms": "2015-10-22 10:20:11.927+05:30",
+            "rc_num": "10003",
+            "client_id": "RPS-00002",
+            "event_cnt": 4,
+            "location_cd": "OUTLET ID"
+        }, format='json')
+
+        response = self.client.get(self.rollups_url, {"client_id": "RPS-00002", "hour_from": "2015-10-22T00:00:00Z"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], [{
+            "client_id": "RPS-00002",
+            "location_cd": "OUTLET ID",
+            "hour": "2015-10-22T04:00:00Z",
+            "event_cnt": 4,
+            "row_count": 1
+        }])
+
+    def test_get_event_rollups_invalid_range(self):
+        response = self.client.get(self.rollups_url, {"hour_to": "tomorrow"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_events_conditional(self):
+        response = self.client.get(self.get_url, {"limit": 10})
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.get_url, {"limit": 10}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # Other query parameters have their own validator
+        response = self.client.get(self.get_url, {"limit": 20}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_events_conditional_after_write(self):
+        response = self.client.get(self.get_url)
+        etag = response['ETag']
+
+        self.client.delete(self.delete_url)
+
+        response = self.client.get(self.get_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['data'], [])
+        self.assertIn('Last-Modified', response)
+
+    def test_get_events_body_matches_etag_version(self):
+        response = self.client.get(self.get_url)
+        etag = response['ETag']
+
+        # Another worker's write: the rows and the version row change, this process's page cache does not
+        Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01 00:00:00+00:00", rc_num="10003",
+                             client_id="RPS-00002", location_cd="OUTLET ID")
+        EventTableVersion.objects.filter(pk=EVENT_TABLE_VERSION_ID).update(version=F('version') + 1)
+
+        response = self.client.get(self.get_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([row['rc_num'] for row in response.data['data']], ["10002", "10003"])
+
     def test_update_event(self):
         update_data = {
             "trans_id": str(uuid4()),
@@ -58,11 +229,134 @@ class EventAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['data']['rc_num'], "10004")
 
+    def test_update_event_queries(self):
+        update_data = {
+            "trans_id": str(uuid4()),
+            "trans_tms": "2016-01-01 00:00:00+00:00",
+            "rc_num": "10004",
+            "client_id": "RPS-00003",
+            "event_cnt": 2,
+            "location_cd": "DESTINATION"
+        }
+        # Off PostgreSQL the old rollup columns take a SELECT of their own
+        row_queries = 1 if connection.vendor == 'postgresql' else 2
+        # On a partitioned crud_event the month's partition is made beforehand, only the update is counted
+        with self.captureOnCommitCallbacks(execute=True):
+            ServiceUtil.get_service(ServiceUtil.PARTITION_SERVICE).ensure_partitions([update_data["trans_tms"]])
+
+        # Savepoint, UPDATE ... RETURNING, rollup upsert, emptied bucket removal, version bump, release
+        with self.assertNumQueries(row_queries + 5):
+            response = self.client.put(self.update_url, update_data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['event_cnt'], 2)
+        self.assertEqual(response.data['data']['trans_tms'], "2016-01-01T00:00:00Z")
+
+        # Same rollup bucket and count, so the rollups are not touched
+        with self.assertNumQueries(row_queries + 3):
+            response = self.client.put(self.update_url, dict(update_data, rc_num="10005"), format='json')
+
+        self.assertEqual(response.data['data']['rc_num'], "10005")
+        self.assertEqual(Event.objects.get(event_id=self.event.event_id).rc_num, "10005")
+
+    def test_update_event_not_found(self):
+        update_data = {
+            "trans_id": str(uuid4()),
+            "rc_num": "10004",
+            "client_id": "RPS-00003",
+            "location_cd": "DESTINATION"
+        }
+        with self.assertNumQueries(3):
+            response = self.client.put(f'/api/update-event/{uuid4()}/', update_data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], NOT_FOUND_ERROR_CODE)
+
+        with self.assertNumQueries(0):
+            response = self.client.put(self.update_url, dict(update_data, client_id=""), format='json')
+
+        self.assertEqual(response.data['error']['code'], VALIDATION_ERROR_CODE)
+
     def test_delete_event(self):
-        response = self.client.delete(self.delete_url, format='json')
+        # Savepoint, DELETE ... RETURNING, rollup upsert, emptied bucket removal, version bump, release
+        with self.assertNumQueries(6):
+            response = self.client.delete(self.delete_url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['event_id'], str(self.event.event_id))
         self.assertEqual(Event.objects.count(), 0)
+
+        with self.assertNumQueries(3):
+            response = self.client.delete(self.delete_url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], NOT_FOUND_ERROR_CODE)
         
+    def test_bulk_update_events(self):
+        other = Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01T00:00:00Z", rc_num="1",
+                                     client_id="RPS-00001", location_cd="DESTINATION")
+        missing = str(uuid4())
+        data = {"events": [
+            {"event_id": str(self.event.event_id), "rc_num": "10005", "event_cnt": 3},
+            {"event_id": str(other.event_id), "location_cd": "OUTLET ID"},
+            {"event_id": missing, "rc_num": "10005"},
+            {"event_id": "not-a-uuid", "rc_num": "10005"},
+            {"event_id": str(other.event_id), "rc_num": "10006"},
+            {"event_id": str(self.event.event_id), "client_id": ""},
+        ]}
+        response = self.client.put(self.bulk_update_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['data']
+        self.assertEqual(result['updated'], [self.event.event_id, other.event_id])
+        self.assertEqual(result['not_found_count'], 1)
+        self.assertEqual(str(result['not_found'][0]), missing)
+        self.assertEqual(result['failed_count'], 3)
+        self.assertEqual(Event.objects.get(event_id=self.event.event_id).event_cnt, 3)
+        self.assertEqual(Event.objects.get(event_id=other.event_id).location_cd, "OUTLET ID")
+
+        response = self.client.put(self.bulk_update_url, {"events": [{"event_id": missing, "rc_num": "1"}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], VALIDATION_ERROR_CODE)
+
+        response = self.client.put(self.bulk_update_url, {"events": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_events_conflict(self):
+        other = Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01T00:00:00Z", rc_num="1",
+                                     client_id="RPS-00001", location_cd="DESTINATION")
+        data = {"events": [
+            {"event_id": str(other.event_id), "trans_id": str(self.event.trans_id), "trans_tms": "2015-10-22 10:20:11.927+05:30"},
+        ]}
+        response = self.client.put(self.bulk_update_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['data']['failed'][0]['event_id'], other.event_id)
+
+    def test_bulk_delete_events(self):
+        others = [Event.objects.create(trans_id=uuid4(), trans_tms="2016-01-01T00:00:00Z", rc_num="1",
+                                       client_id="RPS-00001", location_cd="DESTINATION") for _ in range(3)]
+        event_ids = [str(event.event_id) for event in others] + [str(uuid4()), "not-a-uuid"]
+
+        # Savepoint, DELETE ... RETURNING, rollup upsert, emptied bucket removal, version bump, release
+        with self.assertNumQueries(6):
+            response = self.client.post(self.bulk_delete_url, {"event_ids": event_ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['data']
+        self.assertEqual(result['deleted_count'], 3)
+        self.assertEqual(result['not_found_count'], 1)
+        self.assertEqual(result['failed'], [{"event_id": "not-a-uuid", "errors": "Invalid ID format"}])
+        self.assertEqual(list(Event.objects.all()), [self.event])
+
+        response = self.client.post(self.bulk_delete_url, {"event_ids": event_ids[:3]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], NOT_FOUND_ERROR_CODE)
+
+    @override_settings(EVENT_BULK_MAX_EVENTS=2)
+    def test_bulk_delete_events_limit(self):
+        response = self.client.post(self.bulk_delete_url, {"event_ids": [str(uuid4()) for _ in range(3)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Event.objects.count(), 1)
+
     def test_create_events_batch_success(self):
         # Valid event batch payload
         data = {
@@ -113,6 +407,113 @@ class EventAPITestCase(APITestCase):
         self.assertIn('added_count', response.data['data'])
         self.assertEqual(response.data['data']['added_count'], 3)
 
+    def test_create_events_batch_copy_mode(self):
+        data = {
+            "records": [
+                {
+                    "trans_id": str(uuid4()),
+                    "trans_tms": "20151022102011927EDT",
+                    "rc_num": "10002",
+                    "client_id": "RPS-00001",
+                    "event": [
+                        {
+                            "event_cnt": 1,
+                            "location_cd": "DESTINATION",
+                            "addr_nbr": "0000000001"
+                        }
+                    ]
+                }
+            ]
+        }
+
+        response = self.client.post(f'{self.create_url_batch}?mode=copy', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['added_count'], 1)
+
+    def test_create_events_batch_retry(self):
+        data = {
+            "records": [
+                {
+                    "trans_id": str(uuid4()),
+                    "trans_tms": "20151022102011927EDT",
+                    "rc_num": "10002",
+                    "client_id": "RPS-00001",
+                    "event": [{"event_cnt": 1, "location_cd": "DESTINATION"}, {"event_cnt": 1, "location_cd": "OUTLET ID"}]
+                }
+            ]
+        }
+
+        first = self.client.post(self.create_url_batch, data, format='json')
+        retry = self.client.post(self.create_url_batch, data, format='json')
+
+        self.assertEqual(first.data['data']['added_count'], 2)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data['data']['added_count'], 0)
+        self.assertEqual(retry.data['data']['skipped_count'], 2)
+        self.assertEqual(Event.objects.count(), 3)
+
+        data["records"][0]["rc_num"] = "10009"
+        update = self.client.post(f'{self.create_url_batch}?on_conflict=update', data, format='json')
+
+        self.assertEqual(update.data['data']['updated_count'], 2)
+        self.assertEqual(Event.objects.filter(rc_num="10009").count(), 2)
+
+    def test_create_events_batch_idempotency_key(self):
+        data = {
+            "records": [
+                {
+                    "trans_id": str(uuid4()),
+                    "trans_tms": "20151022102011927EDT",
+                    "rc_num": "10002",
+                    "client_id": "RPS-00001",
+                    "event": [{"event_cnt": 1, "location_cd": "DESTINATION"}]
+                }
+            ]
+        }
+
+        first = self.client.post(self.create_url_batch, data, format='json', HTTP_IDEMPOTENCY_KEY='batch-1')
+
+        with self.assertNumQueries(1):
+            replay = self.client.post(self.create_url_batch, data, format='json', HTTP_IDEMPOTENCY_KEY='batch-1')
+
+        self.assertEqual(replay.status_code, status.HTTP_200_OK)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), json.loads(first.content))
+
+        data["records"][0]["rc_num"] = "10003"
+        reused = self.client.post(self.create_url_batch, data, format='json', HTTP_IDEMPOTENCY_KEY='batch-1')
+
+        self.assertEqual(reused.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(reused.data['error']['code'], CONFLICT_ERROR_CODE)
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_create_events_batch_invalid_conflict_mode(self):
+        data = {"records": [{"trans_id": str(uuid4()), "event": []}]}
+
+        response = self.client.post(f'{self.create_url_batch}?on_conflict=replace', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], VALIDATION_ERROR_CODE)
+
+    def test_create_events_batch_invalid_mode(self):
+        data = {
+            "records": [
+                {
+                    "trans_id": str(uuid4()),
+                    "trans_tms": "20151022102011927EDT",
+                    "rc_num": "10002",
+                    "client_id": "RPS-00001",
+                    "event": [{"event_cnt": 1, "location_cd": "DESTINATION"}]
+                }
+            ]
+        }
+
+        response = self.client.post(f'{self.create_url_batch}?mode=fast', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], VALIDATION_ERROR_CODE)
+
     def test_create_events_batch_no_records(self):
         # Invalid payload (no records)
         data = {
@@ -182,3 +583,73 @@ class EventAPITestCase(APITestCase):
         # Check that it returns HTTP 400 for missing fields
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('client_id', response.data['error']['detail'][0])  # Check for client_id field error
+
+    @override_settings(EVENT_BATCH_CHUNK_SIZE=1)
+    def test_create_events_stream(self):
+        record = {
+            "trans_id": str(uuid4()),
+            "trans_tms": "20151022102011927EDT",
+            "rc_num": "10002",
+            "client_id": "RPS-00001",
+            "event": [
+                {"event_cnt": 1, "location_cd": "DESTINATION", "addr_nbr": "0000000001"},
+                {"event_cnt": 1, "location_cd": "OUTLET ID", "location_id1": "I029"}
+            ]
+        }
+        invalid_record = dict(record, trans_id="invalid_uuid")
+        lines = [json.dumps(record), "{not json", "", json.dumps(invalid_record)]
+
+        response = self.client.post(self.create_url_stream, "\n".join(lines), content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['line_count'], 3)
+        self.assertEqual(response.data['data']['added_count'], 2)
+        self.assertEqual(response.data['data']['failed_count'], 3)
+        # Lines that went through whole are only counted
+        self.assertEqual(
+            [(line['line'], line['failed_count']) for line in response.data['data']['lines']],
+            [(2, 1), (4, 2)]
+        )
+        self.assertFalse(response.data['data']['lines_truncated'])
+        self.assertEqual(Event.objects.count(), 3)
+
+    @override_settings(EVENT_STREAM_MAX_LINE_RESULTS=2)
+    def test_create_events_stream_caps_line_results(self):
+        record = {
+            "trans_id": str(uuid4()),
+            "trans_tms": "20151022102011927EDT",
+            "rc_num": "10002",
+            "client_id": "RPS-00001",
+            "event": [{"event_cnt": 1, "location_cd": "DESTINATION"}]
+        }
+        lines = [json.dumps(record)] * 2 + ["{not json"] * 3
+
+        response = self.client.post(self.create_url_stream, "\n".join(lines), content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['added_count'], 1)
+        self.assertEqual(response.data['data']['skipped_count'], 1)
+        self.assertEqual(response.data['data']['failed_count'], 3)
+        # The first two problems found: line 2's skipped event is found when its chunk is written
+        self.assertEqual([line['line'] for line in response.data['data']['lines']], [3, 4])
+        self.assertTrue(response.data['data']['lines_truncated'])
+
+    def test_create_events_stream_serializer_error(self):
+        record = {
+            "trans_id": str(uuid4()),
+            "trans_tms": "20151022102011927EDT",
+            "rc_num": "10002",
+            "event": [{"event_cnt": 1, "location_cd": "DESTINATION"}]
+        }
+
+        response = self.client.post(self.create_url_stream, json.dumps(record), content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], VALIDATION_ERROR_CODE)
+        self.assertIn('client_id', response.data['data']['lines'][0]['errors'][0])
+
+    def test_create_events_stream_empty(self):
+        response = self.client.post(self.create_url_stream, "", content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error']['code'], VALIDATION_ERROR_CODE)
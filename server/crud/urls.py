@@ -1,10 +1,16 @@
 from django.urls import path
-from .views import create_event, create_events_batch, get_events, update_event, delete_event
+from .views import create_event, create_events_batch, create_events_stream, get_ingest_job, get_events, export_events, get_event_rollups, update_event, delete_event, bulk_update_events, bulk_delete_events
 
 urlpatterns = [
     path('create-event/', create_event, name='create-event'),
     path('create-events-batch/', create_events_batch, name='create-events-batch'),
+    path('create-events-stream/', create_events_stream, name='create-events-stream'),
+    path('get-ingest-job/<str:job_id>/', get_ingest_job, name='get-ingest-job'),
     path('get-events/', get_events, name='get-events'),
+    path('export-events/', export_events, name='export-events'),
+    path('get-event-rollups/', get_event_rollups, name='get-event-rollups'),
     path('update-event/<str:event_id>/', update_event, name='update-event'),
     path('delete-event/<str:event_id>/', delete_event, name='delete-event'),
+    path('bulk-update-events/', bulk_update_events, name='bulk-update-events'),
+    path('bulk-delete-events/', bulk_delete_events, name='bulk-delete-events'),
 ]
\ No newline at end of file
@@ -0,0 +1,61 @@
+import hashlib
+from collections import Counter
+from threading import Lock
+from django.conf import settings
+from django.core.cache import caches
+
+PAGE_KEY = 'events:page:{}:{}'
+
+
+def _params_digest(params):
+    return hashlib.sha1(repr(params).encode()).hexdigest()
+
+
+class EventCache:
+    """
+    Read-through cache for listing pages.
+
+    Pages are keyed under the table version of EventTableVersion, read from
+    the database, which every write bumps. All cached pages go stale at once,
+    in every process sharing the database, without tracking them; the
+    version is also what the listing ETag is built from.
+    """
+
+    def __init__(self, alias=None):
+        self.alias = alias or settings.EVENT_CACHE_ALIAS
+        self._stats = Counter()
+        self._stats_lock = Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _count(self, name, hit):
+        with self._stats_lock:
+            self._stats[f'{name}_{"hits" if hit else "misses"}'] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {key: self._stats[key] for key in ('page_hits', 'page_misses')}
+
+    def get_page(self, version, params, load):
+        key = PAGE_KEY.format(version, _params_digest(params))
+        page = self.cache.get(key)
+        self._count('page', page is not None)
+
+        if page is None:
+            page = load()
+            self.cache.set(key, page)
+
+        return page
+
+    async def aget_page(self, version, params, load):
+        key = PAGE_KEY.format(version, _params_digest(params))
+        page = await self.cache.aget(key)
+        self._count('page', page is not None)
+
+        if page is None:
+            page = await load()
+            await self.cache.aset(key, page)
+
+        return page
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+COPY_NULL = '\\N'
+
+# Characters that must be backslash-escaped in COPY text format
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def to_copy_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def to_copy_line(values):
+    return '\t'.join(to_copy_value(value) for value in values) + '\n'
+
+
+class CopyStream:
+    """
+    File-like object for COPY FROM STDIN that encodes rows lazily, so the
+    payload is never held in memory as a whole.
+    """
+
+    def __init__(self, rows):
+        self._lines = (to_copy_line(row).encode('utf-8') for row in rows)
+        self._buffer = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+
+        if size < 0:
+            size = len(self._buffer)
+
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
@@ -0,0 +1,30 @@
+import base64
+import json
+from uuid import UUID
+from django.utils.dateparse import parse_datetime
+
+NEXT_CURSOR = 'next'
+PREV_CURSOR = 'prev'
+
+
+def encode_cursor(trans_tms, event_id, direction):
+    payload = json.dumps([trans_tms.isoformat(), str(event_id), direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (trans_tms, event_id, direction) keyset position of a cursor
+    produced by encode_cursor.
+    """
+    try:
+        trans_tms, event_id, direction = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        trans_tms = parse_datetime(trans_tms)
+        event_id = UUID(event_id)
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+
+    if trans_tms is None or direction not in (NEXT_CURSOR, PREV_CURSOR):
+        raise ValueError("Invalid cursor")
+
+    return trans_tms, event_id, direction
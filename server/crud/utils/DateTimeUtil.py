@@ -1,9 +1,26 @@
-
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import pytz
 import re
 
 
+# Fixed UTC offsets for the zone suffixes used in trans_tms values
+TIMEZONE_SUFFIXES = {
+    name: timezone(timedelta(hours=hours), name)
+    for name, hours in (
+        ('UTC', 0), ('GMT', 0),
+        ('EST', -5), ('EDT', -4),
+        ('CST', -6), ('CDT', -5),
+        ('MST', -7), ('MDT', -6),
+        ('PST', -8), ('PDT', -7),
+        ('AKST', -9), ('AKDT', -8),
+        ('HST', -10),
+    )
+}
+
+# yyyyMMddHHmmssSSS followed by the zone suffix
+_DIGITS_LENGTH = 17
+
+
 def convert_to_iso(trans_tms):
     # Define the pattern to match the datetime format with EDT suffix
     pattern = r'(\d{8})(\d{6})(\d{3})(EDT)'
@@ -24,4 +41,48 @@ def convert_to_iso(trans_tms):
     # Convert to ISO 8601 format
     iso_format = dt.astimezone(pytz.timezone('Asia/Kolkata')).isoformat()
     
-    return iso_format
\ No newline at end of file
+    return iso_format
+
+
+def parse_timestamp(trans_tms):
+    try:
+        digits = trans_tms[:_DIGITS_LENGTH]
+        tzinfo = TIMEZONE_SUFFIXES[trans_tms[_DIGITS_LENGTH:]]
+    except (TypeError, KeyError):
+        raise ValueError(f"Invalid datetime format: {trans_tms}")
+
+    if len(digits) != _DIGITS_LENGTH or not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"Invalid datetime format: {trans_tms}")
+
+    return datetime(
+        int(digits[0:4]), int(digits[4:6]), int(digits[6:8]),
+        int(digits[8:10]), int(digits[10:12]), int(digits[12:14]),
+        int(digits[14:17]) * 1000,
+        tzinfo=tzinfo,
+    )
+
+
+def parse_timestamps(column):
+    """
+    Parses a column of trans_tms strings into timezone-aware datetimes.
+    Values that cannot be parsed come back as None, in place.
+    """
+    parsed = {}
+    result = []
+
+    for trans_tms in column:
+
+        if not isinstance(trans_tms, str):
+            result.append(None)
+            continue
+
+        # Batches tend to repeat the same timestamp, parse each distinct value once
+        if trans_tms not in parsed:
+            try:
+                parsed[trans_tms] = parse_timestamp(trans_tms)
+            except ValueError:
+                parsed[trans_tms] = None
+
+        result.append(parsed[trans_tms])
+
+    return result
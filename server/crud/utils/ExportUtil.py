@@ -0,0 +1,86 @@
+import json
+from itertools import islice
+from django.core.serializers.json import DjangoJSONEncoder
+from crud.serializers import get_event_row_serializer
+
+JSON_FORMAT = 'json'
+NDJSON_FORMAT = 'ndjson'
+
+EXPORT_CONTENT_TYPES = {
+    JSON_FORMAT: 'application/json',
+    NDJSON_FORMAT: 'application/x-ndjson',
+}
+
+
+def serialize_chunks(rows, chunk_size):
+    # Serialize chunk by chunk so only one chunk of rows is held at a time
+    serializer = get_event_row_serializer()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield serializer.serialize(chunk)
+
+
+async def aserialize_chunks(rows, chunk_size):
+    # serialize_chunks over an async iterable of rows
+    serializer = get_event_row_serializer()
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield serializer.serialize(chunk)
+            chunk = []
+    if chunk:
+        yield serializer.serialize(chunk)
+
+
+def _ndjson_lines(chunk):
+    return ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in chunk)
+
+
+def _json_items(chunk):
+    return ','.join(json.dumps(row, cls=DjangoJSONEncoder) for row in chunk)
+
+
+def stream_ndjson(rows, chunk_size):
+    for chunk in serialize_chunks(rows, chunk_size):
+        yield _ndjson_lines(chunk)
+
+
+def stream_json_array(rows, chunk_size):
+    yield '['
+    separator = ''
+    for chunk in serialize_chunks(rows, chunk_size):
+        yield separator + _json_items(chunk)
+        separator = ','
+    yield ']'
+
+
+def stream_events(rows, export_format, chunk_size):
+    """
+    Streams values_list() rows in EventRowSerializer's field order.
+    """
+    if export_format == NDJSON_FORMAT:
+        return stream_ndjson(rows, chunk_size)
+    return stream_json_array(rows, chunk_size)
+
+
+async def astream_events(rows, export_format, chunk_size):
+    """
+    stream_events for an async iterable of rows, for ASGI responses.
+    """
+    chunks = aserialize_chunks(rows, chunk_size)
+
+    if export_format == NDJSON_FORMAT:
+        async for chunk in chunks:
+            yield _ndjson_lines(chunk)
+        return
+
+    yield '['
+    separator = ''
+    async for chunk in chunks:
+        yield separator + _json_items(chunk)
+        separator = ','
+    yield ']'
@@ -1,13 +1,20 @@
+from django.http import JsonResponse
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 INTERNAL_SERVER_ERROR_CODE = 'internal-server-error'
 VALIDATION_ERROR_CODE = 'invalid'
 NOT_FOUND_ERROR_CODE = 'not-found'
+CONFLICT_ERROR_CODE = 'conflict'
 
 def to_json_response(data=None, status_code=200):
     return Response({"error": None, "data": data}, status_code)
 
 
+def to_json_page_response(data=None, next_cursor=None, prev_cursor=None, status_code=200):
+    return Response({"error": None, "data": data, "next": next_cursor, "prev": prev_cursor}, status_code)
+
+
 def to_json_error_response(status_code=400, code="", error_detail=None, data=None):
     return Response({
         "error": {
@@ -15,4 +22,29 @@ def to_json_error_response(status_code=400, code="", error_detail=None, data=Non
             "detail": error_detail
         },
         "data": data,
-    }, status=status_code)
\ No newline at end of file
+    }, status=status_code)
+
+
+# Plain Django responses with the same envelope and encoding, for the async views that do not go through DRF
+JSON_DUMPS_PARAMS = {"separators": (',', ':'), "ensure_ascii": False}
+
+def _json_http_response(body, status_code):
+    return JsonResponse(body, status=status_code, encoder=JSONEncoder, json_dumps_params=JSON_DUMPS_PARAMS)
+
+
+def to_json_http_response(data=None, status_code=200):
+    return _json_http_response({"error": None, "data": data}, status_code)
+
+
+def to_json_http_page_response(data=None, next_cursor=None, prev_cursor=None, status_code=200):
+    return _json_http_response({"error": None, "data": data, "next": next_cursor, "prev": prev_cursor}, status_code)
+
+
+def to_json_http_error_response(status_code=400, code="", error_detail=None, data=None):
+    return _json_http_response({
+        "error": {
+            "code": code,
+            "detail": error_detail
+        },
+        "data": data,
+    }, status_code)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+from functools import wraps
+from rest_framework.response import Response
+from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT
+from crud.services.idempotency_service import IdempotencyKeyReused, IdempotencyKeyInProgress
+from crud.utils.ServiceUtil import ServiceUtil
+from crud.utils.HttpResponseUtil import to_json_error_response, VALIDATION_ERROR_CODE, CONFLICT_ERROR_CODE
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENT_REPLAYED_HEADER = 'Idempotent-Replayed'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def request_fingerprint(request):
+    payload = json.dumps(
+        [request.method, request.path, sorted(request.query_params.lists()), request.data],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(view):
+    """
+    Replays the stored response when a request is retried with the same
+    Idempotency-Key header, and turns away a retry sent while the first
+    request still runs. Goes under @api_view, 5xx responses are not stored.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        
+        if not key:
+            return view(request, *args, **kwargs)
+        
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid Idempotency-Key")
+        
+        idempotency_service = ServiceUtil.get_service(ServiceUtil.IDEMPOTENCY_SERVICE)
+        fingerprint = request_fingerprint(request)
+        
+        try:
+            stored = idempotency_service.reserve(key, fingerprint)
+        except (IdempotencyKeyReused, IdempotencyKeyInProgress) as e:
+            return to_json_error_response(HTTP_409_CONFLICT, CONFLICT_ERROR_CODE, str(e))
+        
+        if stored is not None:
+            status_code, data = stored
+            response = Response(data, status_code)
+            response[IDEMPOTENT_REPLAYED_HEADER] = 'true'
+            return response
+        
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            idempotency_service.release(key, fingerprint)
+            raise
+        
+        if response.status_code < 500:
+            idempotency_service.save_response(key, fingerprint, response.status_code, response.data)
+        else:
+            idempotency_service.release(key, fingerprint)
+        
+        return response
+    
+    return wrapper
@@ -0,0 +1,69 @@
+import json
+import os
+import django
+
+
+def split_byte_ranges(path, pieces):
+    """
+    Splits the file into at most `pieces` (start, end) byte ranges of about
+    equal size, each starting at the beginning of a line.
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+
+    with open(path, 'rb') as source:
+        for index in range(1, pieces):
+            offset = size * index // pieces
+            if offset <= boundaries[-1]:
+                continue
+            # From the byte before, so a line starting right at the offset is not skipped
+            source.seek(offset - 1)
+            source.readline()
+            boundary = source.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+
+def read_lines(source, start, end):
+    """
+    Yields (offset, next_offset, line) for the lines of a binary file that
+    start in [start, end).
+    """
+    source.seek(start)
+    offset = start
+
+    while offset < end:
+        line = source.readline()
+        if not line:
+            break
+        yield offset, offset + len(line), line
+        offset += len(line)
+
+
+def parse_import_line(line):
+    """
+    The records of one JSONL line: a single record, as create-events-stream
+    takes them, or a create-events-batch body with a records list.
+    Raises ValueError for anything else.
+    """
+    item = json.loads(line)
+
+    if isinstance(item, dict) and isinstance(item.get("records"), list):
+        records = item["records"]
+    else:
+        records = [item]
+
+    for record in records:
+        if not isinstance(record, dict) or not isinstance(record.get("event"), list):
+            raise ValueError("Invalid record")
+
+    return records
+
+
+def setup_import_worker():
+    # Initializer of the spawned import_events workers: they start from a fresh interpreter,
+    # so this module must not import models, and open their own database connections
+    django.setup()
@@ -0,0 +1,238 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from threading import Lock
+from django.conf import settings
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+UNMATCHED_ENDPOINT = 'unmatched'
+KNOWN_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+REQUESTS_TOTAL = 'http_requests_total'
+REQUEST_LABELS = ('endpoint', 'method')
+
+# Histograms observed once per request: name -> (help, upper bounds)
+HISTOGRAMS = {
+    'http_request_duration_seconds': (
+        'Time from the request reaching the server to the response headers.',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    ),
+    'http_request_db_queries': (
+        'Database queries run per request.',
+        (0, 1, 2, 3, 5, 10, 20, 50, 100, 500),
+    ),
+    'http_request_db_seconds': (
+        'Time spent in database queries per request.',
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    ),
+    'http_response_size_bytes': (
+        'Response body size, streamed responses are not counted.',
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+    ),
+    'http_request_batch_size': (
+        'Records or events per batch request.',
+        (1, 10, 100, 1000, 5000, 10000, 50000, 100000),
+    ),
+}
+
+
+class RequestStats:
+    """
+    What one request did, filled in while it runs.
+    """
+    __slots__ = ('queries', 'db_seconds', 'batch_size')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.batch_size = None
+
+
+# Context variables follow a request into sync_to_async threads, thread locals would not
+_current_request = ContextVar('request_metrics', default=None)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current_request.set(stats)
+
+
+def finish_request(token):
+    _current_request.reset(token)
+
+
+def observe_batch_size(size):
+    """
+    Records the size of the batch handled by the current request.
+    """
+    stats = _current_request.get()
+    if stats is not None:
+        stats.batch_size = size
+
+
+def time_query(execute, sql, params, many, context):
+    stats = _current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+def install_query_timer(connection, **kwargs):
+    # Connected to connection_created in CrudConfig.ready, which fires again whenever a wrapper reconnects
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestMetrics:
+    """
+    Request counts and per-endpoint histograms of one server process.
+
+    Everything is kept as plain counters under one lock, so recording a
+    request costs a few additions. With METRICS_DIR set, every process
+    writes its counters there now and then and /metrics adds up all of
+    the files, so a scrape sees every worker and not just the one that
+    answered it.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._requests = Counter()
+        # (histogram, endpoint, method) -> [count per bucket..., count above the last bucket, sum]
+        self._histograms = {}
+        self._last_flush = 0.0
+
+    def _observe(self, name, labels, value):
+        key = (name,) + labels
+        counts = self._histograms.get(key)
+        buckets = HISTOGRAMS[name][1]
+        if counts is None:
+            counts = self._histograms[key] = [0] * (len(buckets) + 2)
+        counts[bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    def observe_request(self, endpoint, method, status, seconds, stats, response_size=None):
+        labels = (endpoint, method)
+        with self._lock:
+            self._requests[labels + (str(status),)] += 1
+            self._observe('http_request_duration_seconds', labels, seconds)
+            self._observe('http_request_db_queries', labels, stats.queries)
+            self._observe('http_request_db_seconds', labels, stats.db_seconds)
+            if response_size is not None:
+                self._observe('http_response_size_bytes', labels, response_size)
+            if stats.batch_size is not None:
+                self._observe('http_request_batch_size', labels, stats.batch_size)
+
+        if settings.METRICS_DIR and time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": [list(labels) + [count] for labels, count in self._requests.items()],
+                "histograms": [list(key) + [list(counts)] for key, counts in self._histograms.items()],
+            }
+
+    def flush(self):
+        """
+        Writes this process's counters to METRICS_DIR.
+        """
+        self._last_flush = time.monotonic()
+        path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        with open(path + '.tmp', 'w') as output:
+            json.dump(self.snapshot(), output)
+        # Readers never see a half-written file
+        os.replace(path + '.tmp', path)
+
+    def collect(self):
+        """
+        Counters of this process, plus those of the other processes with METRICS_DIR.
+        """
+        snapshots = [self.snapshot()]
+        if settings.METRICS_DIR and os.path.isdir(settings.METRICS_DIR):
+            own_file = f'{os.getpid()}.json'
+            for name in os.listdir(settings.METRICS_DIR):
+                if name.endswith('.json') and name != own_file:
+                    try:
+                        with open(os.path.join(settings.METRICS_DIR, name)) as snapshot:
+                            snapshots.append(json.load(snapshot))
+                    except (OSError, ValueError):
+                        continue
+
+        requests = Counter()
+        histograms = {}
+        for snapshot in snapshots:
+            for *labels, count in snapshot["requests"]:
+                requests[tuple(labels)] += count
+            for *key, counts in snapshot["histograms"]:
+                # Files left by a process running with other buckets are skipped
+                if key[0] not in HISTOGRAMS or len(counts) != len(HISTOGRAMS[key[0]][1]) + 2:
+                    continue
+                merged = histograms.setdefault(tuple(key), [0] * len(counts))
+                for index, value in enumerate(counts):
+                    merged[index] += value
+        return requests, histograms
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        requests, histograms = self.collect()
+        lines = [
+            f'# HELP {REQUESTS_TOTAL} Requests served, by endpoint, method and status.',
+            f'# TYPE {REQUESTS_TOTAL} counter',
+        ]
+        for labels, count in sorted(requests.items()):
+            lines.append(f'{REQUESTS_TOTAL}{_labels(REQUEST_LABELS + ("status",), labels)} {count}')
+
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for key, counts in sorted((key, counts) for key, counts in histograms.items() if key[0] == name):
+                labels = key[1:]
+                cumulative = 0
+                for bound, count in zip(buckets, counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(REQUEST_LABELS, labels, le=_number(bound))} {cumulative}')
+                cumulative += counts[-2]
+                lines.append(f'{name}_bucket{_labels(REQUEST_LABELS, labels, le="+Inf")} {cumulative}')
+                lines.append(f'{name}_sum{_labels(REQUEST_LABELS, labels)} {_number(counts[-1])}')
+                lines.append(f'{name}_count{_labels(REQUEST_LABELS, labels)} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._histograms.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def flush_metrics():
+    if settings.METRICS_ENABLED and settings.METRICS_DIR:
+        request_metrics.flush()
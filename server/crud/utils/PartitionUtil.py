@@ -0,0 +1,58 @@
+import re
+from datetime import datetime, timezone as dt_timezone
+from django.utils import timezone
+
+# crud_event partitions are named after the UTC month they hold, e.g. crud_event_p2024_05
+PARTITION_NAME = re.compile(r'^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$')
+
+
+def month_start(value):
+    """
+    The first instant of the UTC month value falls in. Naive values are in
+    the current time zone, like the ORM treats them.
+    """
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def month_range(first, last):
+    """
+    Month starts from first to last, both included.
+    """
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table, month):
+    return f'{table}_p{month.year:04d}_{month.month:02d}'
+
+
+def default_partition_name(table):
+    # Takes the rows no month partition does, e.g. written by the ORM outside EventService
+    return f'{table}_default'
+
+
+def partition_month(table, name):
+    """
+    The month a partition named by partition_name holds, or None for other tables.
+    """
+    match = PARTITION_NAME.match(name)
+    if match is None or match['table'] != table:
+        return None
+    return datetime(int(match['year']), int(match['month']), 1, tzinfo=dt_timezone.utc)
+
+
+def partition_bounds(month):
+    # FOR VALUES FROM (start) TO (end), the end is exclusive
+    return month, add_months(month, 1)
@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import Counter
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of open database connections, shared by every thread
+    of the process.
+
+    getconn(connect) hands out the most recently returned idle connection,
+    or opens one with connect() while fewer than max_size exist, or waits
+    up to timeout seconds for one to be returned. An idle connection is
+    tested with check(connection) when it sat unused for check_after
+    seconds or more, and closed instead of reused once it is max_lifetime
+    seconds old.
+    """
+
+    def __init__(self, close, check=None, min_size=0, max_size=10, timeout=30.0, max_lifetime=3600.0, check_after=0.0):
+        self.close = close
+        self.check = check
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+
+        self._lock = threading.Condition()
+        # (connection, opened_at, returned_at), most recently returned last
+        self._idle = []
+        # opened_at of the connections that are checked out, by id()
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+        self._stats = Counter()
+
+    def getconn(self, connect):
+        deadline = time.monotonic() + self.timeout
+
+        with self._lock:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # The slot is taken before connecting, so the lock is not held while connecting
+                    self._size += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No database connection was returned within {self.timeout}s, all {self.max_size} are in use")
+                self._stats['waits'] += 1
+                self._lock.wait(remaining)
+
+        if entry is not None:
+            connection, opened_at, returned_at = entry
+            now = time.monotonic()
+
+            if now - opened_at >= self.max_lifetime:
+                self._count('expired')
+                self._close(connection)
+            elif self.check and now - returned_at >= self.check_after and not self._checked(connection):
+                self._count('failed_checks')
+                self._close(connection)
+            else:
+                with self._lock:
+                    self._in_use[id(connection)] = opened_at
+                    self._stats['reused'] += 1
+                return connection
+
+        # A new connection takes the slot of the one that could not be reused
+        return self._open(connect)
+
+    def putconn(self, connection, discard=False):
+
+        with self._lock:
+            opened_at = self._in_use.pop(id(connection), None)
+
+        if opened_at is None:
+            # Not handed out by this pool
+            self._close(connection)
+            return
+
+        if discard or self._closed or time.monotonic() - opened_at >= self.max_lifetime:
+            self._close(connection)
+            self._release_slot()
+            return
+
+        with self._lock:
+            self._idle.append((connection, opened_at, time.monotonic()))
+            self._lock.notify()
+
+    def warm_up(self, connect):
+        """
+        Opens connections until the pool holds min_size. Returns the number opened.
+        """
+        opened = 0
+
+        while True:
+            with self._lock:
+                if self._size >= self.min_size:
+                    return opened
+                self._size += 1
+
+            connection = self._open(connect)
+            opened += 1
+            self.putconn(connection)
+
+    def close_all(self):
+        # Closes the idle connections; checked-out ones are closed when they come back
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._lock.notify_all()
+
+        for connection, _, _ in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                **{key: self._stats[key] for key in ('opened', 'reused', 'checks', 'failed_checks', 'expired', 'waits', 'timeouts')},
+            }
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            self._release_slot()
+            raise
+
+        with self._lock:
+            self._in_use[id(connection)] = time.monotonic()
+            self._stats['opened'] += 1
+        return connection
+
+    def _checked(self, connection):
+        self._count('checks')
+        try:
+            return self.check(connection)
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def _release_slot(self):
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+
+def warm_up_connections():
+    """
+    Fills the connection pools of the configured databases up to their
+    minimum size. Called once per server worker before it takes requests.
+    """
+    from django.db import connections
+
+    for alias in connections:
+        connection = connections[alias]
+        if not hasattr(connection, 'warm_up'):
+            continue
+        try:
+            connection.warm_up()
+        except Exception as e:
+            # The pool opens connections on demand instead
+            print(e)
+
+
+def close_connection_pools():
+    from django.db import connections
+
+    for alias in connections:
+        connection = connections[alias]
+        if hasattr(connection, 'close_connection_pool'):
+            connection.close_connection_pool()
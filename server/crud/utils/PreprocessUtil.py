@@ -0,0 +1,162 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from crud.utils.ValidatorUtil import validate_id_format
+from crud.utils.DateTimeUtil import parse_timestamp, parse_timestamps
+
+INLINE_STRATEGY = 'inline'
+CHUNKED_STRATEGY = 'chunked'
+PROCESS_STRATEGY = 'process'
+AUTO_STRATEGY = 'auto'
+
+STRATEGIES = (INLINE_STRATEGY, CHUNKED_STRATEGY, PROCESS_STRATEGY, AUTO_STRATEGY)
+
+# Record-level keys that are validated once per record by the chunked strategy
+_RECORD_KEYS = ('trans_id', 'trans_tms')
+
+
+def process_event(item, event):
+
+    event_copy = item.copy()
+    event_copy.update(event)
+
+    del event_copy["event"]
+
+    try:
+        event_copy['trans_id'] = validate_id_format(event_copy['trans_id'])
+    except ValueError as e:
+        print(f'Error validating ID: {e}')
+        return None
+    
+    try:
+        event_copy['trans_tms'] = parse_timestamp(event_copy['trans_tms'])
+    except Exception as e:
+        print(f'Error converting date: {e}')
+        return None
+        
+    return event_copy
+
+
+def process_records_inline(records):
+
+    events = []
+    failed_count = 0
+
+    for item in records:
+        for event in item["event"]:
+            event_copy = process_event(item, event)
+            if event_copy:
+                events.append(event_copy)
+            else:
+                failed_count += 1
+
+    return events, failed_count
+
+
+def process_records_chunk(records):
+    """
+    Column-wise version of process_records_inline: trans_id and trans_tms are
+    validated once per record and shared by all of its events.
+    """
+    events = []
+    failed_count = 0
+
+    trans_ids = []
+    for item in records:
+        try:
+            trans_ids.append(validate_id_format(item.get("trans_id")))
+        except (ValueError, TypeError, AttributeError):
+            trans_ids.append(None)
+
+    timestamps = parse_timestamps([item.get("trans_tms") for item in records])
+
+    for item, trans_id, trans_tms in zip(records, trans_ids, timestamps):
+
+        base = {key: value for key, value in item.items() if key != "event"}
+        base["trans_id"] = trans_id
+        base["trans_tms"] = trans_tms
+
+        for event in item["event"]:
+
+            # Events that override record-level keys take the per-event path
+            if any(key in event for key in _RECORD_KEYS):
+                event_copy = process_event(item, event)
+            elif trans_id is None or trans_tms is None:
+                event_copy = None
+            else:
+                event_copy = base.copy()
+                event_copy.update(event)
+
+            if event_copy:
+                events.append(event_copy)
+            else:
+                failed_count += 1
+
+    return events, failed_count
+
+
+def _chunks(records, chunk_size):
+    return [records[start:start + chunk_size] for start in range(0, len(records), chunk_size)]
+
+
+def _process_records_chunked(records, chunk_size):
+
+    events = []
+    failed_count = 0
+
+    for chunk in _chunks(records, chunk_size):
+        chunk_events, chunk_failed = process_records_chunk(chunk)
+        events.extend(chunk_events)
+        failed_count += chunk_failed
+
+    return events, failed_count
+
+
+def _process_records_in_pool(records, chunk_size, workers):
+
+    events = []
+    failed_count = 0
+
+    # Workers receive whole chunks, never single events
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_events, chunk_failed in executor.map(process_records_chunk, _chunks(records, chunk_size)):
+            events.extend(chunk_events)
+            failed_count += chunk_failed
+
+    return events, failed_count
+
+
+def select_strategy(records, strategy=None):
+
+    strategy = strategy or settings.EVENT_PREPROCESS_STRATEGY
+
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown preprocessing strategy: {strategy}")
+
+    if strategy == AUTO_STRATEGY:
+        # Forking workers and pickling chunks only pays off for large batches, and
+        # forks a web worker with its connections and threads, so it is opt-in
+        threshold = settings.EVENT_PROCESS_POOL_THRESHOLD
+        if threshold and len(records) >= threshold:
+            return PROCESS_STRATEGY
+        return CHUNKED_STRATEGY
+
+    return strategy
+
+
+def preprocess_records(records, strategy=None, chunk_size=None, workers=None):
+    """
+    Expands batch records into validated event dicts.
+    Returns the events and the number of events that failed preprocessing.
+    """
+    strategy = select_strategy(records, strategy)
+
+    if strategy == INLINE_STRATEGY:
+        return process_records_inline(records)
+
+    chunk_size = chunk_size or settings.EVENT_BATCH_CHUNK_SIZE
+
+    if strategy == PROCESS_STRATEGY:
+        workers = workers or settings.EVENT_PREPROCESS_WORKERS
+        return _process_records_in_pool(records, chunk_size, workers)
+
+    return _process_records_chunked(records, chunk_size)
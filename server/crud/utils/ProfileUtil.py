@@ -0,0 +1,157 @@
+import cProfile
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+from django.conf import settings
+from django.db import connections
+
+PROFILE_SUFFIX = '.prof'
+META_SUFFIX = '.json'
+
+# Client supplied request ids become file names, so only plain ones are kept
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def should_profile(request):
+    """
+    Whether this request is profiled: asked for by the PROFILING_HEADER
+    header, or picked at PROFILING_SAMPLE_RATE.
+    """
+    header = settings.PROFILING_HEADER
+    if header and request.headers.get(header, '').lower() in ('1', 'true'):
+        return True
+    return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def request_id_for(request):
+    request_id = request.headers.get('X-Request-ID', '')
+    return request_id if REQUEST_ID_PATTERN.match(request_id) else uuid4().hex
+
+
+def profile_id_for(request_id):
+    # A server-generated suffix, so a client reusing an id cannot overwrite another profile
+    return f'{request_id}-{uuid4().hex[:12]}'
+
+
+class QueryLog:
+    """
+    Execute wrapper keeping the SQL and duration of the queries of one request.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.seconds += duration
+            # Parameters are left out, they carry event data
+            if len(self.queries) < self.limit:
+                self.queries.append({"sql": sql, "many": many, "ms": round(duration * 1000, 3)})
+
+
+def profile_call(call):
+    """
+    Runs call() under cProfile with every query logged, on the calling thread.
+    """
+    profiler = cProfile.Profile()
+    query_log = QueryLog(settings.PROFILING_MAX_QUERIES)
+    wrappers = [connection.execute_wrapper(query_log) for connection in connections.all()]
+
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        result = call()
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - start
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+    return result, profiler, query_log, seconds
+
+
+def write_profile(profile_id, profiler, meta):
+    """
+    Stores <profile_id>.prof (pstats format) and <profile_id>.json in
+    PROFILING_DIR, then drops the oldest profiles beyond PROFILING_KEEP.
+    """
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    base = os.path.join(settings.PROFILING_DIR, profile_id)
+    profiler.dump_stats(base + PROFILE_SUFFIX)
+    with open(base + META_SUFFIX, 'w') as output:
+        json.dump(meta, output, indent=2)
+    prune_profiles(settings.PROFILING_KEEP)
+
+
+def profile_meta(profile_id, request_id, request, response, query_log, seconds):
+    match = request.resolver_match
+    return {
+        "profile_id": profile_id,
+        "request_id": request_id,
+        "endpoint": match.view_name if match else None,
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "profiled_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(seconds * 1000, 3),
+        "query_count": query_log.count,
+        "query_ms": round(query_log.seconds * 1000, 3),
+        "queries": query_log.queries,
+    }
+
+
+def list_profiles(directory=None):
+    """
+    Metadata of the stored profiles, oldest first.
+    """
+    directory = directory or settings.PROFILING_DIR
+    if not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith(META_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path) as meta:
+                profile = json.load(meta)
+        except (OSError, ValueError):
+            continue
+        profile["profile_path"] = path[:-len(META_SUFFIX)] + PROFILE_SUFFIX
+        profiles.append(profile)
+
+    return sorted(profiles, key=lambda profile: profile["profiled_at"])
+
+
+def prune_profiles(keep):
+    """
+    Removes all but the newest keep profiles, 0 keeps everything.
+    """
+    if not keep:
+        return
+
+    # By modification time, so pruning does not parse every stored file
+    with os.scandir(settings.PROFILING_DIR) as entries:
+        metas = sorted((entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(META_SUFFIX))
+
+    for _, path in metas[:max(len(metas) - keep, 0)]:
+        for stale in (path, path[:-len(META_SUFFIX)] + PROFILE_SUFFIX):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
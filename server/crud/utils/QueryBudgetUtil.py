@@ -0,0 +1,123 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+# Values of QUERY_BUDGET_MODE that turn QueryBudgetMiddleware on
+QUERY_BUDGET_RAISE = 'raise'
+QUERY_BUDGET_WARN = 'warn'
+
+# Transaction bookkeeping around the real queries, not counted against a budget
+CONTROL_STATEMENT = re.compile(r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT|ROLLBACK)\b', re.IGNORECASE)
+
+# Applied in order to reduce a statement to its shape
+SHAPE_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\?|(?<![\w"])-?\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    A request or block ran more queries than its budget, or the same query
+    shape more often than QUERY_REPEAT_THRESHOLD.
+    """
+
+
+def query_shape(sql):
+    """
+    The statement with literals and placeholders replaced by ?, and value
+    lists folded to (...), so queries differing only in their values match.
+    """
+    for pattern, replacement in SHAPE_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+# The queries of the current request or block. A context variable, so the
+# threads async views run their ORM calls on record into the same list.
+_recorded_queries = ContextVar('recorded_queries', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    queries = _recorded_queries.get()
+    if queries is not None:
+        queries.append(sql)
+    return execute(sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    # Connected to connection_created in CrudConfig.ready
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def recording_queries():
+    """
+    Collects the SQL of every query run inside the block, on any connection.
+    """
+    queries = []
+    token = _recorded_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _recorded_queries.reset(token)
+
+
+@contextmanager
+def unbudgeted():
+    """
+    Leaves the queries of the block out of the current recording, for
+    upkeep that runs once in a while rather than per request.
+    """
+    token = _recorded_queries.set(None)
+    try:
+        yield
+    finally:
+        _recorded_queries.reset(token)
+
+
+def check_query_budget(queries, budget, label, repeat_threshold=None):
+    """
+    Raises QueryBudgetExceeded when the queries go over budget (None for no
+    budget) or repeat a shape repeat_threshold times or more.
+    """
+    repeat_threshold = repeat_threshold or settings.QUERY_REPEAT_THRESHOLD
+    counted = [sql for sql in queries if not CONTROL_STATEMENT.match(sql)]
+    shapes = Counter(query_shape(sql) for sql in counted)
+    repeated = {shape for shape, count in shapes.items() if count >= repeat_threshold}
+
+    if (budget is None or len(counted) <= budget) and not repeated:
+        return
+
+    lines = []
+    if budget is not None and len(counted) > budget:
+        lines.append(f'{label} ran {len(counted)} queries, {len(counted) - budget} over its budget of {budget}')
+    else:
+        lines.append(f'{label} ran {len(counted)} queries')
+    if repeated:
+        lines.append(f'Possible N+1: {len(repeated)} query shapes repeated {repeat_threshold} times or more (marked +)')
+
+    # In order of first appearance, the way the code ran them
+    for shape, count in shapes.items():
+        lines.append(f'{"+" if shape in repeated else " "} {count:>5} x {shape}')
+
+    raise QueryBudgetExceeded('\n'.join(lines))
+
+
+@contextmanager
+def query_budget(budget, label='Block', repeat_threshold=None):
+    """
+    Fails the block when it goes over budget or runs an N+1 pattern:
+
+        with query_budget(5, 'get-events'):
+            self.client.get('/api/get-events/')
+    """
+    with recording_queries() as queries:
+        yield queries
+    check_query_budget(queries, budget, label, repeat_threshold)
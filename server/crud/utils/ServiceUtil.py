@@ -2,6 +2,11 @@ from django.apps import apps
 
 class ServiceUtil:
     EVENT_SERVICE = 'event_service'
+    ROLLUP_SERVICE = 'rollup_service'
+    IDEMPOTENCY_SERVICE = 'idempotency_service'
+    INGEST_JOB_SERVICE = 'ingest_job_service'
+    PARTITION_SERVICE = 'partition_service'
+    IMPORT_SERVICE = 'import_service'
 
     @staticmethod
     def get_service(service_name: str):
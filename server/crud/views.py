@@ -1,34 +1,32 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
 from rest_framework.decorators import api_view
-from rest_framework.status import HTTP_500_INTERNAL_SERVER_ERROR, HTTP_400_BAD_REQUEST
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from crud.serializers import EventSerializer
+from rest_framework.status import HTTP_500_INTERNAL_SERVER_ERROR, HTTP_202_ACCEPTED, HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT
+from crud.serializers import EventSerializer, EventRollupSerializer, IngestJobSerializer, get_event_row_serializer, get_event_batch_validator
 from crud.utils.ServiceUtil import ServiceUtil
-from crud.utils.HttpResponseUtil import to_json_response, to_json_error_response, INTERNAL_SERVER_ERROR_CODE, VALIDATION_ERROR_CODE, NOT_FOUND_ERROR_CODE
+from crud.utils.HttpResponseUtil import to_json_response, to_json_page_response, to_json_error_response, INTERNAL_SERVER_ERROR_CODE, VALIDATION_ERROR_CODE, NOT_FOUND_ERROR_CODE, CONFLICT_ERROR_CODE
 from crud.utils.ValidatorUtil import validate_id_format
-from crud.utils.DateTimeUtil import convert_to_iso
+from crud.utils.PreprocessUtil import process_event, preprocess_records
+from crud.utils.CursorUtil import decode_cursor
+from crud.utils.ExportUtil import stream_events, astream_events, EXPORT_CONTENT_TYPES, JSON_FORMAT
+from crud.utils.IdempotencyUtil import idempotent
+from crud.utils.MetricsUtil import request_metrics, observe_batch_size, PROMETHEUS_CONTENT_TYPE
+from crud.services.event_service import EVENT_FILTERS, ON_CONFLICT_MODES, SKIP_CONFLICTS
+from crud.services.rollup_service import ROLLUP_FILTERS
 
-MAX_WORKERS = 5
+# Write modes accepted by create-events-batch through the ?mode= query parameter
+BATCH_WRITE_MODES = {'copy': True, 'insert': False}
 
-def process_event(item, event):
-
-    event_copy = item.copy()
-    event_copy.update(event)
-
-    del event_copy["event"]
-
-    try:
-        event_copy['trans_id'] = validate_id_format(event_copy['trans_id'])
-    except ValueError as e:
-        print(f'Error validating ID: {e}')
-        return None
-    
-    try:
-        event_copy['trans_tms'] = convert_to_iso(event_copy['trans_tms'])
-    except Exception as e:
-        print(f'Error converting date: {e}')
-        return None
-        
-    return event_copy
+# Values of ?async= that queue a batch as an ingest job
+ASYNC_VALUES = ('1', 'true')
 
 @api_view(['POST'])
 def create_event(request):
@@ -51,11 +49,14 @@ def create_event(request):
             return to_json_response()
         
         return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, serializer.errors)
+    except IntegrityError:
+        return to_json_error_response(HTTP_409_CONFLICT, CONFLICT_ERROR_CODE, "Event already exists")
     except Exception as e:
         print(e)
         return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
     
 @api_view(['POST'])
+@idempotent
 def create_events_batch(request):
     try:
         data = request.data.copy()
@@ -68,54 +69,316 @@ def create_events_batch(request):
         if not records:
             return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No records found")
 
-        events = []
-        failed_events = []
+        observe_batch_size(len(records))
+
+        # Without an explicit mode the service picks COPY by batch size
+        mode = request.query_params.get("mode")
+
+        if mode is not None and mode not in BATCH_WRITE_MODES:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid write mode")
+
+        # Events repeating an existing natural key are skipped unless ?on_conflict=update
+        on_conflict = request.query_params.get("on_conflict", SKIP_CONFLICTS)
 
-        # Parallel processing of events using ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = []
-            for item in records:
-                for event in item["event"]:
-                    futures.append(executor.submit(process_event, item, event))
+        if on_conflict not in ON_CONFLICT_MODES:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid conflict mode")
 
-            # Collect the results as they complete
-            for future in as_completed(futures):
-                event_copy = future.result()
-                if event_copy:
-                    events.append(event_copy)
-                else:
-                    failed_events.append(event_copy)
+        # ?async=1 stores the records for run_ingest_worker and answers with the job right away
+        if request.query_params.get("async", "").lower() in ASYNC_VALUES:
+
+            if not isinstance(records, list):
+                return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid records")
+
+            ingest_job_service = ServiceUtil.get_service(ServiceUtil.INGEST_JOB_SERVICE)
+            job = ingest_job_service.enqueue(records, use_copy=BATCH_WRITE_MODES.get(mode), on_conflict=on_conflict)
+
+            response = to_json_response(data=IngestJobSerializer(job).data, status_code=HTTP_202_ACCEPTED)
+            response["Location"] = reverse('get-ingest-job', args=[job.job_id])
+            return response
+
+        # Expand and validate the events with the configured strategy, chunk by chunk
+        events, _ = preprocess_records(records)
 
         # If all events failed, return error
         if not events:
             return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No valid records to process")
 
-        # Serialize the valid events
-        serializer = EventSerializer(data=events, many=True)
+        # Validate the valid events column by column, with the serializer's errors
+        validated, errors = get_event_batch_validator().validate(events)
 
-        if serializer.is_valid():
+        if not any(errors):
             event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
-            result = event_service.create_events_batch(serializer.validated_data)
+            result = event_service.create_events_batch(
+                validated, use_copy=BATCH_WRITE_MODES.get(mode), on_conflict=on_conflict
+            )
 
-            if result["added_count"] > 0:
+            # A retried batch whose events all exist already is a successful no-op
+            if result["added_count"] + result["updated_count"] + result["skipped_count"] > 0:
                 return to_json_response(data=result)
 
             return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No records added", result)
 
-        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, serializer.errors, events)
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, errors, events)
 
     except Exception as e:
         print(e)
         return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
     
+def count_line_events(result, line_no, key, count=1, error=None):
+
+    result[key] += count
+
+    if key == "added_count":
+        return
+
+    # Only lines with failed or skipped events are listed, and at most EVENT_STREAM_MAX_LINE_RESULTS of them
+    line = result["lines"].get(line_no)
+
+    if line is None:
+        if len(result["lines"]) >= settings.EVENT_STREAM_MAX_LINE_RESULTS:
+            result["lines_truncated"] = True
+            return
+        line = result["lines"][line_no] = {"line": line_no, "skipped_count": 0, "failed_count": 0, "errors": []}
+
+    line[key] += count
+    if error is not None:
+        line["errors"].append(error)
+
+def flush_events_chunk(event_service, chunk, result):
+
+    events = []
+    lines = {}
+
+    # The chunk's events are validated together, column by column
+    validated_rows, row_errors = get_event_batch_validator().validate([event_copy for _, event_copy in chunk])
+
+    for (line_no, _), validated, error in zip(chunk, validated_rows, row_errors):
+        if error:
+            count_line_events(result, line_no, "failed_count", error=error)
+            continue
+
+        events.append(validated)
+        lines[id(validated)] = line_no
+
+    if not events:
+        return
+
+    batch_result = event_service.create_events_batch(events)
+
+    for event in batch_result["added"]:
+        count_line_events(result, lines[id(event)], "added_count")
+
+    for event in batch_result["skipped"]:
+        count_line_events(result, lines[id(event)], "skipped_count")
+
+    for event in batch_result["failed"]:
+        count_line_events(result, lines[id(event)], "failed_count", error="Failed to save event")
+
+@api_view(['POST'])
+def create_events_stream(request):
+
+    try:
+        # Read the raw body line by line instead of parsing it through request.data
+        if request.stream is None:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No data found")
+
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+
+        # Running totals; memory holds one chunk of events and the capped list of problem lines
+        result = {"line_count": 0, "added_count": 0, "skipped_count": 0, "failed_count": 0, "lines": {}, "lines_truncated": False}
+        chunk = []
+
+        for line_no, line in enumerate(request.stream, start=1):
+
+            line = line.strip()
+
+            if not line:
+                continue
+
+            result["line_count"] += 1
+
+            try:
+                item = json.loads(line)
+                events = item["event"]
+            except (ValueError, KeyError, TypeError):
+                count_line_events(result, line_no, "failed_count", error="Invalid record")
+                continue
+
+            for event in events:
+
+                try:
+                    event_copy = process_event(item, event)
+                except (KeyError, TypeError, AttributeError, ValueError):
+                    event_copy = None
+
+                if not event_copy:
+                    count_line_events(result, line_no, "failed_count", error="Invalid Transaction ID or timestamp")
+                    continue
+
+                chunk.append((line_no, event_copy))
+
+            # Write in fixed-size chunks so memory does not grow with the upload
+            if len(chunk) >= settings.EVENT_BATCH_CHUNK_SIZE:
+                flush_events_chunk(event_service, chunk, result)
+                chunk = []
+
+        if chunk:
+            flush_events_chunk(event_service, chunk, result)
+
+        if not result["line_count"]:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No records found")
+
+        observe_batch_size(result["line_count"])
+
+        # Skipped events are only known once their chunk is written, after later lines failed
+        result["lines"] = sorted(result["lines"].values(), key=lambda line: line["line"])
+
+        if result["added_count"] + result["skipped_count"] > 0:
+            return to_json_response(data=result)
+
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No records added", result)
+
+    except Exception as e:
+        print(e)
+        return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+def parse_filters(query_params, allowed_filters):
+
+    filters = {key: query_params[key] for key in allowed_filters if query_params.get(key)}
+
+    # Range bounds (*_from / *_to) are datetimes
+    for key, value in filters.items():
+        if key.endswith(('_from', '_to')):
+            filters[key] = parse_datetime(value)
+            if filters[key] is None:
+                raise ValueError(f"Invalid {key} format")
+
+    return filters
+
+def parse_event_filters(query_params):
+    return parse_filters(query_params, EVENT_FILTERS)
+
+def parse_page_limit(query_params):
+
+    limit = query_params.get("limit")
+
+    if limit is None:
+        return settings.EVENT_PAGE_SIZE
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError("Invalid limit")
+
+    if not 0 < limit <= settings.EVENT_PAGE_SIZE_MAX:
+        raise ValueError(f"limit must be between 1 and {settings.EVENT_PAGE_SIZE_MAX}")
+
+    return limit
+
+def listing_etag(version, query_params):
+    # Every page and filter combination has its own validator under the same table version
+    query = hashlib.sha1(query_params.urlencode().encode()).hexdigest()[:16]
+    return f'"{version}-{query}"'
+
+@api_view(['GET'])
+def get_ingest_job(request, job_id):
+
+    try:
+        job_id = validate_id_format(job_id)
+    except ValueError as e:
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    try:
+        ingest_job_service = ServiceUtil.get_service(ServiceUtil.INGEST_JOB_SERVICE)
+        job = ingest_job_service.get_job(job_id)
+
+        if not job:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "Ingest job not found")
+
+        return to_json_response(data=IngestJobSerializer(job).data)
+    except Exception as e:
+        print(e)
+        return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
 @api_view(['GET'])
 def get_events(request):
     
+    try:
+        filters = parse_event_filters(request.query_params)
+        limit = parse_page_limit(request.query_params)
+        cursor = request.query_params.get("cursor")
+        cursor = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+    
     try:
         event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
-        events = event_service.get_all_events()
         
-        serializer = EventSerializer(events, many=True)
+        version, modified_at = event_service.get_table_version()
+        etag = listing_etag(version, request.query_params)
+        last_modified = modified_at.timestamp() if modified_at else None
+        
+        # An unchanged table answers 304 before the listing query runs
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+        
+        serializer = get_event_row_serializer()
+        # Cached under the version the ETag is built from, so the body never lags the ETag
+        page = event_service.get_events_page(filters, cursor, limit, fields=serializer.field_names, version=version)
+        
+        response = to_json_page_response(serializer.serialize(page["events"]), page["next"], page["prev"])
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+    except Exception as e:
+        print(e)
+        return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+@api_view(['GET'])
+def export_events(request):
+
+    try:
+        filters = parse_event_filters(request.query_params)
+    except ValueError as e:
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    # ?format= is taken by DRF's content negotiation
+    export_format = request.query_params.get("export_format", JSON_FORMAT)
+
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid export format")
+
+    try:
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+        fields = get_event_row_serializer().field_names
+
+        # Served over ASGI, Django reads a sync iterator to the end before sending it; an async one streams
+        if isinstance(request._request, ASGIRequest):
+            content = astream_events(event_service.aiter_events(filters, fields=fields), export_format, settings.EVENT_EXPORT_CHUNK_SIZE)
+        else:
+            content = stream_events(event_service.iter_events(filters, fields=fields), export_format, settings.EVENT_EXPORT_CHUNK_SIZE)
+
+        return StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[export_format])
+    except Exception as e:
+        print(e)
+        return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+@api_view(['GET'])
+def get_event_rollups(request):
+
+    try:
+        filters = parse_filters(request.query_params, ROLLUP_FILTERS)
+    except ValueError as e:
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
+
+    try:
+        rollup_service = ServiceUtil.get_service(ServiceUtil.ROLLUP_SERVICE)
+        rollups = rollup_service.get_rollups(filters)
+
+        serializer = EventRollupSerializer(rollups, many=True)
         return to_json_response(serializer.data)
     except Exception as e:
         print(e)
@@ -130,12 +393,6 @@ def update_event(request, event_id):
         return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, str(e))
     
     try:
-        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
-        event = event_service.get_event_by_id(event_id)
-        
-        if not event:
-            return to_json_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "Event not found")
-        
         data = request.data.copy()
         
         if not data:
@@ -147,11 +404,19 @@ def update_event(request, event_id):
             except ValueError:
                 return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "Invalid Transaction ID format")
         
-        serializer = EventSerializer(event, data=data)
+        # Validation needs no stored row, a missing event is reported by the UPDATE itself
+        serializer = EventSerializer(data=data)
         if serializer.is_valid():
+            event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
             updated_event = event_service.update_event(event_id, serializer.validated_data)
+            
+            if not updated_event:
+                return to_json_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "Event not found")
+            
             return to_json_response(data=EventSerializer(updated_event).data)
         return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, serializer.errors)
+    except IntegrityError:
+        return to_json_error_response(HTTP_409_CONFLICT, CONFLICT_ERROR_CODE, "Another event has the same transaction ID, location and timestamp")
     except Exception as e:
         print(e)
         return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
@@ -167,13 +432,131 @@ def delete_event(request, event_id):
     
     try:
         event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
-        event = event_service.get_event_by_id(event_id)
+        event = event_service.delete_event(event_id)
         
         if not event:
-            to_json_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "Event not found")
-            
-        event_service.delete_event(event_id)
+            return to_json_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "Event not found")
+        
         return to_json_response(data=EventSerializer(event).data)
     except Exception as e:
         print(e)
         return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+def parse_bulk_event_id(event_id):
+    try:
+        return validate_id_format(event_id)
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid ID format")
+
+@api_view(['PUT'])
+def bulk_update_events(request):
+    
+    try:
+        items = request.data.get("events") if isinstance(request.data, dict) else None
+        
+        if not items or not isinstance(items, list):
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No events found")
+        
+        if len(items) > settings.EVENT_BULK_MAX_EVENTS:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, f"At most {settings.EVENT_BULK_MAX_EVENTS} events per request")
+        
+        observe_batch_size(len(items))
+        
+        # Every item is an event_id with the fields to change; invalid items are reported and the rest still written
+        updates = {}
+        failed = []
+        
+        for item in items:
+            data = dict(item) if isinstance(item, dict) else {}
+            raw_id = data.pop("event_id", None)
+            
+            try:
+                event_id = parse_bulk_event_id(raw_id)
+            except ValueError as e:
+                failed.append({"event_id": raw_id, "errors": str(e)})
+                continue
+            
+            if event_id in updates:
+                failed.append({"event_id": event_id, "errors": "Duplicate event ID"})
+                continue
+            
+            if not data:
+                failed.append({"event_id": event_id, "errors": "No data found"})
+                continue
+            
+            if 'trans_id' in data:
+                try:
+                    data['trans_id'] = parse_bulk_event_id(data['trans_id'])
+                except ValueError:
+                    failed.append({"event_id": event_id, "errors": "Invalid Transaction ID format"})
+                    continue
+            
+            serializer = EventSerializer(data=data, partial=True)
+            if not serializer.is_valid():
+                failed.append({"event_id": event_id, "errors": serializer.errors})
+                continue
+            
+            updates[event_id] = serializer.validated_data
+        
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+        result = event_service.update_events_bulk(updates)
+        
+        result["failed"] = failed + [
+            {"event_id": event_id, "errors": "Another event has the same transaction ID, location and timestamp"}
+            for event_id in result["failed"]
+        ]
+        result["failed_count"] = len(result["failed"])
+        
+        if result["updated_count"] > 0:
+            return to_json_response(data=result)
+        
+        return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No events updated", result)
+    except Exception as e:
+        print(e)
+        return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+# A POST, request bodies on DELETE are dropped by some clients and proxies
+@api_view(['POST'])
+def bulk_delete_events(request):
+    
+    try:
+        items = request.data.get("event_ids") if isinstance(request.data, dict) else None
+        
+        if not items or not isinstance(items, list):
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, "No event IDs found")
+        
+        if len(items) > settings.EVENT_BULK_MAX_EVENTS:
+            return to_json_error_response(HTTP_400_BAD_REQUEST, VALIDATION_ERROR_CODE, f"At most {settings.EVENT_BULK_MAX_EVENTS} events per request")
+        
+        observe_batch_size(len(items))
+        
+        event_ids = []
+        failed = []
+        
+        for raw_id in items:
+            try:
+                event_ids.append(parse_bulk_event_id(raw_id))
+            except ValueError as e:
+                failed.append({"event_id": raw_id, "errors": str(e)})
+        
+        event_service = ServiceUtil.get_service(ServiceUtil.EVENT_SERVICE)
+        result = event_service.delete_events_bulk(event_ids)
+        
+        result["failed"] = failed
+        result["failed_count"] = len(failed)
+        
+        if result["deleted_count"] > 0:
+            return to_json_response(data=result)
+        
+        return to_json_error_response(HTTP_400_BAD_REQUEST, NOT_FOUND_ERROR_CODE, "No events deleted", result)
+    except Exception as e:
+        print(e)
+        return to_json_error_response(HTTP_500_INTERNAL_SERVER_ERROR, INTERNAL_SERVER_ERROR_CODE, str(e))
+
+# Plain Django view: Prometheus expects its text format, not the JSON envelope
+def metrics(request):
+
+    if not settings.METRICS_ENABLED:
+        raise Http404()
+
+    return HttpResponse(request_metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,32 @@
+import os
+
+# ASGI (uvicorn workers) by default. SERVER_INTERFACE=wsgi serves the same project from
+# threaded sync workers, which is what benchmarks/bench_load.py compares against.
+interface = os.environ.get('SERVER_INTERFACE', 'asgi')
+
+bind = os.environ.get('SERVER_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('SERVER_TIMEOUT', 120))
+accesslog = '-'
+
+if interface == 'wsgi':
+    wsgi_app = 'server.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('SERVER_THREADS', 8))
+else:
+    wsgi_app = 'server.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+
+def post_worker_init(worker):
+    # Opens the database pool's first connections before the worker takes requests
+    from crud.utils.PoolUtil import warm_up_connections
+    warm_up_connections()
+
+
+def worker_exit(server, worker):
+    from crud.utils.PoolUtil import close_connection_pools
+    from crud.utils.MetricsUtil import flush_metrics
+    close_connection_pools()
+    # The last requests of the worker are counted at /metrics, see METRICS_DIR
+    flush_metrics()
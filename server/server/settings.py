@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 import environ
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +45,9 @@ CORS_ALLOW_ALL_ORIGINS = True
 #     'http://localhost:5173',
 # ]
 CORS_ALLOW_CREDENTIALS = True
+# Conditional GET on event listings and idempotent batch retries
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since', 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified', 'Idempotent-Replayed', 'Location']
 
 # Application definition
 
@@ -60,6 +64,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings include the rest of the stack
+    'crud.middleware.RequestMetricsMiddleware',
+    'crud.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -68,6 +75,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last, so a profile holds the view and nothing around it
+    'crud.middleware.RequestProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'server.urls'
@@ -94,14 +103,33 @@ WSGI_APPLICATION = 'server.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# DB_POOL keeps a pool of open connections per server process that requests borrow and
+# hand back (crud/backends/pooled_postgresql). Without it, DB_CONN_MAX_AGE keeps a connection
+# open per thread between requests, which only helps the threaded WSGI workers.
+DB_POOL = env.bool('DB_POOL', default=True)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'crud.backends.pooled_postgresql' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': env('DB_NAME'),
         'USER': env('DB_USER'),
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),  # or the IP address where PostgreSQL is running
         'PORT': env('DB_PORT'),  # default PostgreSQL port
+        'CONN_MAX_AGE': 0 if DB_POOL else env.int('DB_CONN_MAX_AGE', default=0),
+        # Reused connections are tested with SELECT 1 before a request gets them
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
+        'POOL': {
+            # Opened when a server worker starts, see gunicorn.conf.py
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+            # Seconds a request waits for a free connection
+            'timeout': env.float('DB_POOL_TIMEOUT', default=30.0),
+            # Seconds before a connection is replaced with a fresh one
+            'max_lifetime': env.float('DB_POOL_MAX_LIFETIME', default=3600.0),
+            # Connections handed back less than this many seconds ago skip the health check
+            'check_after': env.float('DB_POOL_CHECK_AFTER', default=1.0),
+        },
     }
 }
 
@@ -148,3 +176,138 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Caching
+
+# Event listing pages are cached in their own alias, keyed by the table version in the
+# database, so a per-process locmem cache stays correct with several workers. A shared
+# cache (e.g. redis://...) only saves each worker from loading the same pages.
+EVENT_CACHE_ALIAS = 'events'
+EVENT_CACHE = env.cache('EVENT_CACHE_URL', default='locmemcache://events')
+EVENT_CACHE['TIMEOUT'] = env.int('EVENT_CACHE_TTL', default=60)
+EVENT_CACHE.setdefault('OPTIONS', {})['MAX_ENTRIES'] = env.int('EVENT_CACHE_MAX_ENTRIES', default=10000)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    EVENT_CACHE_ALIAS: EVENT_CACHE,
+}
+
+# Event ingestion
+
+# Number of rows written per INSERT statement by EventService.create_events_batch
+EVENT_BATCH_CHUNK_SIZE = env.int('EVENT_BATCH_CHUNK_SIZE', default=1000)
+
+# Batches with at least this many rows are loaded with COPY FROM STDIN on PostgreSQL
+EVENT_COPY_THRESHOLD = env.int('EVENT_COPY_THRESHOLD', default=20000)
+
+# Lines with failed or skipped events listed in a create-events-stream response, the counts cover all lines
+EVENT_STREAM_MAX_LINE_RESULTS = env.int('EVENT_STREAM_MAX_LINE_RESULTS', default=1000)
+
+# Events per bulk-update-events / bulk-delete-events request, written EVENT_BATCH_CHUNK_SIZE at a time
+EVENT_BULK_MAX_EVENTS = env.int('EVENT_BULK_MAX_EVENTS', default=10000)
+
+# How batch records are expanded and validated: inline, chunked, process or auto
+EVENT_PREPROCESS_STRATEGY = env('EVENT_PREPROCESS_STRATEGY', default='auto')
+
+# With the auto strategy, batches with at least this many records use the process pool.
+# 0 (the default) keeps auto in the web worker's own process, which the pool would fork
+EVENT_PROCESS_POOL_THRESHOLD = env.int('EVENT_PROCESS_POOL_THRESHOLD', default=0)
+EVENT_PREPROCESS_WORKERS = env.int('EVENT_PREPROCESS_WORKERS', default=os.cpu_count() or 1)
+
+# Seconds a create-events-batch response is replayed for a retried Idempotency-Key
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60)
+
+# Seconds after which a key whose request never finished (a killed worker) can be taken again
+IDEMPOTENCY_PENDING_TIMEOUT = env.int('IDEMPOTENCY_PENDING_TIMEOUT', default=10 * 60)
+
+# Asynchronous batch ingestion (create-events-batch?async=1, run_ingest_worker)
+
+# Records written per job step; progress is saved after every step
+INGEST_JOB_CHUNK_SIZE = env.int('INGEST_JOB_CHUNK_SIZE', default=1000)
+
+# Seconds without a heartbeat after which a running job is taken over by another worker
+INGEST_JOB_LEASE = env.int('INGEST_JOB_LEASE', default=300)
+INGEST_JOB_MAX_ATTEMPTS = env.int('INGEST_JOB_MAX_ATTEMPTS', default=3)
+
+# Failed records kept per job for the status endpoint, failed_count still counts all of them
+INGEST_JOB_MAX_FAILURES = env.int('INGEST_JOB_MAX_FAILURES', default=1000)
+
+# Seconds an idle worker waits before polling the queue again
+INGEST_WORKER_POLL_INTERVAL = env.float('INGEST_WORKER_POLL_INTERVAL', default=2.0)
+
+# Failed lines kept per import_events range checkpoint, failed_count still counts all of them
+IMPORT_MAX_FAILURES = env.int('IMPORT_MAX_FAILURES', default=1000)
+
+# Event listing
+
+# Default and maximum number of events per get-events page
+EVENT_PAGE_SIZE = env.int('EVENT_PAGE_SIZE', default=100)
+EVENT_PAGE_SIZE_MAX = env.int('EVENT_PAGE_SIZE_MAX', default=1000)
+
+# Rows fetched per server-side cursor round trip by export-events
+EVENT_EXPORT_CHUNK_SIZE = env.int('EVENT_EXPORT_CHUNK_SIZE', default=2000)
+
+# Event partitioning
+
+# PostgreSQL only. The partition_events command turns crud_event into a table range partitioned by
+# trans_tms month; with EVENT_PARTITIONING set as well, writes create missing month partitions as they go.
+EVENT_PARTITIONING = env.bool('EVENT_PARTITIONING', default=False)
+
+# Months after the current one created in advance by partition_events and create_event_partitions
+EVENT_PARTITION_MONTHS_AHEAD = env.int('EVENT_PARTITION_MONTHS_AHEAD', default=3)
+
+# Full months kept before the current one by expire_event_partitions, 0 keeps every month
+EVENT_RETENTION_MONTHS = env.int('EVENT_RETENTION_MONTHS', default=0)
+
+# Metrics
+
+# Per-endpoint request metrics, served in the Prometheus text format at /metrics
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+
+# With several server processes, a directory they all write their counters to so /metrics
+# reports all of them. Each process writes at most every METRICS_FLUSH_INTERVAL seconds.
+METRICS_DIR = env('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = env.float('METRICS_FLUSH_INTERVAL', default=5.0)
+
+# Profiling
+
+# Opt-in cProfile runs of single requests, stored in PROFILING_DIR (see profile_report).
+# A request is profiled when it carries PROFILING_HEADER: 1, or at PROFILING_SAMPLE_RATE.
+PROFILING_ENABLED = env.bool('PROFILING_ENABLED', default=False)
+PROFILING_HEADER = env('PROFILING_HEADER', default='X-Profile')
+PROFILING_SAMPLE_RATE = env.float('PROFILING_SAMPLE_RATE', default=0.0)
+PROFILING_DIR = env('PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+
+# Newest profiles kept, and queries logged per profile
+PROFILING_KEEP = env.int('PROFILING_KEEP', default=500)
+PROFILING_MAX_QUERIES = env.int('PROFILING_MAX_QUERIES', default=1000)
+
+# Query budgets
+
+# Checks every request against the most queries its endpoint may run, excluding transaction
+# statements, and flags query shapes repeated QUERY_REPEAT_THRESHOLD times as N+1 patterns.
+# The budgets are sized for the requests of the test suite; batches larger than
+# EVENT_BATCH_CHUNK_SIZE legitimately run more. Streamed responses query after the check.
+# raise fails the request (the test suite runs with it), warn prints the report, '' is off.
+QUERY_BUDGET_MODE = env('QUERY_BUDGET_MODE', default='')
+QUERY_REPEAT_THRESHOLD = env.int('QUERY_REPEAT_THRESHOLD', default=10)
+QUERY_BUDGETS = {
+    'create-event': 3,
+    'async-create-event': 5,
+    # The COPY path on PostgreSQL adds the staging table statements
+    'create-events-batch': 10,
+    'create-events-stream': 7,
+    'get-ingest-job': 1,
+    'get-events': 2,
+    'async-get-events': 2,
+    'get-event-rollups': 1,
+    'async-get-event-rollups': 1,
+    'update-event': 5,
+    'async-update-event': 7,
+    'delete-event': 4,
+    'async-delete-event': 4,
+    'bulk-update-events': 5,
+    'bulk-delete-events': 4,
+}
@@ -16,8 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from crud.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include('crud.async_urls')),
     path('api/', include('crud.urls')),
+    path('metrics', metrics, name='metrics'),
 ]